@@ -2,10 +2,31 @@
 """Quick analysis of experiment results."""
 import sys
 import json
-import re
+import argparse
 from pathlib import Path
 from collections import defaultdict
 
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.analysis import (
+    block_reason,
+    build_results_table,
+    bootstrap_breakdown,
+    extract_certainty,
+    extract_decision,
+    is_expert_prompt,
+    load_results,
+    mcnemar_test,
+    paired_bootstrap_diff,
+    paired_outcomes,
+    result_outcome,
+)
+from src.analysis.voting import calibration_bins
+from src.profiling import add_profile_arguments, profiled, span
+
 
 def load_pairs_metadata():
     """Load pairs metadata for ground truth."""
@@ -17,49 +38,12 @@ def load_pairs_metadata():
     return {pair["pair_id"]: pair for pair in metadata}
 
 
-def extract_decision(llm_response, prompt_type):
-    """Extract Yes/No decision from LLM response."""
-    response_lower = llm_response.lower()
-
-    if prompt_type == "naive":
-        # Look for "Answer: Yes" or "Answer: No" or **Yes** at start
-        if re.search(r'\*\*answer:\s*yes\*\*', response_lower) or response_lower.startswith("**yes**"):
-            return "yes"
-        elif re.search(r'\*\*answer:\s*no\*\*', response_lower) or response_lower.startswith("**no**"):
-            return "no"
-
-    elif prompt_type == "expert":
-        # Look for "ANSWER: YES" or "ANSWER: NO" (expert format)
-        match = re.search(r'answer:\s*(yes|no)', response_lower)
-        if match:
-            return match.group(1)
-
-    # Fallback: check if "yes" or "no" appears early in response
-    first_100 = response_lower[:100]
-    if "yes" in first_100 and "no" not in first_100:
-        return "yes"
-    elif "no" in first_100 and "yes" not in first_100:
-        return "no"
-
-    return "unclear"
-
-
-def extract_certainty(llm_response):
-    """Extract certainty level from expert response."""
-    response_lower = llm_response.lower()
-    match = re.search(r'certainty:\s*(high|medium|low)', response_lower)
-    if match:
-        return match.group(1)
-    return "unknown"
-
-
 def analyze_results(results_file):
     """Analyze experiment results."""
     # Load pairs metadata for ground truth
     pairs_metadata = load_pairs_metadata()
 
-    with open(results_file) as f:
-        results = json.load(f)
+    results = load_results([results_file])
 
     print(f"Analyzing: {results_file}")
     print("=" * 70)
@@ -90,6 +74,9 @@ def analyze_results(results_file):
         correct = 0
         incorrect = 0
         unclear = 0
+        blocked = defaultdict(int)
+        local = 0
+        inferred = 0
         error = 0
 
         by_category = defaultdict(lambda: {"correct": 0, "incorrect": 0, "total": 0, "error": 0})
@@ -119,6 +106,19 @@ def analyze_results(results_file):
                 ground_truth = pair_meta["ground_truth"]  # "same" or "different"
                 category = pair_meta["category"]
 
+                # Safety blocks / empty candidates have no answer to score
+                if result_outcome(result) == "blocked":
+                    blocked[block_reason(result)] += 1
+                    continue
+                # Cascade decisions made without the LLM are reported separately
+                if result_outcome(result) == "local":
+                    local += 1
+                    continue
+                # Answers implied by the identity graph are not the model's own
+                if result_outcome(result) == "inferred":
+                    inferred += 1
+                    continue
+
                 llm_response = result["llm_response"]
                 decision = extract_decision(llm_response, prompt_type)
 
@@ -131,7 +131,7 @@ def analyze_results(results_file):
                     predicted = "unclear"
 
                 # Extract certainty if expert prompt
-                certainty = extract_certainty(llm_response) if prompt_type == "expert" else None
+                certainty = extract_certainty(llm_response) if is_expert_prompt(prompt_type) else None
 
                 # Check correctness
                 is_correct = predicted == ground_truth
@@ -185,6 +185,13 @@ def analyze_results(results_file):
         print(f"  Incorrect: {incorrect}/{total_clear}")
         if unclear > 0:
             print(f"  Unclear: {unclear}")
+        if local:
+            print(f"  Decided locally by the cascade (no LLM call): {local}")
+        if inferred:
+            print(f"  Implied by earlier answers (no LLM call): {inferred}")
+        if blocked:
+            reasons = ", ".join(f"{reason}: {count}" for reason, count in sorted(blocked.items()))
+            print(f"  Blocked: {sum(blocked.values())} ({reasons})")
         if error > 0:
             print(f"  Errors: {error}")
 
@@ -206,7 +213,7 @@ def analyze_results(results_file):
             print(f"  Opposite orientation: {opposite_orientation_stats['correct']}/{opposite_orientation_stats['total']} correct ({acc:.0f}%)")
 
         # By certainty (if expert prompt)
-        if prompt_type == "expert" and by_certainty:
+        if is_expert_prompt(prompt_type) and by_certainty:
             print(f"\nResults by Certainty Level:")
             for cert in ["high", "medium", "low"]:
                 if cert in by_certainty:
@@ -235,9 +242,134 @@ def analyze_results(results_file):
             print(f"  Average per query: {avg_tokens:.0f}")
         print()
 
+    with span("statistics"):
+        print_statistics(results, pairs_metadata)
+
+
+def format_ci(row):
+    """Format accuracy with its bootstrap confidence interval."""
+    return (f"{row['accuracy'] * 100:.0f}% "
+            f"[{row['ci_low'] * 100:.0f}-{row['ci_high'] * 100:.0f}%] (n={row['n']})")
+
+
+def format_mcnemar(label_a, label_b, test, diff):
+    """Format a McNemar test result with the bootstrap CI of the accuracy difference."""
+    return (f"  {label_a} vs {label_b}: {test['accuracy_a'] * 100:.0f}% vs {test['accuracy_b'] * 100:.0f}% "
+            f"(n={test['n']}, discordant {test['only_a']}/{test['only_b']}, "
+            f"p={test['p_value']:.4f} {test['method']}, "
+            f"diff 95% CI [{diff['ci_low'] * 100:+.0f}, {diff['ci_high'] * 100:+.0f}] pts)")
+
+
+def print_block_rates(table):
+    """Print the share of safety-blocked queries per model/prompt and per category."""
+    blocked = table["outcome"] == "blocked"
+    if not blocked.any():
+        return
+
+    print("\nSafety blocks (share of all queries, excluded from the accuracies above):")
+    for by in (["model", "prompt_type"], ["model", "category"]):
+        keys = sorted(set(zip(*(table[column] for column in by))))
+        for key in keys:
+            rows = np.ones(len(blocked), dtype=bool)
+            for column, value in zip(by, key):
+                rows &= table[column] == value
+            n_blocked = int(np.count_nonzero(blocked & rows))
+            if n_blocked:
+                reasons = sorted(set(table["block_reason"][blocked & rows]))
+                print(f"  {' / '.join(map(str, key))}: {n_blocked}/{int(np.count_nonzero(rows))} "
+                      f"({', '.join(reasons)})")
+
+
+def print_vote_calibration(table):
+    """Print observed accuracy per self-consistency confidence bin."""
+    voted = table["clear"] & ~np.isnan(table["vote_confidence"])
+    if not voted.any():
+        return
+
+    print("\nSelf-consistency calibration (vote confidence vs observed accuracy):")
+    for model in sorted(set(table["model"][voted])):
+        rows = voted & (table["model"] == model)
+        for row in calibration_bins(table["vote_confidence"][rows], table["correct"][rows]):
+            print(f"  {model} {row['low']:.1f}-{row['high']:.1f}: confidence {row['mean_confidence'] * 100:.0f}%, "
+                  f"accuracy {row['accuracy'] * 100:.0f}% (n={row['n']})")
+
+
+def print_statistics(results, pairs_metadata, n_resamples=10000, seed=0):
+    """Print bootstrap CIs for each breakdown and McNemar tests for paired comparisons."""
+    table = build_results_table(results, pairs_metadata)
+    clear = table["clear"]
+    if not clear.any():
+        return
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
+    print("=" * 70)
+    print("STATISTICAL TESTS")
+    print("=" * 70)
+    print(f"Accuracy with 95% bootstrap CI ({n_resamples:,} resamples, unclear answers excluded)")
+
+    breakdowns = [
+        ("Model x Prompt", ["model", "prompt_type"]),
+        ("Ground Truth", ["model", "prompt_type", "ground_truth"]),
+        ("Orientation", ["model", "prompt_type", "orientation"]),
+        ("Certainty", ["model", "prompt_type", "certainty"]),
+        ("Category", ["model", "prompt_type", "category"]),
+    ]
+    for title, by in breakdowns:
+        print(f"\n{title}:")
+        for row in bootstrap_breakdown(table, by, mask=clear, n_resamples=n_resamples, seed=seed):
+            label = " / ".join(str(row[column]) for column in by)
+            print(f"  {label}: {format_ci(row)}")
+
+    print_block_rates(table)
+    print_vote_calibration(table)
+
+    print("\nMcNemar's test (paired on pairs answered clearly by both):")
+
+    # Naive vs expert, per model
+    for model in sorted(set(table["model"][clear])):
+        naive, expert = paired_outcomes(
+            table, "prompt_type", "naive", "expert",
+            match_on=["pair_id"], mask=clear & (table["model"] == model)
+        )
+        if naive.size:
+            test = mcnemar_test(naive, expert)
+            diff = paired_bootstrap_diff(naive, expert, n_resamples=n_resamples, seed=seed)
+            print(format_mcnemar(f"{model} naive", "expert", test, diff))
+
+    # Model vs model, per prompt type
+    models = sorted(set(table["model"][clear]))
+    for i, model_a in enumerate(models):
+        for model_b in models[i + 1:]:
+            correct_a, correct_b = paired_outcomes(
+                table, "model", model_a, model_b, match_on=["pair_id", "prompt_type"], mask=clear
+            )
+            if correct_a.size:
+                test = mcnemar_test(correct_a, correct_b)
+                diff = paired_bootstrap_diff(correct_a, correct_b, n_resamples=n_resamples, seed=seed)
+                print(format_mcnemar(model_a, model_b, test, diff))
+
+    # LLM vs MegaDescriptor on the same pairs
+    for model in models:
+        for prompt_type in sorted(set(table["prompt_type"][clear])):
+            rows = clear & (table["model"] == model) & (table["prompt_type"] == prompt_type)
+            if rows.any():
+                test = mcnemar_test(table["correct"][rows], table["md_correct"][rows])
+                diff = paired_bootstrap_diff(
+                    table["correct"][rows], table["md_correct"][rows], n_resamples=n_resamples, seed=seed
+                )
+                print(format_mcnemar(f"{model} {prompt_type}", "MegaDescriptor", test, diff))
+    print()
+
+
+def main():
+    """Analyze the given results file (default: the most recent one)."""
+    parser = argparse.ArgumentParser(description="Quick analysis of experiment results")
+    parser.add_argument("results_file", type=Path, nargs="?", default=None,
+                        help="Results JSON file or archive (default: the most recent results file)")
+    add_profile_arguments(parser, Path(__file__).parent.parent / "results" / "profiles")
+    args = parser.parse_args()
+
+    results_file = args.results_file
+    if results_file is None:
         # Find most recent results file
         processed_dir = Path(__file__).parent.parent / "results" / "processed"
         raw_dir = Path(__file__).parent.parent / "results" / "raw_responses"
@@ -253,13 +385,16 @@ if __name__ == "__main__":
                     results_files.extend(subdir.glob("results_*.json"))
 
         results_files = sorted(results_files, reverse=True)
-        if results_files:
-            results_file = results_files[0]
-            print(f"No file specified, using most recent: {results_file.name}\n")
-        else:
+        if not results_files:
             print("No results files found!")
-            sys.exit(1)
-    else:
-        results_file = Path(sys.argv[1])
+            return 1
+        results_file = results_files[0]
+        print(f"No file specified, using most recent: {results_file.name}\n")
 
-    analyze_results(results_file)
+    with profiled(args.profile, args.profile_dir, "analyze_results"):
+        analyze_results(results_file)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Compare image variants of a sweep: accuracy vs tokens vs latency, and the cheapest safe setting."""
+import sys
+import argparse
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.analysis import load_pairs_metadata, load_results
+from src.analysis.sweep import cheapest_variant, sweep_curve
+from src.profiling import add_profile_arguments, profiled
+
+
+def fmt(value, spec, missing="-"):
+    return format(value, spec) if value is not None else missing
+
+
+def main():
+    """Print the sweep curve and the recommended variant."""
+    parser = argparse.ArgumentParser(description="Analyze an image resolution/quality sweep")
+    parser.add_argument("results", type=Path, nargs="+", help="Combined sweep result files (sweep_<timestamp>.json)")
+    parser.add_argument("--reference", type=str, default=None, help="Reference variant (default: largest full image)")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="Accepted accuracy loss vs the reference")
+    add_profile_arguments(parser, Path(__file__).parent.parent / "results" / "profiles")
+    args = parser.parse_args()
+
+    with profiled(args.profile, args.profile_dir, "analyze_sweep"):
+        return analyze(args)
+
+
+def analyze(args):
+    """Print the sweep curve and the recommended variant for the parsed arguments."""
+
+    results = [r for r in load_results(args.results) if "image_variant" in r]
+    if not results:
+        print("Error: no sweep results (records with image_variant) in the given files")
+        return 1
+    curve = sweep_curve(results, load_pairs_metadata(), reference=args.reference)
+
+    print(f"{'variant':<16} {'n':>4} {'accuracy':>9} {'95% CI':>15} {'Δ vs ref':>9} {'p':>6} "
+          f"{'tokens':>7} {'latency':>8} {'KB/pair':>8}")
+    for point in curve:
+        ci = f"[{point['ci_low'] * 100:.0f}, {point['ci_high'] * 100:.0f}]%"
+        if point["reference"]:
+            diff, p = "ref", ""
+        else:
+            diff, p = f"{point['difference'] * 100:+.1f}pp", f"{point['mcnemar_p']:.2f}"
+        size = fmt(point["image_bytes"] / 1024 if point["image_bytes"] else None, ".0f")
+        print(f"{point['variant']:<16} {point['n']:>4} {point['accuracy'] * 100:>8.1f}% {ci:>15} {diff:>9} {p:>6} "
+              f"{fmt(point['prompt_tokens'], '.0f'):>7} {fmt(point['latency_seconds'], '.2f'):>7}s {size:>8}")
+
+    best = cheapest_variant(curve, tolerance=args.tolerance)
+    print()
+    if best is None:
+        print(f"No variant stays within {args.tolerance * 100:.0f}pp of the reference")
+    else:
+        evidence = "demonstrated by the paired CI" if best["non_inferior"] else "point estimate only; the CI is wider"
+        print(f"Cheapest variant within {args.tolerance * 100:.0f}pp of the reference: {best['variant']} ({evidence})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
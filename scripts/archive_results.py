@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Pack result files into a compressed archive, or read records back from one."""
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.analysis import load_results
+from src.analysis.archive import ARCHIVE_SUFFIX, ResultArchive, write_archive
+
+
+def default_results_files(project_root):
+    """All result files under results/processed and results/raw_responses/<model>/."""
+    files = sorted((project_root / "results" / "processed").glob("*.json"))
+    files.extend(sorted((project_root / "results" / "raw_responses").glob("*/*.json")))
+    return files
+
+
+def pack(args, project_root):
+    """Write the archive and compare it with the JSON it replaces."""
+    files = args.results or default_results_files(project_root)
+    if not files:
+        print("Error: no result files found")
+        return 1
+    json_bytes = sum(path.stat().st_size for path in files)
+    results = load_results(files)
+    print(f"Packing {len(results)} records from {len(files)} file(s) ({json_bytes / 1e6:.1f} MB of JSON)...")
+
+    start = time.perf_counter()
+    counts = write_archive(args.output, results, level=args.level, dict_size=args.dict_size)
+    elapsed = time.perf_counter() - start
+    print(f"✓ {counts['records']} records ({counts['duplicates']} duplicates dropped), "
+          f"{counts['responses']} responses in {elapsed:.1f}s")
+    print(f"  Responses: {counts['response_bytes'] / 1e6:.1f} MB uncompressed, "
+          f"dictionary {counts['dictionary_bytes'] / 1e3:.0f} KB")
+    print(f"  Archive:   {counts['archive_bytes'] / 1e6:.2f} MB "
+          f"({json_bytes / max(1, counts['archive_bytes']):.1f}x smaller than the JSON files)")
+    print(f"  Saved to {args.output}")
+
+    start = time.perf_counter()
+    with ResultArchive(args.output) as archive:
+        unpacked = archive.records()
+    elapsed = time.perf_counter() - start
+    print(f"  Bulk read: {len(unpacked)} records in {elapsed:.2f}s")
+
+    if args.verify:
+        expected = {json.dumps(result, sort_keys=True) for result in results}
+        actual = {json.dumps(result, sort_keys=True) for result in unpacked}
+        if expected != actual:
+            print(f"Error: archive does not round-trip ({len(expected ^ actual)} records differ)")
+            return 1
+        print("  Verified: every record round-trips")
+    return 0
+
+
+def show(args):
+    """Print the records of one cell."""
+    with ResultArchive(args.archive) as archive:
+        records = archive.get(args.get)
+        if not records:
+            print(f"Error: no records for {args.get!r} in {args.archive} ({len(archive.keys())} cells)")
+            return 1
+    print(json.dumps(records, indent=2))
+    return 0
+
+
+def main():
+    """Pack results into an archive, or look up a cell in one."""
+    project_root = Path(__file__).parent.parent
+    parser = argparse.ArgumentParser(
+        description="Archive results with zstd dictionary compression, e.g.: archive_results.py --verify; "
+                    "archive_results.py --archive results/results_archive.zra --get 'pair_001|expert|gemini'"
+    )
+    parser.add_argument("results", type=Path, nargs="*",
+                        help="Result JSON files (default: results/processed/*.json, results/raw_responses/*/*.json)")
+    parser.add_argument("--output", type=Path, default=project_root / "results" / f"results_archive{ARCHIVE_SUFFIX}",
+                        help="Archive to write")
+    parser.add_argument("--level", type=int, default=19, help="zstd compression level")
+    parser.add_argument("--dict-size", type=int, default=112640, help="Maximum dictionary size in bytes")
+    parser.add_argument("--verify", action="store_true", help="Check that the archive reproduces every record")
+    parser.add_argument("--archive", type=Path, default=None, help="Read from this archive instead of packing")
+    parser.add_argument("--get", type=str, default=None, help="With --archive: print the records of this cell key")
+    args = parser.parse_args()
+
+    if args.archive:
+        if not args.get:
+            print("Error: --archive needs --get CELL_KEY")
+            return 1
+        return show(args)
+    return pack(args, project_root)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Benchmark the side-by-side composite format against sending two separate images."""
+import sys
+import json
+import argparse
+from pathlib import Path
+from datetime import datetime
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from dotenv import load_dotenv
+from src.analysis import load_pairs_metadata
+from src.analysis.sweep import sweep_curve
+from src.data.composite import CompositeBuilder
+from src.data.image_variants import ImageVariant, VariantCache, load_head_boxes
+from src.experiment import ExperimentRunner
+from src.experiment.planning import image_dimensions, image_tokens
+from src.llm_clients import GeminiClient, ClaudeClient, OpenAIClient
+from src.llm_clients.mock import MockClient
+
+
+def forecast_image_tokens(pairs, builder):
+    """Provider-rule image tokens per pair: two images vs one composite."""
+    dims = image_dimensions([p for pair in pairs for p in (pair["image1_path"], pair["image2_path"])])
+    sizes = np.array([dims[str(pair[key])] for pair in pairs for key in ("image1_path", "image2_path")])
+    rows = {}
+    for provider in ("gemini", "claude", "openai"):
+        separate = image_tokens(provider, sizes[:, 0], sizes[:, 1]).reshape(-1, 2).sum(axis=1)
+        composite = int(image_tokens(provider, [builder.size[0]], [builder.size[1]])[0])
+        rows[provider] = (float(separate.mean()), composite)
+    return rows
+
+
+def main():
+    """Run the same pairs in both formats and compare tokens, latency and accuracy."""
+    project_root = Path(__file__).parent.parent
+    parser = argparse.ArgumentParser(description="Benchmark composite vs two-image pair format")
+    parser.add_argument("--model", choices=["gemini", "claude", "openai", "mock"], default="mock")
+    parser.add_argument("--pairs", type=str, default="1-40", help="Pair range, e.g. 1-40")
+    parser.add_argument("--prompt", type=str, default="expert", help="Prompt type")
+    parser.add_argument("--edge", type=int, default=768, help="Composite panel size in pixels")
+    parser.add_argument("--crop", choices=["full", "head"], default="full", help="Composite panel content")
+    parser.add_argument("--head-boxes", type=Path, default=None, help="Head boxes for --crop head")
+    args = parser.parse_args()
+
+    load_dotenv()
+    metadata_path = project_root / "data" / "pairs_metadata.json"
+    with open(metadata_path) as f:
+        all_pairs = json.load(f)
+    start, end = map(int, args.pairs.split("-"))
+    pairs = [
+        {
+            "pair_id": pair["pair_id"],
+            "image1_path": pair["image1_path"],
+            "image2_path": pair["image2_path"],
+            "metadata": {
+                "location": pair["location"],
+                "date1": pair["date1"],
+                "date2": pair["date2"],
+                "orientation": pair["orientation_desc"]
+            },
+            "category": pair["category"],
+        }
+        for pair in all_pairs[start - 1:end]
+    ]
+
+    cache = VariantCache(project_root / "data" / "variants",
+                         head_boxes=load_head_boxes(args.head_boxes) if args.head_boxes else {})
+    builder = CompositeBuilder(cache, panel_edge=args.edge, crop=args.crop)
+
+    print(f"Composite benchmark: {len(pairs)} pairs, {args.prompt} prompt, {builder.name} "
+          f"({builder.size[0]}x{builder.size[1]})")
+    print("=" * 70)
+    print("Forecast image tokens per pair (provider rules):")
+    for provider, (separate, composite) in forecast_image_tokens(pairs, builder).items():
+        print(f"  {provider:<7} two images {separate:>7.0f}   composite {composite:>6}   "
+              f"({(composite - separate) / separate * 100:+.0f}%)")
+
+    clients = {"gemini": GeminiClient, "claude": ClaudeClient, "openai": OpenAIClient, "mock": MockClient}
+    results_dir = project_root / "results" / "benchmarks" / "composite"
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    all_results = []
+    for label, composite in [("two images", None), ("composite", builder)]:
+        print(f"\n--- {label} ---")
+        runner = ExperimentRunner(
+            llm_client=clients[args.model](),
+            pairs_metadata_path=metadata_path,
+            results_dir=results_dir,
+            request_delay=0.0 if args.model == "mock" else 0.5,
+            composite=composite
+        )
+        results = runner.run_cells([(pair, args.prompt) for pair in pairs],
+                                   results_name=f"{timestamp}_{label.replace(' ', '_')}.json")
+        for result in results:
+            result.setdefault("image_variant", dict(ImageVariant().to_dict(), name="two_images"))
+        all_results.extend(results)
+
+    curve = sweep_curve(all_results, load_pairs_metadata(metadata_path), reference="two_images")
+    print("\n" + "=" * 70)
+    print(f"{'format':<24} {'n':>4} {'accuracy':>9} {'Δ vs two images':>16} {'tokens':>7} {'latency':>8}")
+    for point in curve:
+        diff = "ref" if point["reference"] else f"{point['difference'] * 100:+.1f}pp (p={point['mcnemar_p']:.2f})"
+        tokens = f"{point['prompt_tokens']:.0f}" if point["prompt_tokens"] is not None else "-"
+        latency = f"{point['latency_seconds']:.2f}s" if point["latency_seconds"] is not None else "-"
+        print(f"{point['variant']:<24} {point['n']:>4} {point['accuracy'] * 100:>8.1f}% {diff:>16} {tokens:>7} {latency:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
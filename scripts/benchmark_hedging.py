@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Benchmark request hedging against the mock client's heavy-tailed latencies."""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from src.llm_clients.hedging import HedgingPolicy
+from src.llm_clients.mock import MockClient
+
+
+def run(client, requests):
+    """Issue sequential queries and return their latencies in seconds."""
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        client.query_with_images("Do these images show the same sea turtle?", [Path("a.jpg"), Path("b.jpg")])
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies)
+
+
+def main():
+    """Compare tail latency with and without hedging."""
+    parser = argparse.ArgumentParser(description="Benchmark request hedging with the mock client")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--median-ms", type=float, default=20.0, help="Median simulated latency")
+    parser.add_argument("--tail-probability", type=float, default=0.03)
+    parser.add_argument("--tail-multiplier", type=float, default=8.0)
+    parser.add_argument("--quantile", type=float, default=0.95, help="Hedge after this latency quantile")
+    parser.add_argument("--budget", type=float, default=0.10, help="Maximum fraction of extra requests")
+    args = parser.parse_args()
+
+    def make_client():
+        return MockClient(
+            median_latency=args.median_ms / 1000,
+            tail_probability=args.tail_probability,
+            tail_multiplier=args.tail_multiplier,
+            num_keys=2,
+            seed=0
+        )
+
+    print("Hedging benchmark (mock client)")
+    print("=" * 70)
+
+    baseline = run(make_client(), args.requests)
+
+    client = make_client()
+    policy = client.enable_hedging(HedgingPolicy(quantile=args.quantile, budget=args.budget))
+    hedged = run(client, args.requests)
+
+    for label, latencies in [("Without hedging", baseline), ("With hedging", hedged)]:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+        print(f"{label}: p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms, "
+              f"max {latencies.max() * 1000:.1f} ms, total {latencies.sum():.1f} s")
+
+    stats = policy.stats()
+    print(f"\nHedges sent: {stats['hedges_sent']} ({stats['hedge_rate'] * 100:.1f}% of requests), "
+          f"won: {stats['hedges_won']} ({stats['win_rate'] * 100:.0f}% of hedges)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
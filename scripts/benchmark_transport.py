@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Benchmark connection reuse: shared pooled transport vs a new connection per request."""
+import sys
+import time
+import argparse
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from src.llm_clients.transport import HTTPTransportConfig
+
+
+class StubServer(ThreadingHTTPServer):
+    """Local HTTP/1.1 server that counts accepted connections."""
+
+    daemon_threads = True
+
+    def __init__(self, address, handler, delay):
+        super().__init__(address, handler)
+        self.delay = delay
+        self.connections = 0
+        self._count_lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self._count_lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers every POST with a small JSON body after a fixed delay."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        time.sleep(self.server.delay)
+        body = b'{"response": "ANSWER: YES"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(url, requests, concurrency, payload, pooled, config):
+    """Send requests and return per-request latencies in seconds."""
+    shared = config.build_client() if pooled else None
+
+    def one(_):
+        start = time.perf_counter()
+        if pooled:
+            shared.post(url, content=payload).raise_for_status()
+        else:
+            with config.build_client() as client:
+                client.post(url, content=payload).raise_for_status()
+        return time.perf_counter() - start
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return np.array(list(pool.map(one, range(requests))))
+    finally:
+        if shared is not None:
+            shared.close()
+
+
+def main():
+    """Compare pooled and unpooled transports against a local stub server."""
+    parser = argparse.ArgumentParser(description="Benchmark HTTP connection pooling")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--delay-ms", type=float, default=20.0, help="Simulated server processing time")
+    parser.add_argument("--payload-kb", type=int, default=256, help="Request body size (images are large)")
+    args = parser.parse_args()
+
+    payload = b"x" * (args.payload_kb * 1024)
+    # The stub speaks HTTP/1.1 only; against the real APIs HTTP/2 is negotiated via TLS ALPN
+    config = HTTPTransportConfig(max_connections=args.concurrency, max_keepalive_connections=args.concurrency, http2=False)
+
+    print("Transport benchmark")
+    print("=" * 70)
+    print(f"Requests: {args.requests}, concurrency: {args.concurrency}, "
+          f"server delay: {args.delay_ms:.0f} ms, payload: {args.payload_kb} KB")
+    print("=" * 70)
+
+    for label, pooled in [("Without pooling (new connection per request)", False), ("With shared pooled transport", True)]:
+        server = StubServer(("127.0.0.1", 0), StubHandler, args.delay_ms / 1000)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/v1/messages"
+
+        start = time.perf_counter()
+        latencies = run(url, args.requests, args.concurrency, payload, pooled, config)
+        elapsed = time.perf_counter() - start
+
+        server.shutdown()
+        server.server_close()
+
+        print(f"\n{label}:")
+        print(f"  Connections opened (= TLS handshakes against a real API): {server.connections}")
+        print(f"  Latency p50: {np.percentile(latencies, 50) * 1000:.1f} ms, "
+              f"p95: {np.percentile(latencies, 95) * 1000:.1f} ms")
+        print(f"  Throughput: {args.requests / elapsed:.0f} req/s")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
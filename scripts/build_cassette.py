@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Build a replay cassette from results of experiments run before recording existed.
+
+Prompts are rebuilt from the current templates; results whose template has
+changed since (different prompt_version) are skipped, since their prompt can
+no longer be reproduced. Replay the cassette with:
+
+    python scripts/run_experiment.py --replay results/cassettes/<name>.jsonl --pairs ... --prompts ...
+"""
+import sys
+import json
+import argparse
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.experiment import PromptBuilder
+from src.llm_clients.cassette import CassetteStore, request_key
+from src.llm_clients.errors import SafetyBlockedError
+from src.llm_clients.image_io import shared_image_cache
+
+
+def main():
+    """Convert result files into cassette entries."""
+    parser = argparse.ArgumentParser(description="Build a replay cassette from historical results")
+    parser.add_argument("results", type=Path, nargs="+", help="Result JSON files")
+    parser.add_argument("--output", type=Path, required=True, help="Cassette file to append to")
+    parser.add_argument("--provider", type=str, default="gemini", help="Provider that produced the results")
+    parser.add_argument("--temperature", type=float, default=0.0, help="Temperature the results were run at")
+    args = parser.parse_args()
+
+    builder = PromptBuilder()
+    cache = shared_image_cache()
+    added = skipped = 0
+
+    with CassetteStore(args.output) as cassette:
+        for results_file in args.results:
+            with open(results_file) as f:
+                results = json.load(f)
+
+            for result in results:
+                if "error" in result or "llm_response" not in result:
+                    continue
+                prompt_type = result["prompt_type"]
+                recorded_version = result.get("prompt_version")
+                try:
+                    current_version = builder.prompt_version(prompt_type)
+                    prompt = builder.build_prompt(prompt_type, result.get("prompt_metadata"))
+                    image_paths = [Path(result["image1"]), Path(result["image2"])]
+                    digests = [cache.digest(path) for path in image_paths]
+                except (FileNotFoundError, ValueError) as e:
+                    print(f"  Skipping {result['pair_id']} ({prompt_type}): {e}")
+                    skipped += 1
+                    continue
+                if recorded_version is not None and recorded_version != current_version:
+                    skipped += 1
+                    continue
+
+                request = {
+                    "key": request_key(args.provider, result["model"], prompt, digests, args.temperature),
+                    "provider": args.provider,
+                    "model": result["model"],
+                    "temperature": args.temperature,
+                    "prompt": prompt,
+                    "image_digests": digests,
+                    "image_paths": [str(path) for path in image_paths],
+                }
+                if result.get("outcome") == "blocked":
+                    safety = result.get("safety") or {}
+                    cassette.record(request, error=SafetyBlockedError(
+                        safety.get("message", "Blocked"),
+                        provider=args.provider,
+                        finish_reason=safety.get("finish_reason"),
+                        block_reason=safety.get("block_reason"),
+                        safety_ratings=safety.get("safety_ratings")
+                    ))
+                else:
+                    cassette.record(request, result={
+                        "response": result["llm_response"],
+                        "model": result["model"],
+                        "timestamp": result["timestamp"],
+                        "metadata": result.get("token_usage") or {},
+                    })
+                added += 1
+
+        print(f"Added {added} entries to {args.output} ({len(cassette)} distinct requests), skipped {skipped}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Hash every dataset image and report groups of near-duplicates (burst shots, re-exports)."""
+import sys
+import argparse
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.data import ImageHashIndex
+
+
+def main():
+    """Build (or update) the perceptual-hash index."""
+    project_root = Path(__file__).parent.parent
+    parser = argparse.ArgumentParser(description="Build the perceptual-hash index of the dataset images")
+    parser.add_argument(
+        "--images",
+        type=Path,
+        default=project_root / "data" / "raw" / "ZakynthosTurtles" / "images",
+        help="Image directory (searched recursively)"
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=project_root / "data" / "image_hashes.json",
+        help="Index file; an existing index is updated, re-hashing only new or changed files"
+    )
+    parser.add_argument("--method", choices=["phash", "dhash"], default="phash", help="Perceptual hash")
+    parser.add_argument("--radius", type=int, default=4, help="Hamming radius (bits) for near-duplicates")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    if args.output.exists():
+        index = ImageHashIndex.load(args.output)
+        if index.method != args.method:
+            print(f"Error: {args.output} uses {index.method}; delete it to rebuild with {args.method}")
+            return 1
+    else:
+        index = ImageHashIndex(method=args.method)
+
+    stats = index.build_directory(args.images, workers=args.workers)
+    print(f"Hashed {stats['hashed']} images ({stats['unchanged']} unchanged, {stats['failed']} failed)")
+    for path, error in stats["failures"].items():
+        print(f"  ✗ {path}: {error}")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    index.save(args.output)
+
+    clusters = index.clusters(args.radius)
+    collapsed = sum(len(group) - 1 for group in clusters)
+    print(f"\nNear-duplicate groups within {args.radius} bits: {len(clusters)} "
+          f"({collapsed} of {len(index)} images collapse into a representative)")
+    for group in clusters[:20]:
+        print(f"  {Path(group[0]).name}: " + ", ".join(Path(p).name for p in group[1:]))
+    if len(clusters) > 20:
+        print(f"  ... {len(clusters) - 20} more")
+
+    print(f"\n✓ Index saved to {args.output} (use with run_experiment.py --dedup-index)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Precompute the MegaDescriptor image x image similarity matrix from embeddings."""
+import sys
+import json
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.data import SimilarityMatrix, load_embeddings
+
+
+def main():
+    """Build the matrix and check it against the curated pairs."""
+    parser = argparse.ArgumentParser(description="Build the image x image similarity matrix")
+    parser.add_argument("embeddings", type=Path, help=".npz (embeddings + image_ids) or .npy embeddings")
+    parser.add_argument("--ids", type=Path, default=None, help="Image ids/paths for .npy embeddings (JSON or text)")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path(__file__).parent.parent / "data" / "similarity",
+        help="Output directory (similarity.npy + image_ids.json)"
+    )
+    parser.add_argument("--float16", action="store_true", help="Store as float16 (half the size)")
+    args = parser.parse_args()
+
+    embeddings, image_ids = load_embeddings(args.embeddings, args.ids)
+    print(f"Embeddings: {embeddings.shape[0]} images x {embeddings.shape[1]} dims")
+
+    matrix = SimilarityMatrix.from_embeddings(
+        embeddings, image_ids, dtype=np.float16 if args.float16 else np.float32, output_dir=args.output
+    )
+    size_mb = matrix.matrix.nbytes / 1e6
+    print(f"✓ Saved {len(matrix)} x {len(matrix)} {matrix.dtype} matrix ({size_mb:.1f} MB) to {args.output}")
+
+    print("\nPairs per similarity bucket:")
+    for edge, count in matrix.bucket_counts().items():
+        print(f"  {edge:.1f}-{edge + 0.1:.1f}: {count:,}")
+
+    # The curated pairs carry the similarity from the dataset CSVs; they should agree
+    metadata_path = Path(__file__).parent.parent / "data" / "pairs_metadata.json"
+    if metadata_path.exists():
+        with open(metadata_path) as f:
+            pairs = [p for p in json.load(f) if p["image1_path"] in matrix and p["image2_path"] in matrix]
+        if pairs:
+            computed = matrix.pair_similarities([p["image1_path"] for p in pairs], [p["image2_path"] for p in pairs])
+            recorded = np.array([p["md_similarity"] for p in pairs])
+            print(f"\nCurated pairs found: {len(pairs)}, max |difference| to md_similarity: "
+                  f"{np.abs(computed - recorded).max():.4f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
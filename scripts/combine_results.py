@@ -20,7 +20,8 @@ def combine_results(result_files):
             if "error" in result:
                 continue
 
-            pair_prompt_key = (result["pair_id"], result["prompt_type"])
+            # Results from different template versions are kept apart
+            pair_prompt_key = (result["pair_id"], result["prompt_type"], result.get("prompt_version"))
             if pair_prompt_key in seen_pairs:
                 continue
 
@@ -29,8 +30,8 @@ def combine_results(result_files):
 
     print(f"\nCombined {len(all_results)} results")
 
-    # Sort by pair_id and prompt_type
-    all_results.sort(key=lambda r: (r["pair_id"], r["prompt_type"]))
+    # Sort by pair_id, prompt_type and prompt_version
+    all_results.sort(key=lambda r: (r["pair_id"], r["prompt_type"], r.get("prompt_version") or ""))
 
     return all_results
 
@@ -3,12 +3,15 @@
 import sys
 import json
 import csv
+import argparse
 from pathlib import Path
 from datetime import datetime
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.data import DatasetManifest, ImageHashIndex, collapse_pairs
+
 
 def parse_date(date_str):
     """Parse date from DD_MM_YYYY format."""
@@ -19,10 +22,22 @@ def parse_date(date_str):
         return date_str
 
 
-def create_pairs_metadata():
-    """Read all category CSVs and create unified metadata."""
+def create_pairs_metadata(force=False, workers=8, dedup_index=None, dedup_radius=4):
+    """
+    Read all category CSVs and create unified metadata.
+
+    The dataset manifest (data/manifest.json) is updated first; when neither
+    the CSVs nor the referenced images changed since the last run, the
+    existing pairs_metadata.json is kept unless force is set.
+
+    With dedup_index (a perceptual-hash index from build_image_index.py),
+    pairs whose images are near-duplicates of an earlier pair's images are
+    left out; the remaining pairs keep their pair ids.
+    """
     data_dir = Path(__file__).parent.parent / "data" / "raw"
     images_dir = data_dir / "ZakynthosTurtles" / "images"
+    output_path = Path(__file__).parent.parent / "data" / "pairs_metadata.json"
+    manifest_path = Path(__file__).parent.parent / "data" / "manifest.json"
 
     categories = [
         "High_similarity_correct_match_opposite_orientiation",
@@ -35,8 +50,36 @@ def create_pairs_metadata():
         "Low_similarity_wrong_match_same_orientiation"
     ]
 
+    # Hash new or changed inputs (unchanged files cost one stat each)
+    manifest = DatasetManifest.load(manifest_path)
+    csv_paths = [data_dir / category / f"{category}.csv" for category in categories]
+    manifest.update([path for path in csv_paths if path.exists()], workers=workers)
+    if dedup_index:
+        manifest.update([dedup_index], workers=workers)
+    if images_dir.exists():
+        images = manifest.update_directory(images_dir, workers=workers)
+        print(f"Manifest: {images['hashed']} image(s) hashed, {images['unchanged']} unchanged")
+        for path, error in images["failures"].items():
+            print(f"  Warning: could not read {path}: {error}")
+    manifest.prune()
+
+    inputs = [path for path in csv_paths if path.exists()]
+    if images_dir.exists():
+        inputs.extend(path for path in manifest.files if Path(path).is_relative_to(images_dir.resolve()))
+    if dedup_index:
+        inputs.append(dedup_index)
+    fingerprint = manifest.fingerprint(inputs)
+    if dedup_index:
+        fingerprint += f"+dedup{dedup_radius}"
+    if not force and output_path.exists() and manifest.outputs.get(output_path.name) == fingerprint:
+        manifest.save(manifest_path)
+        print(f"✓ {output_path.name} is up to date (inputs unchanged); use --force to rebuild")
+        with open(output_path) as f:
+            return json.load(f)
+
     all_pairs = []
     pair_counter = 1
+    missing_images = set()
 
     for category in categories:
         csv_path = data_dir / category / f"{category}.csv"
@@ -95,6 +138,13 @@ def create_pairs_metadata():
 
             pair_id = f"pair_{pair_counter:03d}"
 
+            # Content hashes and dimensions from the manifest (reused by caches and result records)
+            image1_entry = manifest.get(image1_path)
+            image2_entry = manifest.get(image2_path)
+            for path, entry in ((image1_path, image1_entry), (image2_path, image2_entry)):
+                if entry is None:
+                    missing_images.add(str(path))
+
             pair_data = {
                 "pair_id": pair_id,
                 "category": category,
@@ -109,19 +159,33 @@ def create_pairs_metadata():
                 "orientation2": orientation2,
                 "orientation_desc": orientation_desc,
                 "md_similarity": float(row1['Similarity']),
-                "location": "Zakynthos, Greece"
+                "location": "Zakynthos, Greece",
+                "image1_sha256": image1_entry["sha256"] if image1_entry else None,
+                "image2_sha256": image2_entry["sha256"] if image2_entry else None,
+                "image1_size": [image1_entry.get("width"), image1_entry.get("height")] if image1_entry else None,
+                "image2_size": [image2_entry.get("width"), image2_entry.get("height")] if image2_entry else None
             }
 
             all_pairs.append(pair_data)
             pair_counter += 1
 
+    if dedup_index:
+        representatives = ImageHashIndex.load(dedup_index).representatives(dedup_radius)
+        all_pairs, duplicate_of = collapse_pairs(all_pairs, representatives)
+        print(f"\nLeft out {len(duplicate_of)} pair(s) of near-duplicate images (radius {dedup_radius} bits)")
+
     # Save to JSON
-    output_path = Path(__file__).parent.parent / "data" / "pairs_metadata.json"
     with open(output_path, 'w') as f:
         json.dump(all_pairs, f, indent=2)
+    manifest.outputs[output_path.name] = fingerprint
+    manifest.save(manifest_path)
 
     print(f"\n✓ Created metadata for {len(all_pairs)} pairs")
     print(f"  Saved to: {output_path}")
+    if missing_images:
+        print(f"\n⚠️  {len(missing_images)} referenced image(s) missing from {images_dir}:")
+        for path in sorted(missing_images)[:10]:
+            print(f"  {path}")
 
     # Print summary
     print("\nSummary by category:")
@@ -137,4 +201,13 @@ def create_pairs_metadata():
 
 
 if __name__ == "__main__":
-    create_pairs_metadata()
+    parser = argparse.ArgumentParser(description="Create pairs_metadata.json from the category CSVs")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the inputs are unchanged")
+    parser.add_argument("--workers", type=int, default=8, help="Threads for hashing new or changed files")
+    parser.add_argument("--dedup-index", type=Path, default=None,
+                        help="Perceptual-hash index (from build_image_index.py): leave out pairs whose images are "
+                             "near-duplicates of an earlier pair's")
+    parser.add_argument("--dedup-radius", type=int, default=4, help="Hamming radius (bits) for --dedup-index")
+    args = parser.parse_args()
+    create_pairs_metadata(force=args.force, workers=args.workers, dedup_index=args.dedup_index,
+                          dedup_radius=args.dedup_radius)
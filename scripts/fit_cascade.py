@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Fit MegaDescriptor cascade thresholds and report the cost vs accuracy curve."""
+import sys
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.analysis import build_results_table, load_pairs_metadata, load_results
+from src.analysis.cascade import cascade_curve, cascade_inputs, fit_cascade_thresholds
+from src.profiling import add_profile_arguments, profiled
+
+
+def mean_call_cost(results, model, prompt_type):
+    """Mean tokens and latency per LLM call in the results (None where not recorded)."""
+    calls = [r for r in results
+             if r.get("model") == model and r.get("prompt_type") == prompt_type and "error" not in r
+             and r.get("outcome", "answered") != "local"]
+    tokens = [r["token_usage"]["total_tokens"] for r in calls if (r.get("token_usage") or {}).get("total_tokens")]
+    seconds = [r["latency_seconds"] for r in calls if r.get("latency_seconds") is not None]
+    return (float(np.mean(tokens)) if tokens else None, float(np.mean(seconds)) if seconds else None)
+
+
+def main():
+    """Fit thresholds on existing results and save the policy."""
+    parser = argparse.ArgumentParser(description="Fit cascade thresholds to a target accuracy")
+    parser.add_argument("results", type=Path, nargs="+", help="Result JSON files with LLM answers")
+    parser.add_argument("--model", type=str, required=True, help="Model name as recorded in the results")
+    parser.add_argument("--prompt", type=str, default="expert", help="Prompt type the cascade will use")
+    parser.add_argument("--target", type=float, default=0.90, help="Target accuracy of the whole cascade")
+    parser.add_argument("--audit-rate", type=float, default=0.05, help="Share of local decisions audited by the LLM")
+    parser.add_argument("--output", type=Path, default=Path("results") / "cascade_policy.json", help="Policy file")
+    add_profile_arguments(parser, Path("results") / "profiles")
+    args = parser.parse_args()
+
+    with profiled(args.profile, args.profile_dir, "fit_cascade"):
+        return fit(args)
+
+
+def fit(args):
+    """Fit the cascade for the parsed arguments."""
+
+    results = load_results(args.results)
+    table = build_results_table(results, load_pairs_metadata())
+    similarity, ground_truth, llm_correct = cascade_inputs(table, args.model, args.prompt)
+    if not len(similarity):
+        print(f"Error: no {args.prompt} answers from {args.model} in the results")
+        return 1
+
+    tokens_per_call, seconds_per_call = mean_call_cost(results, args.model, args.prompt)
+    curve = cascade_curve(similarity, ground_truth, llm_correct, tokens_per_call, seconds_per_call)
+
+    print(f"Cost vs accuracy ({len(similarity)} pairs, {args.model} / {args.prompt}; in-sample):")
+    header = f"  {'LLM share':>9}  {'accuracy':>8}  {'low':>6}  {'high':>6}"
+    if tokens_per_call is not None:
+        header += f"  {'tokens/pair':>11}"
+    if seconds_per_call is not None:
+        header += f"  {'s/pair':>6}"
+    print(header)
+    for point in curve:
+        low = f"{point['low']:.3f}" if point["low"] is not None else "-"
+        high = f"{point['high']:.3f}" if point["high"] is not None else "-"
+        line = f"  {point['llm_fraction'] * 100:>8.0f}%  {point['accuracy'] * 100:>7.1f}%  {low:>6}  {high:>6}"
+        if tokens_per_call is not None:
+            line += f"  {point['tokens_per_pair']:>11.0f}"
+        if seconds_per_call is not None:
+            line += f"  {point['seconds_per_pair']:>6.2f}"
+        print(line)
+
+    policy = fit_cascade_thresholds(similarity, ground_truth, llm_correct, args.target, audit_rate=args.audit_rate)
+    fit = policy.fit
+    print(f"\nTarget accuracy {args.target * 100:.0f}%: "
+          f"{'met' if fit['target_met'] else 'NOT met (LLM alone: ' + format(fit['llm_only_accuracy'], '.1%') + ')'}")
+    print(f"  Thresholds: different below {policy.low}, same at or above {policy.high}")
+    print(f"  Decided locally: {fit['local_fraction'] * 100:.0f}% of pairs, cascade accuracy {fit['accuracy'] * 100:.1f}% "
+          f"(LLM alone {fit['llm_only_accuracy'] * 100:.1f}%)")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    policy.save(args.output)
+    print(f"\n✓ Policy saved to {args.output} (use with run_experiment.py --cascade)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Render report figures (confusion matrices, similarity curves, heatmaps) for experiment results."""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.analysis import build_results_table, load_pairs_metadata, load_results
+from src.analysis.report import build_figure_specs, generate_report
+from src.profiling import add_profile_arguments, profiled, span
+
+
+def main():
+    """Build figure specs for each results file and render the changed ones."""
+    parser = argparse.ArgumentParser(description="Generate report figures from experiment results")
+    parser.add_argument(
+        "results_files",
+        nargs="*",
+        type=Path,
+        help="Results JSON files (default: all results/processed/experiment_*.json)"
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path(__file__).parent.parent / "results" / "figures",
+        help="Output directory for figures"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Number of render processes")
+    parser.add_argument("--force", action="store_true", help="Re-render all figures")
+    parser.add_argument("--format", type=str, default="png", help="Figure format (png, pdf, svg)")
+    add_profile_arguments(parser, Path(__file__).parent.parent / "results" / "profiles")
+    args = parser.parse_args()
+
+    with profiled(args.profile, args.profile_dir, "generate_report"):
+        return render(args)
+
+
+def render(args):
+    """Render the report figures for the parsed arguments."""
+
+    results_files = args.results_files
+    if not results_files:
+        processed_dir = Path(__file__).parent.parent / "results" / "processed"
+        results_files = sorted(processed_dir.glob("experiment_*.json"))
+    if not results_files:
+        print("No results files found!")
+        return 1
+
+    pairs_metadata = load_pairs_metadata()
+
+    # One figure set per run, plus a combined set across all runs
+    specs = []
+    for results_file in results_files:
+        table = build_results_table(load_results([results_file]), pairs_metadata)
+        specs.extend(build_figure_specs(table, prefix=results_file.stem))
+    if len(results_files) > 1:
+        combined = build_results_table(load_results(results_files), pairs_metadata)
+        specs.extend(build_figure_specs(combined, prefix="combined"))
+
+    print(f"Generating report for {len(results_files)} run(s): {len(specs)} figures")
+    start = time.time()
+    # Figures render in worker processes, outside the profiler; the span records their wall time
+    with span("render_figures"):
+        summary = generate_report(specs, args.output, workers=args.workers, force=args.force, fmt=args.format)
+    elapsed = time.time() - start
+
+    print(f"  Rendered: {len(summary['rendered'])}")
+    print(f"  Unchanged (skipped): {len(summary['skipped'])}")
+    if summary["failed"]:
+        print(f"  Failed: {len(summary['failed'])}")
+    print(f"\n✓ Figures saved to {args.output} ({elapsed:.1f}s)")
+
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Merge shard result files and/or a work-queue database into one result set."""
+import sys
+import json
+import argparse
+from pathlib import Path
+from datetime import datetime
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.experiment.sharding import LeaseQueue, merge_results
+
+
+def main():
+    """Consolidate results from shards or queue workers."""
+    parser = argparse.ArgumentParser(description="Merge sharded or queued experiment results")
+    parser.add_argument("results_files", nargs="*", type=Path, help="Shard result JSON files")
+    parser.add_argument("--queue", type=Path, default=None, help="SQLite lease file used with run_experiment.py --queue")
+    parser.add_argument("--output", type=Path, default=None, help="Output file (default: results/processed/experiment_<timestamp>_merged.json)")
+    args = parser.parse_args()
+
+    if not args.results_files and not args.queue:
+        print("Error: give shard result files and/or --queue")
+        return 1
+
+    result_sets = []
+    for results_file in args.results_files:
+        print(f"Loading {results_file.name}...")
+        with open(results_file) as f:
+            result_sets.append(json.load(f))
+
+    if args.queue:
+        with LeaseQueue(args.queue) as queue:
+            progress = queue.progress()
+            print(f"Queue {args.queue.name}: {progress}")
+            if progress["pending"] or progress["leased"]:
+                print(f"  Warning: {progress['pending'] + progress['leased']} cells are not finished yet")
+            result_sets.append(queue.results())
+
+    merged = merge_results(result_sets)
+
+    # Add ground truth and category info to results
+    metadata_path = Path(__file__).parent.parent / "data" / "pairs_metadata.json"
+    with open(metadata_path) as f:
+        pairs = {pair["pair_id"]: pair for pair in json.load(f)}
+    for result in merged:
+        pair_data = pairs.get(result["pair_id"])
+        if "error" not in result and pair_data:
+            result["ground_truth"] = pair_data["ground_truth"]
+            result["category"] = pair_data["category"]
+            result["md_similarity"] = pair_data["md_similarity"]
+
+    output = args.output
+    if output is None:
+        processed_dir = Path(__file__).parent.parent / "results" / "processed"
+        processed_dir.mkdir(parents=True, exist_ok=True)
+        output = processed_dir / f"experiment_{datetime.now().strftime('%Y%m%d_%H%M%S')}_merged.json"
+
+    with open(output, 'w') as f:
+        json.dump(merged, f, indent=2)
+
+    successful = len([r for r in merged if "error" not in r])
+    print(f"\n✓ Merged {len(merged)} cells ({successful} successful, {len(merged) - successful} failed)")
+    print(f"  Saved to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
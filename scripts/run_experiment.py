@@ -2,6 +2,8 @@
 """Run the full experiment on multiple image pairs."""
 import sys
 import json
+import os
+import socket
 import argparse
 from pathlib import Path
 from datetime import datetime
@@ -9,9 +11,163 @@ from datetime import datetime
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import numpy as np
 from dotenv import load_dotenv
-from src.llm_clients import GeminiClient
+from src.llm_clients import GeminiClient, ClaudeClient, OpenAIClient
+from src.llm_clients.cassette import CassetteStore
+from src.llm_clients.replay import ReplayClient
+from src.llm_clients.hedging import HedgingPolicy
+from src.llm_clients.image_io import shared_image_cache
+from src.analysis.cascade import CascadePolicy
 from src.experiment import ExperimentRunner, PromptBuilder
+from src.experiment.pair_planner import PairPlanner, canonical_pair
+from src.experiment.planning import forecast, history_stats
+from src.experiment.sharding import LeaseQueue, build_work_matrix, parse_shard, shard_cells
+from src.data import DatasetManifest, ImageHashIndex, collapse_pairs
+from src.data.composite import CompositeBuilder
+from src.data.image_variants import ImageVariant, VariantCache, load_head_boxes
+from src.profiling import add_profile_arguments, profiled
+
+# Environment variables listing each provider's keys (comma-separated, see APIKeyPool.from_env)
+KEY_POOL_VARS = {"gemini": "GOOGLE_API_KEYS", "claude": "ANTHROPIC_API_KEYS", "openai": "OPENAI_API_KEYS"}
+
+
+def to_pair_info(pair):
+    """Runner pair dict from a pairs_metadata entry."""
+    return {
+        "pair_id": pair["pair_id"],
+        "image1_path": pair["image1_path"],
+        "image2_path": pair["image2_path"],
+        "metadata": {
+            "location": pair["location"],
+            "date1": pair["date1"],
+            "date2": pair["date2"],
+            "orientation": pair["orientation_desc"]
+        },
+        "ground_truth": pair["ground_truth"],
+        "category": pair["category"],
+        "md_similarity": pair["md_similarity"]
+    }
+
+
+def load_history(model_dir):
+    """Earlier result records of a model, for measured output tokens and latency."""
+    results = []
+    for path in sorted(Path(model_dir).glob("*.json")):
+        try:
+            with open(path) as f:
+                records = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if isinstance(records, list):
+            results.extend(r for r in records if isinstance(r, dict))
+    return results
+
+
+def print_plan(args, cells, pairs_by_id, prompt_types):
+    """Forecast requests, tokens, cost and wall time of the run without calling an API."""
+    builder = PromptBuilder()
+    work = [(pairs_by_id[c["pair_id"]], c["prompt_type"]) for c in cells]
+    n = len(work)
+    skipped = {}
+
+    if args.replay:
+        client = ReplayClient(CassetteStore(args.replay))
+        provider = client.recorded_provider
+        hits = np.fromiter(
+            (client.has_recording(builder.build_prompt(prompt, pair["metadata"] if prompt != "naive" else None),
+                                  [Path(pair["image1_path"]), Path(pair["image2_path"])])
+             for pair, prompt in work),
+            dtype=bool, count=n
+        )
+        skipped["replayed from cassette"] = hits
+        # Misses fail with ReplayMissError instead of being sent
+        skipped["missing from cassette (will fail)"] = ~hits
+    else:
+        provider = args.model
+
+    if args.queue and args.queue.exists():
+        with LeaseQueue(args.queue) as queue:
+            done = set(queue.done_keys())
+        skipped["already done in queue"] = np.array([c["key"] in done for c in cells], dtype=bool)
+
+    if args.cascade:
+        policy = CascadePolicy.load(args.cascade)
+        if args.audit_rate is not None:
+            policy.audit_rate = args.audit_rate
+        skipped["decided by cascade"] = np.array(
+            [policy.route(pair["pair_id"], pair.get("md_similarity")) in ("same", "different") for pair, _ in work],
+            dtype=bool
+        )
+
+    if args.dedup_index:
+        representatives = ImageHashIndex.load(args.dedup_index).representatives(args.dedup_radius)
+        duplicates = set()
+        for prompt_type in prompt_types:
+            _, duplicate_of = collapse_pairs([pair for pair, p in work if p == prompt_type], representatives)
+            duplicates.update((pair_id, prompt_type) for pair_id in duplicate_of)
+        skipped["near-duplicate images"] = np.array(
+            [(pair["pair_id"], prompt) in duplicates for pair, prompt in work], dtype=bool
+        )
+
+    if args.infer_identities:
+        seen = set()
+        repeats = np.zeros(n, dtype=bool)
+        for i, (pair, prompt) in enumerate(work):
+            key = (prompt, canonical_pair(pair["image1_path"], pair["image2_path"]))
+            repeats[i] = key in seen
+            seen.add(key)
+        skipped["swapped/repeated pair"] = repeats
+
+    composite_size = None
+    if args.composite:
+        variants_dir = Path(__file__).parent.parent / "data" / "variants"
+        composite_size = CompositeBuilder(VariantCache(variants_dir), panel_edge=args.composite_edge).size
+
+    keys = len([k for k in os.getenv(KEY_POOL_VARS.get(provider, ""), "").split(",") if k.strip()]) or 1
+    results_root = Path(__file__).parent.parent / "results" / "raw_responses"
+    plan = forecast(
+        work,
+        skipped,
+        provider=provider,
+        prompt_builder=builder,
+        history=history_stats(load_history(results_root / args.model)),
+        vote_samples=args.vote,
+        concurrency=args.workers,
+        request_delay=0.0 if args.replay else 0.5,
+        requests_per_minute=args.rpm * keys if args.rpm else None,
+        price_input=args.price_input,
+        price_output=args.price_output,
+        composite_size=composite_size
+    )
+
+    print("\nPLAN (dry run, nothing is sent)")
+    print("-" * 70)
+    print(f"Cells: {plan['cells']}")
+    for reason, count in plan["skipped"].items():
+        print(f"  - {reason}: {count}")
+    print(f"Cells to send: {plan['cells_to_send']}")
+    requests = plan["requests"]
+    if requests["min"] == requests["max"]:
+        print(f"Requests: {requests['max']}")
+    else:
+        print(f"Requests: {requests['min']}-{requests['max']} (voting stops early once a majority is certain)")
+    if args.infer_identities:
+        print("  (--infer-identities skips more as answers come in; this is an upper bound)")
+    if requests["min"] != requests["max"]:
+        print("Tokens and cost below are for the maximum request count")
+    print(f"Input tokens: {plan['input_tokens']:,} ({plan['mean_input_tokens']:.0f} per request, {provider} image rule)")
+    source = "measured" if plan["output_tokens_measured"] else "assumed, no earlier results"
+    print(f"Output tokens: {plan['output_tokens']:,} ({plan['mean_output_tokens']:.0f} per request, {source})")
+    if "cost" in plan:
+        print(f"Cost: ${plan['cost']:,.2f}")
+    source = "measured" if plan["latency_measured"] else "assumed"
+    rate = f", {args.rpm * keys} requests/min over {keys} key(s)" if args.rpm else ""
+    print(f"Wall time: {plan['wall_seconds'] / 3600:.2f} h ({plan['latency_seconds']:.1f}s latency {source}, "
+          f"{args.workers} worker(s){rate})")
+    if plan["unreadable_images"]:
+        print(f"Warning: {plan['unreadable_images']} images could not be read (counted without image tokens)")
+    return 0
 
 
 def main():
@@ -27,7 +183,7 @@ def main():
         "--prompts",
         type=str,
         default="naive,expert",
-        help="Comma-separated prompt types (naive, expert)"
+        help="Comma-separated prompt types (naive, expert, expert_v2, ...)"
     )
     parser.add_argument(
         "--model",
@@ -35,8 +191,142 @@ def main():
         default="gemini",
         help="Model to use (gemini, claude, openai)"
     )
+    parser.add_argument(
+        "--compare",
+        type=str,
+        default=None,
+        help="Sequential A/B comparison of two prompt types (e.g. 'expert,expert_v3'); "
+             "stops as soon as one is significantly better or both are equivalent"
+    )
+    parser.add_argument("--alpha", type=float, default=0.05, help="Error rate for --compare")
+    parser.add_argument("--margin", type=float, default=0.05, help="Equivalence margin for --compare")
+    parser.add_argument(
+        "--shard",
+        type=str,
+        default=None,
+        help="Run only shard i of N of the (pair x prompt x model) matrix, e.g. '0/4'"
+    )
+    parser.add_argument(
+        "--queue",
+        type=Path,
+        default=None,
+        help="Work-queue mode: pull cells from this SQLite lease file (shared by all workers)"
+    )
+    parser.add_argument("--worker-id", type=str, default=None, help="Worker name for --queue (default: host-pid)")
+    parser.add_argument("--lease-seconds", type=float, default=600.0, help="Lease duration per cell for --queue")
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Send a duplicate request when a call is slower than the p95 latency seen so far"
+    )
+    parser.add_argument("--hedge-budget", type=float, default=0.10, help="Maximum fraction of extra requests for --hedge")
+    parser.add_argument(
+        "--record",
+        type=Path,
+        default=None,
+        help="Append every request and response to this cassette (JSON Lines) for offline replay"
+    )
+    parser.add_argument(
+        "--replay",
+        type=Path,
+        default=None,
+        help="Serve responses from this cassette instead of calling the API (no keys, no delays)"
+    )
+    parser.add_argument(
+        "--cascade",
+        type=Path,
+        default=None,
+        help="Cascade policy (from fit_cascade.py): pairs with a decisive MegaDescriptor score skip the LLM"
+    )
+    parser.add_argument(
+        "--vote",
+        type=int,
+        default=1,
+        help="Self-consistency voting: sample each query up to N times in parallel (at --vote-temperature) "
+             "and keep the majority; stops as soon as the majority is certain"
+    )
+    parser.add_argument("--vote-temperature", type=float, default=0.7, help="Sampling temperature for --vote")
+    parser.add_argument("--audit-rate", type=float, default=None, help="Override the policy's audit rate for --cascade")
+    parser.add_argument(
+        "--dedup-index",
+        type=Path,
+        default=None,
+        help="Perceptual-hash index (from build_image_index.py): pairs of near-duplicate images are queried once"
+    )
+    parser.add_argument("--dedup-radius", type=int, default=4, help="Hamming radius (bits) for --dedup-index")
+    parser.add_argument(
+        "--infer-identities",
+        action="store_true",
+        help="Query each unordered pair once and skip pairs whose answer follows from earlier confident "
+             "answers (A=B and B=C imply A=C); contradictions are re-queried"
+    )
+    parser.add_argument(
+        "--min-certainty",
+        choices=["high", "medium", "low", "any"],
+        default="high",
+        help="Lowest stated certainty of answers used by --infer-identities ('any' also uses naive answers)"
+    )
+    parser.add_argument(
+        "--verify-rate",
+        type=float,
+        default=0.1,
+        help="Fraction of implied pairs still queried by --infer-identities, to catch contradictions"
+    )
+    parser.add_argument(
+        "--sweep",
+        type=str,
+        default=None,
+        help="Image sweep: comma-separated variants [crop:]edge[qQUALITY], e.g. orig,1024q85,768q85,512q70,head:512q85"
+    )
+    parser.add_argument("--sweep-pairs", type=int, default=None, help="Stratified subset size for --sweep")
+    parser.add_argument(
+        "--head-boxes",
+        type=Path,
+        default=None,
+        help="Head bounding boxes (CSV with path,bbox or JSON) for head: variants in --sweep"
+    )
+    parser.add_argument(
+        "--composite",
+        action="store_true",
+        help="Send each pair as one labeled side-by-side image (Image 1 left, Image 2 right) instead of two"
+    )
+    parser.add_argument("--composite-edge", type=int, default=768, help="Panel size in pixels for --composite")
+    parser.add_argument("--composite-crop", choices=["full", "head"], default="full",
+                        help="Panel content for --composite (head needs --head-boxes)")
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Dry run: forecast requests, tokens, cost and wall time after skips, without calling the API"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Parallel workers (shards/queue) assumed by --plan")
+    parser.add_argument("--rpm", type=float, default=None, help="Per-key requests/minute quota assumed by --plan")
+    parser.add_argument("--price-input", type=float, default=None, help="Price per 1M input tokens, for --plan")
+    parser.add_argument("--price-output", type=float, default=None, help="Price per 1M output tokens, for --plan")
+    add_profile_arguments(parser, Path(__file__).parent.parent / "results" / "profiles")
     args = parser.parse_args()
 
+    with profiled(args.profile, args.profile_dir, "run_experiment"):
+        return run(args)
+
+
+def run(args):
+    """Run the experiment described by the parsed arguments."""
+
+    if args.record and args.replay:
+        print("Error: --record and --replay are mutually exclusive")
+        return 1
+
+    if args.shard and args.queue:
+        print("Error: --shard and --queue are mutually exclusive")
+        return 1
+
+    if args.composite and args.sweep:
+        print("Error: --composite and --sweep are mutually exclusive (use benchmark_composite.py to compare formats)")
+        return 1
+    if args.composite_crop == "head" and not args.head_boxes:
+        print("Error: --composite-crop head needs --head-boxes")
+        return 1
+
     # Load environment
     load_dotenv()
 
@@ -61,66 +351,193 @@ def main():
 
     # Parse prompt types
     prompt_types = [p.strip() for p in args.prompts.split(",")]
+    if args.compare:
+        prompt_types = [p.strip() for p in args.compare.split(",")]
+        if len(prompt_types) != 2:
+            print("Error: --compare needs exactly two prompt types")
+            return 1
+
+    # Select the cells of the work matrix this process runs
+    cells = build_work_matrix([p["pair_id"] for p in selected_pairs], prompt_types, [args.model])
+    shard_suffix = ""
+    if args.shard:
+        try:
+            shard_index, shard_count = parse_shard(args.shard)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+        cells = shard_cells(cells, shard_index, shard_count)
+        shard_suffix = f"_shard{shard_index}of{shard_count}"
 
     print(f"Sea Turtle Re-ID Experiment")
     print("=" * 70)
     print(f"Model: {args.model}")
     print(f"Pairs: {len(selected_pairs)}")
     print(f"Prompts: {', '.join(prompt_types)}")
-    print(f"Total queries: {len(selected_pairs) * len(prompt_types)}")
+    if args.vote > 1:
+        print(f"Voting: up to {args.vote} samples per query at temperature {args.vote_temperature}")
+    if args.sweep:
+        print(f"Mode: image sweep ({args.sweep}, prompt {prompt_types[0]})")
+    elif args.cascade:
+        print(f"Mode: cascade ({args.cascade}, prompt {prompt_types[0]})")
+    elif args.compare:
+        print(f"Mode: sequential comparison (alpha={args.alpha}, margin={args.margin})")
+        print(f"Max queries: {len(selected_pairs) * len(prompt_types)}")
+    elif args.queue:
+        print(f"Mode: work queue ({args.queue})")
+        print(f"Matrix cells: {len(cells)}")
+    elif args.shard:
+        print(f"Mode: shard {args.shard}")
+        print(f"Total queries: {len(cells)}")
+    else:
+        print(f"Total queries: {len(selected_pairs) * len(prompt_types)}")
     print("=" * 70)
 
-    # Initialize client
-    if args.model == "gemini":
-        client = GeminiClient()
+    if args.plan:
+        return print_plan(args, cells, {p["pair_id"]: to_pair_info(p) for p in selected_pairs}, prompt_types)
+
+    # Initialize client (voting needs non-zero temperature to get distinct samples)
+    temperature = args.vote_temperature if args.vote > 1 else 0.0
+    if args.replay:
+        client = ReplayClient(CassetteStore(args.replay))
+        print(f"Replaying {len(client.replay_cassette)} recorded responses of {client.model_name}")
+    elif args.model == "gemini":
+        client = GeminiClient(temperature=temperature)
+    elif args.model == "claude":
+        client = ClaudeClient(temperature=temperature)
+    elif args.model == "openai":
+        client = OpenAIClient(temperature=temperature)
     else:
         print(f"Error: Model '{args.model}' not yet implemented")
         return 1
+    if args.hedge and not args.replay:
+        client.enable_hedging(HedgingPolicy(budget=args.hedge_budget))
+    if args.record:
+        client.enable_recording(CassetteStore(args.record))
 
     # Create results directory
-    results_dir = Path(__file__).parent.parent / "results" / "raw_responses" / args.model
+    model_dir = "replay" if args.replay else args.model
+    results_dir = Path(__file__).parent.parent / "results" / "raw_responses" / model_dir
     results_dir.mkdir(parents=True, exist_ok=True)
 
+    # Resized / cropped images and composites are cached here
+    variants_dir = Path(__file__).parent.parent / "data" / "variants"
+    head_boxes = load_head_boxes(args.head_boxes) if args.head_boxes else {}
+    # Image hashes from the dataset manifest spare re-hashing for cassette keys and variant caching
+    manifest = DatasetManifest.load(Path(__file__).parent.parent / "data" / "manifest.json")
+    shared_image_cache().prime_digests(manifest.signatures())
+
+    pair_planner = None
+    if args.infer_identities:
+        pair_planner = PairPlanner(min_certainty=args.min_certainty, verify_rate=args.verify_rate)
+    composite = None
+    if args.composite:
+        composite = CompositeBuilder(
+            VariantCache(variants_dir, head_boxes=head_boxes, manifest=manifest),
+            panel_edge=args.composite_edge,
+            crop=args.composite_crop
+        )
+
     # Initialize experiment runner
     runner = ExperimentRunner(
         llm_client=client,
         pairs_metadata_path=pairs_metadata_path,
-        results_dir=results_dir
+        results_dir=results_dir,
+        request_delay=0.0 if args.replay else 0.5,
+        vote_samples=args.vote,
+        image_index=ImageHashIndex.load(args.dedup_index) if args.dedup_index else None,
+        dedup_radius=args.dedup_radius,
+        pair_planner=pair_planner,
+        composite=composite,
+        model_key=args.model
     )
 
     # Prepare pairs for runner
-    pairs_to_run = []
-    for pair in selected_pairs:
-        pairs_to_run.append({
-            "pair_id": pair["pair_id"],
-            "image1_path": pair["image1_path"],
-            "image2_path": pair["image2_path"],
-            "metadata": {
-                "location": pair["location"],
-                "date1": pair["date1"],
-                "date2": pair["date2"],
-                "orientation": pair["orientation_desc"]
-            },
-            "ground_truth": pair["ground_truth"],
-            "category": pair["category"],
-            "md_similarity": pair["md_similarity"]
-        })
+    pairs_to_run = [to_pair_info(pair) for pair in selected_pairs]
+
+    if args.compare:
+        outcome = runner.run_sequential_comparison(
+            pairs_to_run=pairs_to_run,
+            prompt_a=prompt_types[0],
+            prompt_b=prompt_types[1],
+            alpha=args.alpha,
+            margin=args.margin
+        )
+        comparison = outcome["comparison"]
+        print("\n" + "=" * 70)
+        print("COMPARISON COMPLETE")
+        print("=" * 70)
+        print(f"Decision: {comparison['decision']}")
+        print(f"Pairs used: {comparison['n_pairs']}/{comparison['pairs_available']}")
+        print(f"{comparison['prompt_a']} wins: {comparison['a_wins']}, {comparison['prompt_b']} wins: {comparison['b_wins']}")
+        print(f"Accuracy difference: {comparison['difference']:+.3f} "
+              f"(CI [{comparison['ci_low']:+.3f}, {comparison['ci_high']:+.3f}])")
+        return 0
+
+    if args.sweep:
+        try:
+            variants = [ImageVariant.parse(spec) for spec in args.sweep.split(",")]
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+        if any(v.crop == "head" for v in variants) and not head_boxes:
+            print("Error: head: variants need --head-boxes")
+            return 1
+        cache = VariantCache(variants_dir, head_boxes=head_boxes, manifest=manifest)
+        outcome = runner.run_sweep(
+            pairs_to_run=pairs_to_run,
+            prompt_type=prompt_types[0],
+            variants=variants,
+            variant_cache=cache,
+            max_pairs=args.sweep_pairs
+        )
+        print(f"\nSweep of {len(outcome['pairs'])} pairs done; compare variants with scripts/analyze_sweep.py")
+        return 0
+
+    if args.cascade:
+        policy = CascadePolicy.load(args.cascade)
+        if args.audit_rate is not None:
+            policy.audit_rate = args.audit_rate
+        outcome = runner.run_cascade(pairs_to_run=pairs_to_run, prompt_type=prompt_types[0], policy=policy)
+        summary = outcome["summary"]
+        print("\n" + "=" * 70)
+        print("CASCADE COMPLETE")
+        print("=" * 70)
+        print(f"Decided locally: {summary['decided_locally']}/{summary['pairs']}")
+        print(f"LLM calls: {summary['llm_calls']} (of which audits: {summary['audits']})")
+        return 0
+
+    if args.queue:
+        worker_id = args.worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        with LeaseQueue(args.queue) as queue:
+            added = queue.populate(cells)
+            print(f"\nWorker {worker_id}: {added} new cells queued, progress {queue.progress()}")
+            runner.run_queue_worker(
+                queue=queue,
+                pairs_by_id={p["pair_id"]: p for p in pairs_to_run},
+                model=args.model,
+                worker_id=worker_id,
+                lease_seconds=args.lease_seconds
+            )
+        print("Run scripts/merge_results.py --queue to consolidate results once all workers are done.")
+        return 0
 
     # Run experiment
     print(f"\nStarting experiment at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("-" * 70)
 
-    results = runner.run_experiment(
-        pairs_to_run=pairs_to_run,
-        prompt_types=prompt_types,
-        save_interval=5
+    pairs_by_id = {p["pair_id"]: p for p in pairs_to_run}
+    results = runner.run_cells(
+        cells=[(pairs_by_id[c["pair_id"]], c["prompt_type"]) for c in cells],
+        save_interval=5,
+        results_name=f"results_{datetime.now().strftime('%Y%m%d_%H%M%S')}{shard_suffix}.json"
     )
 
     # Save final results with ground truth
     processed_dir = Path(__file__).parent.parent / "results" / "processed"
     processed_dir.mkdir(parents=True, exist_ok=True)
 
-    processed_file = processed_dir / f"experiment_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    processed_file = processed_dir / f"experiment_{datetime.now().strftime('%Y%m%d_%H%M%S')}{shard_suffix}.json"
 
     # Add ground truth and category info to results
     for result in results:
@@ -153,6 +570,32 @@ def main():
         for r in results if "error" not in r
     )
     print(f"Total tokens used: {total_tokens:,}")
+    voted = [r["vote"] for r in results if "vote" in r]
+    if voted:
+        samples = sum(v["samples"] for v in voted)
+        print(f"Voting: {samples} samples for {len(voted)} queries "
+              f"({samples / len(voted):.2f} per query, max {args.vote}), "
+              f"{sum(v['early_stopped'] for v in voted)} stopped early")
+
+    if args.replay:
+        print(f"Replay: {client.hits} hits, {client.misses} misses")
+    if args.record:
+        print(f"Recorded to {args.record} ({len(client.cassette)} distinct requests)")
+
+    if client.hedging is not None:
+        hedge_stats = client.hedging.stats()
+        print(f"Hedged requests: {hedge_stats['hedges_sent']} ({hedge_stats['hedge_rate'] * 100:.1f}%), "
+              f"hedge won: {hedge_stats['hedges_won']}")
+
+    # Per-key accounting when several API keys are pooled
+    key_pool = getattr(client, "key_pool", None)
+    if key_pool is not None and len(key_pool) > 1:
+        print("\nAPI key usage:")
+        for key_stats in key_pool.stats():
+            status = f" (parked: {key_stats['park_reason']})" if key_stats["parked"] else ""
+            print(f"  {key_stats['key_id']}: {key_stats['requests']} requests, "
+                  f"{key_stats['prompt_tokens'] + key_stats['completion_tokens']:,} tokens, "
+                  f"{key_stats['rate_limited']} rate-limited{status}")
 
     return 0
 
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Full-text search over LLM responses, filtered by pair metadata and outcome."""
+import sys
+import argparse
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.analysis import load_pairs_metadata
+from src.analysis.search import ResponseIndex, phrase_query
+
+
+def default_results_files(project_root):
+    """All result files under results/processed and results/raw_responses/<model>/."""
+    files = sorted((project_root / "results" / "processed").glob("*.json"))
+    files.extend(sorted((project_root / "results" / "raw_responses").glob("*/*.json")))
+    return files
+
+
+def main():
+    """Update the index from result files, then run one search."""
+    project_root = Path(__file__).parent.parent
+    parser = argparse.ArgumentParser(
+        description="Search LLM reasoning, e.g.: search_responses.py 'post-ocular scute' --wrong --orientation opposite"
+    )
+    parser.add_argument("query", nargs="?", default=None,
+                        help="Phrase to find (stemmed, case-insensitive); omit to list all matching the filters")
+    parser.add_argument("--fts", action="store_true",
+                        help="Treat the query as an FTS5 expression (AND/OR/NOT, NEAR(), prefix*, \"phrases\")")
+    parser.add_argument("--results", type=Path, nargs="+", default=None,
+                        help="Result files to index (default: results/processed/*.json, results/raw_responses/*/*.json)")
+    parser.add_argument("--db", type=Path, default=project_root / "results" / "response_index.sqlite",
+                        help="Index file (updated incrementally)")
+    parser.add_argument("--reindex", action="store_true", help="Re-index all files even if unchanged")
+    parser.add_argument("--model", type=str, default=None, help="Only this model")
+    parser.add_argument("--prompt", type=str, default=None, help="Only this prompt type")
+    parser.add_argument("--category", type=str, default=None, help="Only this MegaDescriptor category")
+    parser.add_argument("--orientation", choices=["same", "opposite"], default=None, help="Only this orientation")
+    parser.add_argument("--ground-truth", choices=["same", "different"], default=None, help="Only this ground truth")
+    parser.add_argument("--certainty", choices=["high", "medium", "low", "unknown"], default=None)
+    outcome = parser.add_mutually_exclusive_group()
+    outcome.add_argument("--wrong", action="store_true", help="Only clear answers that were wrong")
+    outcome.add_argument("--correct", action="store_true", help="Only correct answers")
+    parser.add_argument("--page", type=int, default=1, help="Result page (1-based)")
+    parser.add_argument("--page-size", type=int, default=10, help="Hits per page")
+    parser.add_argument("--full", action="store_true", help="Print full responses instead of snippets")
+    args = parser.parse_args()
+
+    files = args.results or default_results_files(project_root)
+    with ResponseIndex(args.db) as index:
+        counts = index.update(files, load_pairs_metadata(), force=args.reindex)
+        if counts["indexed"]:
+            print(f"Indexed {counts['responses']} responses from {counts['indexed']} file(s) "
+                  f"({counts['unchanged']} unchanged); {len(index)} in the index\n")
+
+        filters = {}
+        for column, value in [("model", args.model), ("prompt_type", args.prompt), ("category", args.category),
+                              ("orientation", args.orientation), ("ground_truth", args.ground_truth),
+                              ("certainty", args.certainty)]:
+            if value is not None:
+                filters[column] = value
+        if args.wrong:
+            filters.update({"correct": 0, "predicted": ["same", "different"]})
+        elif args.correct:
+            filters["correct"] = 1
+
+        match = None
+        if args.query:
+            match = args.query if args.fts else phrase_query(args.query)
+        highlight = ("\033[1;33m", "\033[0m") if sys.stdout.isatty() else ("**", "**")
+        try:
+            found = index.search(match, filters, page=args.page, page_size=args.page_size, highlight=highlight)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+
+        more = "+" if found["total_capped"] else ""
+        print(f"{found['total']}{more} response(s) — page {found['page']}/{max(1, found['pages'])}{more}")
+        print("=" * 70)
+        for hit in found["hits"]:
+            verdict = "✓" if hit["correct"] else ("?" if hit["predicted"] not in ("same", "different") else "✗")
+            print(f"{verdict} {hit['pair_id']}  {hit['model']} / {hit['prompt_type']}  "
+                  f"truth={hit['ground_truth']} predicted={hit['predicted']} certainty={hit['certainty']}")
+            print(f"  {hit['category']}")
+            text = index.response(hit["id"]) if args.full else hit["snippet"]
+            print("  " + text.replace("\n", "\n  ").strip())
+            print("-" * 70)
+        if found["page"] < found["pages"] or found["total_capped"]:
+            print(f"Next page: --page {found['page'] + 1}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
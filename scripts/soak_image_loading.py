@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Soak test for the client image path: RSS and open file descriptors must stay flat.
+
+Queries go through MockClient.query_with_images with an image cache smaller
+than the working set, so files keep being re-read and entries evicted, as
+in a long run over the full dataset.
+"""
+import os
+import sys
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from PIL import Image, ImageFilter
+from src.llm_clients.image_io import ImageByteCache
+from src.llm_clients.mock import MockClient
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB (Linux /proc)."""
+    with open("/proc/self/statm") as f:
+        resident_pages = int(f.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def open_fd_count():
+    """Number of open file descriptors of this process (Linux /proc)."""
+    return len(os.listdir("/proc/self/fd"))
+
+
+def make_images(directory, count, size, seed=0):
+    """
+    Write synthetic JPEGs so the soak test runs without the dataset.
+
+    Smooth random structure plus fine grain, so the files are photo-sized
+    (a few hundred KB at 1600x1200) rather than the few KB of a solid colour.
+    """
+    rng = np.random.default_rng(seed)
+    width, height = size
+    paths = []
+    for i in range(count):
+        coarse = rng.integers(0, 256, (height // 32, width // 32, 3), dtype=np.uint8)
+        image = Image.fromarray(coarse).resize(size, Image.BICUBIC).filter(ImageFilter.GaussianBlur(4))
+        grain = rng.normal(0, 12, (height, width, 3))
+        pixels = np.clip(np.asarray(image, dtype=np.float32) + grain, 0, 255).astype(np.uint8)
+        path = Path(directory) / f"soak_{i:03d}.jpg"
+        Image.fromarray(pixels).save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def main():
+    """Issue many image loads through the client path and report RSS/FD drift."""
+    parser = argparse.ArgumentParser(description="Soak test for encoded-bytes image loading")
+    parser.add_argument("--queries", type=int, default=50000, help="Number of simulated queries (2 images each)")
+    parser.add_argument("--images", type=int, default=160, help="Number of distinct images")
+    parser.add_argument("--cache-mb", type=int, default=8,
+                        help="Byte budget of the image cache; keep it below the working set (0 disables caching)")
+    parser.add_argument("--image-dir", type=Path, default=None, help="Use real images instead of synthetic ones")
+    args = parser.parse_args()
+
+    if not Path("/proc/self/fd").exists():
+        print("This soak test reads /proc and only runs on Linux")
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.image_dir:
+            paths = sorted(p for p in args.image_dir.iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+        else:
+            paths = make_images(tmp, args.images, (1600, 1200))
+        if len(paths) < 2:
+            print("Need at least two images")
+            return 1
+
+        working_set = sum(path.stat().st_size for path in paths) / 1024 / 1024
+        print(f"{len(paths)} images, working set {working_set:.1f} MB, cache budget {args.cache_mb} MB")
+        if args.cache_mb >= working_set:
+            print("  Warning: the cache holds the whole working set, so files are only read during warm-up")
+
+        cache = ImageByteCache(max_bytes=args.cache_mb * 1024 * 1024)
+        client = MockClient(median_latency=0.0, latency_sigma=0.0, image_cache=cache, seed=0)
+        rng = random.Random(0)
+        checkpoints = max(1, args.queries // 10)
+
+        def query():
+            # Random pairs: a mix of cache hits and re-reads of evicted images
+            client.query_with_images("Soak test", rng.sample(paths, 2), retry_delay=0.0)
+
+        # Warm up allocator and cache before taking the baseline
+        for _ in range(min(len(paths), args.queries)):
+            query()
+        baseline_rss, baseline_fds = current_rss_mb(), open_fd_count()
+        print(f"Baseline: RSS {baseline_rss:.1f} MB, FDs {baseline_fds}")
+
+        max_rss, max_fds = baseline_rss, baseline_fds
+        for i in range(args.queries):
+            query()
+            if (i + 1) % checkpoints == 0:
+                rss, fds = current_rss_mb(), open_fd_count()
+                max_rss, max_fds = max(max_rss, rss), max(max_fds, fds)
+                print(f"  {i + 1:>7,} queries: RSS {rss:.1f} MB, FDs {fds}, "
+                      f"cache {cache.size / 1024 / 1024:.1f} MB ({cache.hits:,} hits / {cache.misses:,} misses)")
+
+    rss_growth = max_rss - baseline_rss
+    fd_growth = max_fds - baseline_fds
+    print(f"\nRSS growth: {rss_growth:+.1f} MB, FD growth: {fd_growth:+d}")
+
+    # Allow for allocator noise, but not for per-query leaks
+    if fd_growth > 0 or rss_growth > args.cache_mb + 16:
+        print("✗ Resource usage is not flat")
+        return 1
+    print("✓ Resource usage is flat")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
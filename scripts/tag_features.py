@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Tag the biometric features each response mentions and break accuracy down by feature."""
+import sys
+import csv
+import time
+import argparse
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.analysis import build_results_table, load_pairs_metadata, load_results
+from src.analysis.features import TRANSIENT_FEATURES, FeatureTagger, feature_accuracy, load_lexicon
+
+
+def write_vectors(path, table, features):
+    """Write one row per response: identifiers, outcome and feature counts."""
+    columns = ["pair_id", "model", "prompt_type", "category", "ground_truth", "predicted", "correct"]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns + features)
+        for row in range(len(table["pair_id"])):
+            writer.writerow([table[column][row] for column in columns]
+                            + [int(table[f"feature_{feature}"][row]) for feature in features])
+
+
+def main():
+    """Tag result files and print accuracy with vs without each feature."""
+    parser = argparse.ArgumentParser(description="Tag biometric features in LLM responses")
+    parser.add_argument("results", type=Path, nargs="+", help="Result JSON files")
+    parser.add_argument("--lexicon", type=Path, default=None, help="JSON lexicon {feature: [phrases]}, whole words with inflections listed (default: built-in)")
+    parser.add_argument("--workers", type=int, default=None, help="Tagging processes (default: CPU count)")
+    parser.add_argument("--output", type=Path, default=None, help="CSV of per-response feature vectors")
+    args = parser.parse_args()
+
+    tagger = FeatureTagger(load_lexicon(args.lexicon) if args.lexicon else None)
+    results = load_results(args.results)
+    start = time.perf_counter()
+    table = build_results_table(results, load_pairs_metadata(), feature_tagger=tagger, feature_workers=args.workers)
+    elapsed = time.perf_counter() - start
+    answered = table["outcome"] == "answered"
+    print(f"Tagged {int(answered.sum())} responses with {len(tagger.features)} features in {elapsed:.1f}s")
+
+    print("\nShare of answered responses mentioning each feature:")
+    for feature in tagger.features:
+        mentioned = table[f"feature_{feature}"][answered] > 0
+        share = mentioned.mean() * 100 if mentioned.size else 0.0
+        note = "  (transient)" if feature in TRANSIENT_FEATURES else ""
+        print(f"  {feature:<22} {share:5.1f}%{note}")
+
+    print("\nAccuracy of clear answers with vs without each feature:")
+    current = None
+    for row in feature_accuracy(table, mask=answered):
+        group = f"{row['model']} / {row['prompt_type']}"
+        if group != current:
+            print(f"  {group}")
+            current = group
+        mentioned = f"{row['accuracy_mentioned'] * 100:.0f}%" if row["n_mentioned"] else "-"
+        other = f"{row['accuracy_not_mentioned'] * 100:.0f}%" if row["n_not_mentioned"] else "-"
+        print(f"    {row['feature']:<22} mentioned {mentioned:>4} (n={row['n_mentioned']:<5}) "
+              f"not mentioned {other:>4} (n={row['n_not_mentioned']})")
+
+    if args.output:
+        write_vectors(args.output, table, tagger.features)
+        print(f"\nFeature vectors written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+from .results import (
+    block_reason,
+    build_results_table,
+    extract_certainty,
+    extract_decision,
+    is_expert_prompt,
+    load_pairs_metadata,
+    load_results,
+    result_outcome,
+)
+from .statistics import (
+    bootstrap_breakdown,
+    bootstrap_ci,
+    mcnemar_test,
+    paired_bootstrap_diff,
+    paired_outcomes,
+    permutation_test,
+)
+
+__all__ = [
+    'block_reason', 'build_results_table', 'extract_certainty', 'extract_decision', 'is_expert_prompt',
+    'load_pairs_metadata', 'load_results', 'result_outcome',
+    'bootstrap_breakdown', 'bootstrap_ci', 'mcnemar_test', 'paired_bootstrap_diff', 'paired_outcomes',
+    'permutation_test',
+]
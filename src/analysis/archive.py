@@ -0,0 +1,264 @@
+"""Compressed archive of result records.
+
+Responses are multi-KB reasoning texts that repeat the same headings,
+feature names and certainty boilerplate, so they compress far better with a
+zstd dictionary trained on the corpus than one by one. An archive stores:
+
+- one zstd frame per ``llm_response``, compressed with the shared dictionary,
+  so any response can be read alone (random access by cell key);
+- the trained dictionary;
+- an index frame: the records without their responses, plus each
+  response's (offset, length) in the file.
+
+Layout: ``MAGIC | response frames | dictionary | index | footer``, where the
+footer holds the dictionary and index offsets and sizes followed by MAGIC.
+
+Opening an archive reads only the footer, dictionary and index. ``get()``
+reads and decompresses one frame per record; ``records()`` reads the frame
+section in one pass and decompresses all frames in parallel in zstd's C code.
+Identical records (e.g. the same results under both raw_responses/ and
+processed/) are stored once.
+"""
+import hashlib
+import json
+import struct
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable
+
+import zstandard
+
+from ..profiling import span
+
+
+ARCHIVE_SUFFIX = ".zra"
+MAGIC = b"ZRARCH01"
+# dictionary offset, dictionary size, index offset, index size, MAGIC
+_FOOTER = struct.Struct("<QQQQ8s")
+# Training input per byte of dictionary: zstd gains little from more, and training
+# time grows with the input
+_TRAINING_RATIO = 100
+
+
+def record_key(result: Dict[str, Any]) -> str:
+    """
+    Cell key of a result record, as experiment.sharding.result_cell_key() builds it.
+
+    Not imported from there: importing src.experiment loads every LLM client.
+    """
+    return result.get("cell_key") or f"{result['pair_id']}|{result['prompt_type']}|{result.get('model', '')}"
+
+
+def _train_dictionary(texts: List[bytes], dict_size: int) -> Optional[zstandard.ZstdCompressionDict]:
+    """
+    Dictionary trained on an even sample of texts (None if there are too few to train on).
+
+    Training tunes its parameters at zstd's default level: the dictionary
+    serves any level, and tuning at high levels is orders of magnitude slower.
+    """
+    total = sum(len(text) for text in texts)
+    step = max(1, -(-total // (dict_size * _TRAINING_RATIO)))
+    samples = [text for text in texts[::step] if text]
+    try:
+        return zstandard.train_dictionary(dict_size, samples, threads=-1)
+    except zstandard.ZstdError:
+        return None
+
+
+def write_archive(
+    path: Path,
+    results: Iterable[Dict[str, Any]],
+    level: int = 19,
+    dict_size: int = 112640,
+    dedupe: bool = True
+) -> Dict[str, Any]:
+    """
+    Write result records to a compressed archive.
+
+    Args:
+        path: Archive file (conventionally with ARCHIVE_SUFFIX)
+        results: Result records, e.g. from load_results()
+        level: zstd compression level
+        dict_size: Maximum dictionary size in bytes
+        dedupe: Store identical records once
+
+    Returns:
+        Dict with records, duplicates (dropped), responses, response_bytes
+        (uncompressed), dictionary_bytes and archive_bytes
+    """
+    path = Path(path)
+    records, texts, seen = [], [], set()
+    duplicates = 0
+    for result in results:
+        if dedupe:
+            digest = hashlib.sha1(json.dumps(result, sort_keys=True).encode("utf-8")).digest()
+            if digest in seen:
+                duplicates += 1
+                continue
+            seen.add(digest)
+        record = dict(result)
+        if isinstance(record.get("llm_response"), str):
+            texts.append(record["llm_response"].encode("utf-8"))
+            # Placeholder keeps the key's position; the text lives in its own frame
+            record["llm_response"] = None
+        else:
+            texts.append(None)
+        records.append(record)
+
+    present = [text for text in texts if text is not None]
+    with span("archive_train"):
+        dictionary = _train_dictionary(present, dict_size) if present else None
+    cctx = zstandard.ZstdCompressor(level=level, dict_data=dictionary, write_content_size=True,
+                                    write_dict_id=False, threads=0)
+    with span("archive_compress"):
+        frames = [cctx.compress(text) for text in present]
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(".partial")
+    with open(partial, "wb") as f:
+        f.write(MAGIC)
+        offsets = []
+        compressed = iter(frames)
+        for text in texts:
+            if text is None:
+                offsets.append(None)
+                continue
+            frame = next(compressed)
+            offsets.append([f.tell(), len(frame)])
+            f.write(frame)
+
+        dictionary_bytes = dictionary.as_bytes() if dictionary is not None else b""
+        dictionary_offset = f.tell()
+        f.write(dictionary_bytes)
+
+        index = json.dumps({"records": records, "frames": offsets}, separators=(",", ":")).encode("utf-8")
+        index_frame = zstandard.ZstdCompressor(level=level).compress(index)
+        index_offset = f.tell()
+        f.write(index_frame)
+        f.write(_FOOTER.pack(dictionary_offset, len(dictionary_bytes), index_offset, len(index_frame), MAGIC))
+    partial.replace(path)
+
+    return {
+        "records": len(records),
+        "duplicates": duplicates,
+        "responses": len(present),
+        "response_bytes": sum(len(text) for text in present),
+        "dictionary_bytes": len(dictionary_bytes),
+        "archive_bytes": path.stat().st_size,
+    }
+
+
+class ResultArchive:
+    """Read-only view of an archive written by write_archive()."""
+
+    def __init__(self, path: Path):
+        """
+        Open an archive and read its index.
+
+        Args:
+            path: Archive file
+
+        Raises:
+            ValueError: If the file is not a result archive
+        """
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._file.seek(-_FOOTER.size, 2)
+            dictionary_offset, dictionary_size, index_offset, index_size, magic = _FOOTER.unpack(
+                self._file.read(_FOOTER.size)
+            )
+            self._file.seek(0)
+            header = self._file.read(len(MAGIC))
+        except (OSError, struct.error):
+            magic = header = None
+        if magic != MAGIC or header != MAGIC:
+            self._file.close()
+            raise ValueError(f"Not a result archive: {self.path}")
+
+        self._frames_end = dictionary_offset
+        self._file.seek(dictionary_offset)
+        dictionary = zstandard.ZstdCompressionDict(self._file.read(dictionary_size)) if dictionary_size else None
+        self._dctx = zstandard.ZstdDecompressor(dict_data=dictionary)
+        self._file.seek(index_offset)
+        with span("archive_index"):
+            index = json.loads(zstandard.ZstdDecompressor().decompress(self._file.read(index_size)))
+        self._records: List[Dict[str, Any]] = index["records"]
+        self._frames: List[Optional[List[int]]] = index["frames"]
+        self._positions: Dict[str, List[int]] = {}
+        for position, record in enumerate(self._records):
+            self._positions.setdefault(record_key(record), []).append(position)
+
+    def close(self):
+        """Close the archive file."""
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._positions
+
+    def keys(self) -> List[str]:
+        """Cell keys ("pair_id|prompt_type|model", see record_key()) of the archived records, sorted."""
+        return sorted(self._positions)
+
+    def response(self, position: int) -> Optional[str]:
+        """Response text of the record at a position (None if it had none)."""
+        frame = self._frames[position]
+        if frame is None:
+            return self._records[position].get("llm_response")
+        offset, length = frame
+        self._file.seek(offset)
+        return self._dctx.decompress(self._file.read(length)).decode("utf-8")
+
+    def record(self, position: int) -> Dict[str, Any]:
+        """Record at a position (in archive order), with its response."""
+        record = dict(self._records[position])
+        if self._frames[position] is not None:
+            record["llm_response"] = self.response(position)
+        return record
+
+    def get(self, key: str) -> List[Dict[str, Any]]:
+        """
+        Records of one cell, reading only their response frames.
+
+        Args:
+            key: Cell key, see record_key()
+
+        Returns:
+            Records of the cell in archive order (empty if none)
+        """
+        return [self.record(position) for position in self._positions.get(key, [])]
+
+    def records(self) -> List[Dict[str, Any]]:
+        """All records with their responses (bulk decompression across threads)."""
+        positions = [position for position, frame in enumerate(self._frames) if frame is not None]
+        texts = {}
+        if positions:
+            with span("archive_decompress"):
+                self._file.seek(len(MAGIC))
+                data = self._file.read(self._frames_end - len(MAGIC))
+                segments = struct.pack(
+                    f"<{2 * len(positions)}Q",
+                    *(value for position in positions
+                      for value in (self._frames[position][0] - len(MAGIC), self._frames[position][1]))
+                )
+                buffers = self._dctx.multi_decompress_to_buffer(
+                    zstandard.BufferWithSegments(data, segments), threads=-1
+                )
+                for i, position in enumerate(positions):
+                    texts[position] = buffers[i].tobytes().decode("utf-8")
+
+        records = []
+        for position, record in enumerate(self._records):
+            record = dict(record)
+            if position in texts:
+                record["llm_response"] = texts[position]
+            records.append(record)
+        return records
@@ -0,0 +1,284 @@
+"""Hybrid MegaDescriptor -> LLM cascade: thresholds, routing and cost curves.
+
+MegaDescriptor's similarity score is decisive at both ends: very similar
+pairs are almost always the same turtle, very dissimilar ones almost never.
+A cascade decides those locally ("same" at or above the high threshold,
+"different" below the low one) and sends only the ambiguous middle band to
+the LLM, plus a small audit sample of locally decided pairs to keep
+measuring MegaDescriptor's accuracy.
+
+Thresholds are fit on existing results: for every pair of cut points in
+the sorted similarities, the cascade's accuracy follows from prefix sums of
+MegaDescriptor-correct and LLM-correct outcomes, so all candidates are
+scored at once and the one deciding the most pairs locally while meeting
+the target accuracy is chosen.
+"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+
+ROUTE_SAME = "same"
+ROUTE_DIFFERENT = "different"
+ROUTE_LLM = "llm"
+ROUTE_AUDIT = "audit"
+
+
+class CascadePolicy:
+    """Similarity thresholds that decide which pairs skip the LLM."""
+
+    def __init__(
+        self,
+        low: Optional[float] = None,
+        high: Optional[float] = None,
+        audit_rate: float = 0.0,
+        audit_seed: int = 0,
+        fit: Dict[str, Any] = None
+    ):
+        """
+        Initialize cascade policy.
+
+        Args:
+            low: Pairs with similarity below this are decided "different" (None: never)
+            high: Pairs with similarity at or above this are decided "same" (None: never)
+            audit_rate: Fraction of locally decided pairs still sent to the LLM
+            audit_seed: Seed of the audit sample (selection is a stable hash of the pair id)
+            fit: Fit statistics recorded by fit_cascade_thresholds
+        """
+        if low is not None and high is not None and low > high:
+            raise ValueError(f"Low threshold {low} is above high threshold {high}")
+        if not 0.0 <= audit_rate <= 1.0:
+            raise ValueError(f"audit_rate must be in [0, 1], got {audit_rate}")
+        self.low = low
+        self.high = high
+        self.audit_rate = audit_rate
+        self.audit_seed = audit_seed
+        self.fit = fit or {}
+
+    def local_decision(self, similarity: float) -> Optional[str]:
+        """MegaDescriptor's decision if the similarity is decisive, else None."""
+        if similarity is None or np.isnan(similarity):
+            return None
+        if self.high is not None and similarity >= self.high:
+            return ROUTE_SAME
+        if self.low is not None and similarity < self.low:
+            return ROUTE_DIFFERENT
+        return None
+
+    def is_audited(self, pair_id: str) -> bool:
+        """Whether a locally decidable pair is sampled for an LLM audit (deterministic per pair)."""
+        if self.audit_rate <= 0:
+            return False
+        digest = hashlib.sha1(f"{self.audit_seed}:{pair_id}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") / 2 ** 64 < self.audit_rate
+
+    def route(self, pair_id: str, similarity: float) -> str:
+        """Route of a pair: "same"/"different" (decided locally), "audit" or "llm"."""
+        decision = self.local_decision(similarity)
+        if decision is None:
+            return ROUTE_LLM
+        return ROUTE_AUDIT if self.is_audited(pair_id) else decision
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "low": self.low,
+            "high": self.high,
+            "audit_rate": self.audit_rate,
+            "audit_seed": self.audit_seed,
+            "fit": self.fit,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CascadePolicy":
+        return cls(
+            low=data.get("low"),
+            high=data.get("high"),
+            audit_rate=data.get("audit_rate", 0.0),
+            audit_seed=data.get("audit_seed", 0),
+            fit=data.get("fit")
+        )
+
+    def save(self, path: Path):
+        """Write the policy as JSON."""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: Path) -> "CascadePolicy":
+        """Read a policy written by save()."""
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def _cut_grid(
+    similarity: np.ndarray,
+    ground_truth: np.ndarray,
+    llm_correct: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Score every (low cut, high cut) combination.
+
+    Pairs are sorted by similarity; cut i sends the first i pairs to
+    "different" and cut j sends pairs j.. to "same", with the LLM deciding
+    i..j. Cuts are only placed between distinct similarity values.
+    """
+    order = np.argsort(similarity, kind="stable")
+    s = np.asarray(similarity, dtype=float)[order]
+    truth = np.asarray(ground_truth)[order]
+    llm = np.asarray(llm_correct, dtype=bool)[order]
+    n = len(s)
+
+    zero = np.zeros(1, dtype=np.int64)
+    different_ok = np.concatenate([zero, np.cumsum(truth == "different")])
+    same_ok = np.concatenate([zero, np.cumsum(truth == "same")])
+    llm_ok = np.concatenate([zero, np.cumsum(llm)])
+
+    cuts = np.concatenate([[0], np.nonzero(s[1:] > s[:-1])[0] + 1, [n]]) if n else np.zeros(1, dtype=int)
+    low_cut = cuts[:, None]
+    high_cut = cuts[None, :]
+    valid = low_cut <= high_cut
+    correct = different_ok[low_cut] + (llm_ok[high_cut] - llm_ok[low_cut]) + (same_ok[n] - same_ok[high_cut])
+    local = low_cut + (n - high_cut)
+
+    # Thresholds halfway between neighbouring similarities. At the ends, a low cut at n
+    # ("different" for every pair) is +inf and a high cut at 0 ("same" for every pair)
+    # is -inf; the opposite ends are None ("never decide locally")
+    def threshold(cut: int, side: str) -> Optional[float]:
+        if 0 < cut < n:
+            return float((s[cut - 1] + s[cut]) / 2)
+        if side == "low":
+            return float("inf") if cut >= n else None
+        return float("-inf") if cut <= 0 else None
+
+    return {
+        "n": n,
+        "cuts": cuts,
+        "valid": valid,
+        "correct": np.where(valid, correct, -1),
+        "local": np.where(valid, local, -1),
+        "threshold": threshold,
+        "similarity_sorted": s,
+    }
+
+
+def fit_cascade_thresholds(
+    similarity,
+    ground_truth,
+    llm_correct,
+    target_accuracy: float,
+    audit_rate: float = 0.0
+) -> CascadePolicy:
+    """
+    Fit thresholds that decide as many pairs locally as the target accuracy allows.
+
+    Args:
+        similarity: MegaDescriptor similarity per pair
+        ground_truth: "same" / "different" per pair
+        llm_correct: Whether the LLM answered each pair correctly (unclear counts as wrong)
+        target_accuracy: Minimum accuracy of the whole cascade on these pairs
+        audit_rate: Audit rate stored in the policy
+
+    Returns:
+        CascadePolicy; its fit dict holds accuracy, local_fraction and the
+        LLM-only accuracy. If even the LLM alone misses the target, the policy
+        sends everything to the LLM and fit["target_met"] is False.
+    """
+    grid = _cut_grid(np.asarray(similarity), np.asarray(ground_truth), np.asarray(llm_correct))
+    n = grid["n"]
+    if n == 0:
+        raise ValueError("No pairs to fit on")
+
+    correct, local, cuts = grid["correct"], grid["local"], grid["cuts"]
+    llm_only_accuracy = float(correct[0, -1] / n)
+    feasible = grid["valid"] & (correct >= target_accuracy * n - 1e-9)
+    target_met = bool(feasible.any())
+    if target_met:
+        # Most local decisions first, then highest accuracy
+        score = np.where(feasible, local * (n + 1) + correct, -1)
+        i, j = np.unravel_index(np.argmax(score), score.shape)
+    else:
+        i, j = 0, len(cuts) - 1
+
+    low_cut, high_cut = int(cuts[i]), int(cuts[j])
+    fit = {
+        "pairs": n,
+        "target_accuracy": target_accuracy,
+        "target_met": target_met,
+        "accuracy": float(correct[i, j] / n),
+        "local_fraction": float(local[i, j] / n),
+        "llm_only_accuracy": llm_only_accuracy,
+    }
+    return CascadePolicy(
+        low=grid["threshold"](low_cut, "low"),
+        high=grid["threshold"](high_cut, "high"),
+        audit_rate=audit_rate,
+        fit=fit
+    )
+
+
+def cascade_curve(
+    similarity,
+    ground_truth,
+    llm_correct,
+    tokens_per_call: float = None,
+    seconds_per_call: float = None
+) -> List[Dict[str, Any]]:
+    """
+    Best achievable accuracy for each share of pairs sent to the LLM.
+
+    Args:
+        similarity, ground_truth, llm_correct: As for fit_cascade_thresholds
+        tokens_per_call: Mean tokens per LLM call, to express cost in tokens
+        seconds_per_call: Mean LLM latency, to express cost in seconds
+
+    Returns:
+        List of dicts ordered from "everything to the LLM" to "nothing to the
+        LLM", with keys llm_fraction, accuracy, low, high and, when the
+        per-call costs are given, tokens_per_pair and seconds_per_pair
+    """
+    grid = _cut_grid(np.asarray(similarity), np.asarray(ground_truth), np.asarray(llm_correct))
+    n = grid["n"]
+    correct, local, cuts = grid["correct"], grid["local"], grid["cuts"]
+
+    # Best cell per number of local decisions in one pass: sort by (local, -correct, position)
+    # and take the first cell of each local value
+    flat_local, flat_correct = local.ravel(), correct.ravel()
+    order = np.lexsort((np.arange(flat_local.size), -flat_correct, flat_local))
+    values, first = np.unique(flat_local[order], return_index=True)
+
+    points = []
+    for k, flat in zip(values, order[first]):
+        if k < 0:
+            # Invalid cells (low cut above the high cut)
+            continue
+        i, j = np.unravel_index(flat, correct.shape)
+        llm_fraction = 1.0 - k / n
+        point = {
+            "llm_fraction": llm_fraction,
+            "accuracy": float(correct[i, j] / n),
+            "low": grid["threshold"](int(cuts[i]), "low"),
+            "high": grid["threshold"](int(cuts[j]), "high"),
+        }
+        if tokens_per_call is not None:
+            point["tokens_per_pair"] = llm_fraction * tokens_per_call
+        if seconds_per_call is not None:
+            point["seconds_per_pair"] = llm_fraction * seconds_per_call
+        points.append(point)
+    return points
+
+
+def cascade_inputs(
+    table: Dict[str, np.ndarray],
+    model: str,
+    prompt_type: str
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (similarity, ground_truth, llm_correct) for one model and prompt from a results table.
+
+    Blocked and unclear answers count as wrong, since a cascade has to decide every pair.
+    """
+    rows = (table["model"] == model) & (table["prompt_type"] == prompt_type) & ~np.isnan(table["md_similarity"])
+    return table["md_similarity"][rows], table["ground_truth"][rows], table["correct"][rows]
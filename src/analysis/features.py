@@ -0,0 +1,234 @@
+"""Tag the biometric features each response relies on.
+
+A lexicon maps each feature (post-ocular scales, tympanic scales, flipper
+notches, head shape, ...) to the phrases that mention it. All phrases are
+compiled into one Aho-Corasick automaton, so a response is tagged in a
+single pass over its text however many phrases there are. Text and phrases
+are normalized the same way (lower case, runs of non-alphanumerics become
+one space, so "Post-ocular" and "post ocular" match alike); a phrase must
+start and end at word boundaries, so inflections are listed explicitly
+("notch", "notches", "notched") and "scar" does not count "scarcely".
+
+Tags count mentions, not claims: a response that says it ignored the
+barnacles still mentions barnacles. Algae and barnacles are transient
+(TRANSIENT_FEATURES) and should not carry an identification.
+
+tag_responses() runs the tagger over a process pool for large result sets;
+build_results_table(..., feature_tagger=...) adds one feature_<name> count
+column per feature, so accuracy by feature is a vectorized query (see
+feature_accuracy()).
+"""
+import json
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+
+# Generic words that name several features ("scute" alone is a carapace, head or
+# post-ocular scute; "spotted" is also the verb) are left out
+DEFAULT_LEXICON = {
+    "post_ocular_scales": ["post ocular", "postocular", "behind the eye"],
+    "tympanic_scales": ["tympanic"],
+    "head_scutes": ["prefrontal", "prefrontals", "supraocular", "supraoculars", "frontoparietal",
+                    "parietal", "parietals", "head scale", "head scales", "head scute", "head scutes",
+                    "facial scale", "facial scales"],
+    "scale_junctions": ["junction", "junctions", "orphan line", "orphan lines", "y shaped", "y split",
+                        "5 way", "five way"],
+    "flipper_notches": ["notch", "notches", "notched", "flipper damage", "flipper injury", "flipper injuries",
+                        "missing flipper", "flipper edge", "flipper edges"],
+    "scars": ["scar", "scars", "scarred", "scarring", "injury", "injuries", "injured", "wound", "wounds",
+              "healed"],
+    "head_shape": ["head shape", "shape of the head", "head profile", "head size", "snout", "beak", "jaw",
+                   "jaws", "jawline"],
+    "pigmentation": ["pigment", "pigmented", "pigmentation", "coloration", "colouration", "mottled",
+                     "mottling", "markings"],
+    "algae": ["algae", "algal"],
+    "barnacles": ["barnacle", "barnacles", "epibiont", "epibionts"],
+}
+
+# Features that change between sightings and should not identify an individual
+TRANSIENT_FEATURES = ("algae", "barnacles")
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+# Below this many texts the pool's start-up costs more than it saves
+_POOL_MIN_TEXTS = 2000
+
+
+def normalize(text: str) -> str:
+    """Lower case, with every run of non-alphanumeric characters replaced by one space."""
+    return _NON_ALNUM.sub(" ", text.lower())
+
+
+def load_lexicon(path: Path) -> Dict[str, List[str]]:
+    """Lexicon from a JSON file {feature: [phrase, ...]}."""
+    with open(path) as f:
+        lexicon = json.load(f)
+    if not isinstance(lexicon, dict) or not all(isinstance(v, list) for v in lexicon.values()):
+        raise ValueError(f"Lexicon must map feature names to phrase lists: {path}")
+    return lexicon
+
+
+class FeatureTagger:
+    """Aho-Corasick automaton over a feature lexicon."""
+
+    def __init__(self, lexicon: Dict[str, List[str]] = None):
+        """
+        Compile the automaton.
+
+        Args:
+            lexicon: Feature name -> phrases (default: DEFAULT_LEXICON)
+        """
+        self.lexicon = {feature: list(phrases) for feature, phrases in (lexicon or DEFAULT_LEXICON).items()}
+        self.features = list(self.lexicon)
+        phrases = {}
+        for index, feature in enumerate(self.features):
+            for phrase in self.lexicon[feature]:
+                key = normalize(phrase).strip()
+                if key:
+                    phrases.setdefault(key, set()).add(index)
+        self._build(phrases)
+
+    def _build(self, phrases: Dict[str, set]):
+        # Trie: goto[state][char] -> state; outputs[state] -> (phrase length, feature indices)
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[tuple]] = [[]]
+        for phrase, features in phrases.items():
+            state = 0
+            for char in phrase:
+                if char not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            outputs[state].append((len(phrase), tuple(sorted(features))))
+
+        # Failure links in breadth-first order, folded into a complete transition table
+        # (a DFA), so scanning never follows failure links
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(goto[0])]
+        delta.extend({} for _ in range(len(goto) - 1))
+        queue = list(goto[0].values())
+        for state in queue:
+            fail[state] = 0
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            delta[state] = dict(delta[fail[state]])
+            for char, child in goto[state].items():
+                delta[state][char] = child
+                if state != 0:
+                    fail[child] = delta[fail[state]].get(char, 0)
+                queue.append(child)
+        self._delta = delta
+        self._outputs = outputs
+
+    def counts(self, text: str) -> np.ndarray:
+        """Mentions of each feature (in self.features order) in one text."""
+        counts = np.zeros(len(self.features), dtype=np.int32)
+        text = normalize(text)
+        delta, outputs = self._delta, self._outputs
+        state = 0
+        size = len(text)
+        for end, char in enumerate(text, 1):
+            state = delta[state].get(char, 0)
+            if outputs[state] and (end == size or text[end] == " "):
+                for length, features in outputs[state]:
+                    start = end - length
+                    # Whole words only: the phrase also starts at a word boundary
+                    if start == 0 or text[start - 1] == " ":
+                        for feature in features:
+                            counts[feature] += 1
+        return counts
+
+    def tag(self, texts: List[str]) -> np.ndarray:
+        """Feature counts of each text, shape (len(texts), len(self.features))."""
+        matrix = np.zeros((len(texts), len(self.features)), dtype=np.int32)
+        for row, text in enumerate(texts):
+            if text:
+                matrix[row] = self.counts(text)
+        return matrix
+
+
+_worker_tagger: Optional[FeatureTagger] = None
+
+
+def _init_worker(lexicon: Dict[str, List[str]]):
+    global _worker_tagger
+    _worker_tagger = FeatureTagger(lexicon)
+
+
+def _tag_chunk(texts: List[str]) -> np.ndarray:
+    return _worker_tagger.tag(texts)
+
+
+def tag_responses(
+    texts: List[str],
+    tagger: FeatureTagger = None,
+    workers: Optional[int] = None,
+    chunk_size: int = 500
+) -> np.ndarray:
+    """
+    Feature counts of many responses, in a process pool when there are enough of them.
+
+    Args:
+        texts: Response texts ("" for rows without one)
+        tagger: Tagger whose lexicon to use (default: DEFAULT_LEXICON)
+        workers: Pool size (default: CPU count; 1 tags in this process)
+        chunk_size: Texts per pool task
+
+    Returns:
+        Int array of shape (len(texts), number of features)
+    """
+    tagger = tagger or FeatureTagger()
+    if workers == 1 or len(texts) < _POOL_MIN_TEXTS:
+        return tagger.tag(texts)
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    # Workers rebuild the automaton from the lexicon rather than unpickling it per task
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tagger.lexicon,)) as pool:
+        return np.concatenate(list(pool.map(_tag_chunk, chunks)))
+
+
+def feature_accuracy(
+    table: Dict[str, np.ndarray],
+    by: List[str] = None,
+    mask: Optional[np.ndarray] = None
+) -> List[Dict[str, Any]]:
+    """
+    Accuracy of clear answers that mention each feature vs those that do not.
+
+    Args:
+        table: Results table with feature_<name> columns
+        by: Columns to break down by (default: model, prompt_type)
+        mask: Extra row filter
+
+    Returns:
+        List of dicts with the by-columns, feature, n_mentioned, accuracy_mentioned,
+        n_not_mentioned and accuracy_not_mentioned (NaN when a side is empty)
+    """
+    by = by or ["model", "prompt_type"]
+    features = [name[len("feature_"):] for name in table if name.startswith("feature_")]
+    rows_mask = table["clear"] if mask is None else table["clear"] & mask
+    groups = sorted(set(zip(*(table[column][rows_mask] for column in by))))
+    breakdown = []
+    for key in groups:
+        group = rows_mask.copy()
+        for column, value in zip(by, key):
+            group &= table[column] == value
+        correct = table["correct"][group]
+        for feature in features:
+            mentioned = table[f"feature_{feature}"][group] > 0
+            row = dict(zip(by, key))
+            row.update({
+                "feature": feature,
+                "n_mentioned": int(mentioned.sum()),
+                "accuracy_mentioned": float(correct[mentioned].mean()) if mentioned.any() else float("nan"),
+                "n_not_mentioned": int((~mentioned).sum()),
+                "accuracy_not_mentioned": float(correct[~mentioned].mean()) if (~mentioned).any() else float("nan"),
+            })
+            breakdown.append(row)
+    return breakdown
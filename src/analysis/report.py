@@ -0,0 +1,322 @@
+"""Figure generation for experiment reports.
+
+Figures are described by small JSON-serializable specs built from the
+results table. Each spec is hashed; a figure is only re-rendered when its
+hash differs from the one recorded in the report manifest. Rendering runs in
+a process pool with the non-interactive Agg backend.
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from .results import select_rows
+
+
+# Bump when renderer output changes so cached figures are invalidated
+RENDERER_VERSION = 1
+
+MANIFEST_NAME = "report_manifest.json"
+
+SIMILARITY_BUCKETS = [0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
+
+
+def _slug(*parts: str) -> str:
+    return "_".join(str(p).replace("/", "-").replace(" ", "-") for p in parts if p)
+
+
+def _short_category(category: str) -> str:
+    """Shorten category names for axis labels (same mapping as analyze_results)."""
+    return category.replace("_similarity_", "_sim_").replace("_match_", "_").replace("_orientiation", "")
+
+
+def confusion_spec(table: Dict[str, np.ndarray], title: str, name: str) -> Dict[str, Any]:
+    """Ground truth (rows) vs prediction (columns) counts, unclear answers included (and blocked ones, if any)."""
+    truths = ["same", "different"]
+    predictions = ["same", "different", "unclear"]
+    if np.any(table["predicted"] == "blocked"):
+        predictions.append("blocked")
+    counts = [
+        [int(np.count_nonzero((table["ground_truth"] == t) & (table["predicted"] == p))) for p in predictions]
+        for t in truths
+    ]
+    return {
+        "kind": "confusion",
+        "name": name,
+        "title": title,
+        "row_labels": truths,
+        "col_labels": predictions,
+        "counts": counts,
+    }
+
+
+def similarity_curve_spec(
+    table: Dict[str, np.ndarray],
+    series_by: List[str],
+    title: str,
+    name: str,
+    buckets: List[float] = SIMILARITY_BUCKETS
+) -> Dict[str, Any]:
+    """Accuracy per MegaDescriptor similarity bucket, one line per series plus MegaDescriptor itself."""
+    edges = np.asarray(buckets)
+    bucket_ids = np.clip(np.digitize(table["md_similarity"], edges[1:-1]), 0, len(edges) - 2)
+    n_buckets = len(edges) - 1
+
+    def curve(rows, outcome):
+        totals = np.bincount(bucket_ids[rows], minlength=n_buckets)
+        hits = np.bincount(bucket_ids[rows], weights=outcome[rows], minlength=n_buckets)
+        accuracy = np.divide(hits, totals, out=np.full(n_buckets, np.nan), where=totals > 0)
+        return [None if np.isnan(a) else float(a) for a in accuracy], totals.tolist()
+
+    clear = table["clear"]
+    series = []
+    keys = sorted(set(zip(*(table[c][clear] for c in series_by)))) if clear.any() else []
+    for key in keys:
+        rows = clear.copy()
+        for column, value in zip(series_by, key):
+            rows &= table[column] == value
+        accuracy, totals = curve(rows, table["correct"].astype(float))
+        series.append({"label": " / ".join(key), "accuracy": accuracy, "n": totals})
+
+    # MegaDescriptor is judged once per pair, not once per query
+    _, first_rows = np.unique(table["pair_id"].astype(str), return_index=True)
+    pair_rows = np.zeros(len(table["pair_id"]), dtype=bool)
+    pair_rows[first_rows] = True
+    accuracy, totals = curve(pair_rows, table["md_correct"].astype(float))
+    series.append({"label": "MegaDescriptor", "accuracy": accuracy, "n": totals})
+
+    return {
+        "kind": "similarity_curve",
+        "name": name,
+        "title": title,
+        "bucket_edges": [float(e) for e in edges],
+        "series": series,
+    }
+
+
+def heatmap_spec(
+    table: Dict[str, np.ndarray],
+    rows_by: List[str],
+    cols_by: str,
+    title: str,
+    name: str
+) -> Dict[str, Any]:
+    """Accuracy heatmap with one row per rows_by combination and one column per cols_by value."""
+    clear = table["clear"]
+    row_keys = sorted(set(zip(*(table[c][clear] for c in rows_by))))
+    col_keys = sorted(set(table[cols_by][clear]))
+
+    values, counts = [], []
+    for row_key in row_keys:
+        rows = clear.copy()
+        for column, value in zip(rows_by, row_key):
+            rows &= table[column] == value
+        value_row, count_row = [], []
+        for col_key in col_keys:
+            cell = rows & (table[cols_by] == col_key)
+            n = int(np.count_nonzero(cell))
+            value_row.append(float(np.mean(table["correct"][cell])) if n else None)
+            count_row.append(n)
+        values.append(value_row)
+        counts.append(count_row)
+
+    col_labels = [_short_category(c) if cols_by == "category" else c for c in col_keys]
+    return {
+        "kind": "heatmap",
+        "name": name,
+        "title": title,
+        "row_labels": [" / ".join(k) for k in row_keys],
+        "col_labels": col_labels,
+        "values": values,
+        "counts": counts,
+    }
+
+
+def build_figure_specs(table: Dict[str, np.ndarray], prefix: str = "") -> List[Dict[str, Any]]:
+    """
+    Build all figure specs for one results table.
+
+    Args:
+        table: Results table from build_results_table
+        prefix: Prepended to figure names (e.g. the run name)
+
+    Returns:
+        List of figure specs
+    """
+    specs = []
+    if len(table["pair_id"]) == 0:
+        return specs
+
+    for model in sorted(set(table["model"])):
+        for prompt_type in sorted(set(table["prompt_type"])):
+            rows = (table["model"] == model) & (table["prompt_type"] == prompt_type)
+            if rows.any():
+                specs.append(confusion_spec(
+                    select_rows(table, rows),
+                    title=f"{model} - {prompt_type} prompt",
+                    name=_slug(prefix, "confusion", model, prompt_type),
+                ))
+
+    specs.append(similarity_curve_spec(
+        table, ["model", "prompt_type"],
+        title="Accuracy by MegaDescriptor similarity",
+        name=_slug(prefix, "accuracy_by_similarity"),
+    ))
+    specs.append(heatmap_spec(
+        table, ["model", "prompt_type"], "category",
+        title="Accuracy by model x prompt x category",
+        name=_slug(prefix, "heatmap_category"),
+    ))
+    specs.append(heatmap_spec(
+        table, ["model", "prompt_type"], "orientation",
+        title="Accuracy by model x prompt x orientation",
+        name=_slug(prefix, "heatmap_orientation"),
+    ))
+    return specs
+
+
+def spec_hash(spec: Dict[str, Any]) -> str:
+    """Content hash of a figure spec (and renderer version)."""
+    payload = json.dumps({"renderer": RENDERER_VERSION, "spec": spec}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _init_worker():
+    """Select the non-interactive backend before pyplot is imported in the worker."""
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def render_figure(spec: Dict[str, Any], output_dir: str, fmt: str = "png") -> str:
+    """
+    Render one figure spec to disk.
+
+    Args:
+        spec: Figure spec from build_figure_specs
+        output_dir: Directory to write the figure into
+        fmt: Image format passed to savefig
+
+    Returns:
+        Path of the written figure
+    """
+    _init_worker()
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    output_path = Path(output_dir) / f"{spec['name']}.{fmt}"
+
+    if spec["kind"] == "confusion":
+        fig, ax = plt.subplots(figsize=(5, 4))
+        sns.heatmap(
+            np.array(spec["counts"]), annot=True, fmt="d", cmap="Blues", cbar=False,
+            xticklabels=spec["col_labels"], yticklabels=spec["row_labels"], ax=ax
+        )
+        ax.set_xlabel("Predicted")
+        ax.set_ylabel("Ground truth")
+
+    elif spec["kind"] == "similarity_curve":
+        edges = np.array(spec["bucket_edges"])
+        centers = (edges[:-1] + edges[1:]) / 2
+        fig, ax = plt.subplots(figsize=(7, 4.5))
+        for series in spec["series"]:
+            accuracy = np.array([np.nan if a is None else a for a in series["accuracy"]])
+            style = "--" if series["label"] == "MegaDescriptor" else "-"
+            ax.plot(centers, accuracy, style, marker="o", label=series["label"])
+        ax.set_xlim(edges[0], edges[-1])
+        ax.set_ylim(-0.05, 1.05)
+        ax.set_xlabel("MegaDescriptor similarity")
+        ax.set_ylabel("Accuracy")
+        ax.legend(fontsize="small")
+
+    elif spec["kind"] == "heatmap":
+        values = np.array([[np.nan if v is None else v for v in row] for row in spec["values"]], dtype=float)
+        annotations = np.array([
+            [f"{v * 100:.0f}%\n(n={n})" if n else "" for v, n in zip(np.nan_to_num(row), count_row)]
+            for row, count_row in zip(values, spec["counts"])
+        ])
+        width = max(6, 1.3 * len(spec["col_labels"]) + 2)
+        height = max(3, 0.6 * len(spec["row_labels"]) + 2)
+        fig, ax = plt.subplots(figsize=(width, height))
+        sns.heatmap(
+            values, annot=annotations, fmt="", cmap="RdYlGn", vmin=0, vmax=1,
+            xticklabels=spec["col_labels"], yticklabels=spec["row_labels"], ax=ax
+        )
+        ax.tick_params(axis="x", labelrotation=45)
+        ax.tick_params(axis="y", labelrotation=0)
+        plt.setp(ax.get_xticklabels(), ha="right")
+
+    else:
+        raise ValueError(f"Unknown figure kind: {spec['kind']}")
+
+    ax.set_title(spec["title"])
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=150)
+    plt.close(fig)
+    return str(output_path)
+
+
+def generate_report(
+    specs: List[Dict[str, Any]],
+    output_dir: Path,
+    workers: Optional[int] = None,
+    force: bool = False,
+    fmt: str = "png"
+) -> Dict[str, List[str]]:
+    """
+    Render figure specs in a process pool, skipping unchanged figures.
+
+    Args:
+        specs: Figure specs (names must be unique)
+        output_dir: Directory for figures and the report manifest
+        workers: Number of worker processes (default: CPU count)
+        force: Re-render even if the input hash is unchanged
+        fmt: Image format
+
+    Returns:
+        Dict with "rendered", "skipped" and "failed" figure names
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+
+    names = [spec["name"] for spec in specs]
+    if len(set(names)) != len(names):
+        raise ValueError("Figure names must be unique")
+
+    pending, skipped = [], []
+    for spec in specs:
+        digest = spec_hash(spec)
+        filename = f"{spec['name']}.{fmt}"
+        if not force and manifest.get(filename) == digest and (output_dir / filename).exists():
+            skipped.append(spec["name"])
+        else:
+            pending.append((spec, filename, digest))
+
+    rendered, failed = [], []
+    if pending:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending)), initializer=_init_worker) as pool:
+            futures = {
+                pool.submit(render_figure, spec, str(output_dir), fmt): (spec, filename, digest)
+                for spec, filename, digest in pending
+            }
+            for future in as_completed(futures):
+                spec, filename, digest = futures[future]
+                try:
+                    future.result()
+                    manifest[filename] = digest
+                    rendered.append(spec["name"])
+                except Exception as e:
+                    print(f"  ✗ Failed to render {spec['name']}: {e}")
+                    manifest.pop(filename, None)
+                    failed.append(spec["name"])
+
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    return {"rendered": sorted(rendered), "skipped": sorted(skipped), "failed": sorted(failed)}
@@ -0,0 +1,246 @@
+"""Load experiment results into a flat, column-oriented table."""
+import json
+import re
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from ..profiling import span
+from .archive import ARCHIVE_SUFFIX, ResultArchive
+from .features import FeatureTagger, tag_responses
+
+
+DEFAULT_PAIRS_METADATA = Path(__file__).parent.parent.parent / "data" / "pairs_metadata.json"
+
+
+def is_expert_prompt(prompt_type: str) -> bool:
+    """True for the expert prompt and its versions ("expert", "expert_v2", ...)."""
+    return prompt_type == "expert" or prompt_type.startswith("expert_")
+
+
+def extract_decision(llm_response: str, prompt_type: str) -> str:
+    """
+    Extract the Yes/No decision from an LLM response.
+
+    Args:
+        llm_response: Raw response text
+        prompt_type: "naive", "expert" or an expert version such as "expert_v3"
+            (expert prompts use an ANSWER: line)
+
+    Returns:
+        "yes", "no" or "unclear"
+    """
+    response_lower = llm_response.lower()
+
+    if prompt_type == "naive":
+        # Look for "Answer: Yes" or "Answer: No" or **Yes** at start
+        if re.search(r'\*\*answer:\s*yes\*\*', response_lower) or response_lower.startswith("**yes**"):
+            return "yes"
+        elif re.search(r'\*\*answer:\s*no\*\*', response_lower) or response_lower.startswith("**no**"):
+            return "no"
+
+    elif is_expert_prompt(prompt_type):
+        # Look for "ANSWER: YES" or "ANSWER: NO" (expert format)
+        match = re.search(r'answer:\s*(yes|no)', response_lower)
+        if match:
+            return match.group(1)
+
+    # Fallback: check if "yes" or "no" appears early in response
+    first_100 = response_lower[:100]
+    if "yes" in first_100 and "no" not in first_100:
+        return "yes"
+    elif "no" in first_100 and "yes" not in first_100:
+        return "no"
+
+    return "unclear"
+
+
+def extract_certainty(llm_response: str) -> str:
+    """Extract certainty level (high/medium/low) from an expert response."""
+    response_lower = llm_response.lower()
+    match = re.search(r'certainty:\s*(high|medium|low)', response_lower)
+    if match:
+        return match.group(1)
+    return "unknown"
+
+
+def decision_to_prediction(decision: str) -> str:
+    """Map a yes/no decision onto the ground truth vocabulary (same/different)."""
+    if decision == "yes":
+        return "same"
+    elif decision == "no":
+        return "different"
+    return "unclear"
+
+
+def result_outcome(result: Dict[str, Any]) -> str:
+    """
+    Outcome of a result record: "answered", "blocked" (safety block / empty
+    candidate), "local" (decided by the cascade without an LLM call),
+    "inferred" (implied by earlier answers via the identity graph) or "error".
+    """
+    if "error" in result:
+        return "error"
+    return result.get("outcome", "answered")
+
+
+def block_reason(result: Dict[str, Any]) -> str:
+    """Finish or block reason of a blocked result ("" for other outcomes)."""
+    if result_outcome(result) != "blocked":
+        return ""
+    safety = result.get("safety") or {}
+    return safety.get("block_reason") or safety.get("finish_reason") or "UNKNOWN"
+
+
+def load_pairs_metadata(metadata_path: Path = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Load pairs metadata keyed by pair_id.
+
+    Args:
+        metadata_path: Path to pairs_metadata.json (default: project_root/data/pairs_metadata.json)
+
+    Returns:
+        Dict mapping pair_id to its metadata entry
+    """
+    metadata_path = Path(metadata_path or DEFAULT_PAIRS_METADATA)
+    with open(metadata_path) as f:
+        metadata = json.load(f)
+    return {pair["pair_id"]: pair for pair in metadata}
+
+
+def load_results(results_files: List[Path]) -> List[Dict[str, Any]]:
+    """Load and concatenate result records from JSON files or result archives (.zra)."""
+    all_results = []
+    for results_file in results_files:
+        if Path(results_file).suffix == ARCHIVE_SUFFIX:
+            with span("load_results"), ResultArchive(results_file) as archive:
+                all_results.extend(archive.records())
+            continue
+        with span("load_results"), open(results_file) as f:
+            all_results.extend(json.load(f))
+    return all_results
+
+
+def build_results_table(
+    results: List[Dict[str, Any]],
+    pairs_metadata: Dict[str, Dict[str, Any]],
+    include_unclear: bool = True,
+    include_inferred: bool = False,
+    feature_tagger: Optional[FeatureTagger] = None,
+    feature_workers: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Flatten result records into a column-oriented table of NumPy arrays.
+
+    Error records and results for unknown pairs are dropped. Ground truth and
+    category always come from the pairs metadata, not from the result record.
+    Inferred rows (answers implied by the identity graph, not given by the
+    model) are dropped unless include_inferred is set, so accuracy and the
+    statistics built on it only count the model's own answers.
+
+    Args:
+        results: Result records as written by ExperimentRunner
+        pairs_metadata: Pairs metadata keyed by pair_id
+        include_unclear: Keep rows whose decision could not be parsed or was blocked
+        include_inferred: Keep inferred rows; they get model "<model>+inferred"
+            so they never pool with the model's own answers
+        feature_tagger: If given, tag each response's features (see analysis.features)
+        feature_workers: Process pool size for tagging (default: CPU count)
+
+    Returns:
+        Dict of equal-length arrays with columns:
+            - pair_id, model, prompt_type, category, ground_truth: str
+            - orientation: "same" or "opposite"
+            - similarity_level: "high" or "low" (MegaDescriptor bucket)
+            - md_similarity: float
+            - certainty: str ("unknown" for naive prompts)
+            - vote_confidence: float, self-consistency vote confidence (NaN without voting)
+            - image_variant: image sweep variant name ("" for the original images)
+            - outcome: "answered", "blocked", "local" (cascade decision, model "megadescriptor")
+              or "inferred" (implied by the identity graph, see experiment.pair_planner;
+              only with include_inferred, model "<model>+inferred")
+            - block_reason: provider finish/block reason of blocked rows ("" otherwise)
+            - predicted: "same", "different", "unclear" or "blocked"
+            - clear: bool, decision was parsed
+            - correct: bool, prediction matches ground truth
+            - md_correct: bool, MegaDescriptor's implied decision matches ground truth
+            - feature_<name>: int, mentions of each lexicon feature (with feature_tagger;
+              0 for rows without a response)
+    """
+    rows = {name: [] for name in [
+        "pair_id", "model", "prompt_type", "category", "ground_truth", "orientation",
+        "similarity_level", "md_similarity", "certainty", "vote_confidence", "image_variant", "outcome", "block_reason",
+        "predicted"
+    ]}
+    texts = []
+
+    with span("parse_responses"):
+        for result in results:
+            outcome = result_outcome(result)
+            if outcome == "error" or (outcome not in ("local", "inferred") and "llm_response" not in result):
+                continue
+            if outcome == "inferred" and not include_inferred:
+                continue
+            pair_meta = pairs_metadata.get(result["pair_id"])
+            if pair_meta is None:
+                continue
+
+            prompt_type = result["prompt_type"]
+            category = pair_meta["category"]
+            if outcome == "blocked":
+                predicted = "blocked"
+            elif outcome in ("local", "inferred"):
+                # Decided without an LLM call: by the cascade from the MegaDescriptor
+                # score, or implied by the model's earlier answers
+                predicted = result["predicted"]
+            elif "vote" in result:
+                # Self-consistency voting: the majority decision, not just the kept sample's
+                predicted = decision_to_prediction(result["vote"]["decision"])
+            else:
+                predicted = decision_to_prediction(extract_decision(result["llm_response"], prompt_type))
+            if predicted in ("unclear", "blocked") and not include_unclear:
+                continue
+
+            rows["pair_id"].append(result["pair_id"])
+            model = result.get("model", "unknown")
+            rows["model"].append(f"{model}+inferred" if outcome == "inferred" else model)
+            rows["prompt_type"].append(prompt_type)
+            rows["category"].append(category)
+            rows["ground_truth"].append(pair_meta["ground_truth"])
+            rows["orientation"].append("opposite" if "opposite_orientiation" in category else "same")
+            rows["similarity_level"].append("high" if category.startswith("High_similarity") else "low")
+            rows["md_similarity"].append(float(pair_meta.get("md_similarity", np.nan)))
+            rows["certainty"].append(extract_certainty(result.get("llm_response", "")))
+            rows["vote_confidence"].append(float(result["vote"]["confidence"]) if "vote" in result else np.nan)
+            rows["image_variant"].append((result.get("image_variant") or {}).get("name", ""))
+            rows["outcome"].append(outcome)
+            rows["block_reason"].append(block_reason(result))
+            rows["predicted"].append(predicted)
+            if feature_tagger is not None:
+                texts.append(result.get("llm_response", ""))
+
+    table = {
+        name: np.array(values, dtype=float if name in ("md_similarity", "vote_confidence") else object)
+        for name, values in rows.items()
+    }
+    table["clear"] = np.isin(table["predicted"], ["same", "different"])
+    table["correct"] = table["predicted"] == table["ground_truth"]
+    # MegaDescriptor implicitly answers "same" for high-similarity pairs
+    md_predicted = np.where(table["similarity_level"] == "high", "same", "different")
+    table["md_correct"] = md_predicted == table["ground_truth"]
+    for name in ["clear", "correct", "md_correct"]:
+        table[name] = table[name].astype(bool)
+
+    if feature_tagger is not None:
+        with span("tag_features"):
+            counts = tag_responses(texts, feature_tagger, workers=feature_workers)
+        for index, feature in enumerate(feature_tagger.features):
+            table[f"feature_{feature}"] = counts[:, index] if len(texts) else np.zeros(0, dtype=np.int32)
+
+    return table
+
+
+def select_rows(table: Dict[str, np.ndarray], mask: np.ndarray) -> Dict[str, np.ndarray]:
+    """Return a new table with only the rows where mask is True."""
+    return {name: column[mask] for name, column in table.items()}
@@ -0,0 +1,302 @@
+"""Full-text search over LLM responses for qualitative analysis.
+
+ResponseIndex keeps every answered response in a SQLite file: one row per
+response with the pair metadata and the scored outcome (model, prompt,
+category, orientation, ground truth, prediction, correctness, certainty),
+and an FTS5 index over the response text (Porter-stemmed, so "scutes" finds
+"scute"). Queries combine an FTS5 match with column filters, e.g. responses
+mentioning "post-ocular scute" where the model was wrong on
+opposite-orientation pairs, ranked by BM25, paged, with highlighted snippets.
+
+Result files are indexed incrementally: a file is re-read only when its
+size or mtime changed, and its old rows are replaced.
+"""
+import sqlite3
+from pathlib import Path
+from typing import Dict, Any, Optional, Iterable
+
+import numpy as np
+
+from ..profiling import span
+from .results import build_results_table, load_results, result_outcome
+
+
+# Columns of the responses table that search() can filter on
+FILTER_COLUMNS = (
+    "pair_id", "model", "prompt_type", "prompt_version", "category", "ground_truth", "orientation",
+    "similarity_level", "certainty", "predicted", "correct", "image_variant",
+)
+
+# search() stops counting matches here; an exact count of a common term
+# re-runs the whole match and costs as much as the ranked page query
+COUNT_CAP = 1000
+
+
+def phrase_query(text: str) -> str:
+    """FTS5 query matching text as one phrase (hyphens and operators taken literally)."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+class ResponseIndex:
+    """SQLite FTS5 index of LLM responses joined with pair metadata."""
+
+    def __init__(self, db_path: Path):
+        """
+        Open (and create if needed) a response index.
+
+        Args:
+            db_path: Path of the SQLite file
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sources (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                responses INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS responses (
+                id INTEGER PRIMARY KEY,
+                source TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                pair_id TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_type TEXT NOT NULL,
+                prompt_version TEXT,
+                category TEXT NOT NULL,
+                ground_truth TEXT NOT NULL,
+                orientation TEXT NOT NULL,
+                similarity_level TEXT NOT NULL,
+                md_similarity REAL,
+                certainty TEXT NOT NULL,
+                predicted TEXT NOT NULL,
+                correct INTEGER NOT NULL,
+                image_variant TEXT NOT NULL,
+                llm_response TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_source ON responses (source);
+            CREATE INDEX IF NOT EXISTS responses_outcome ON responses (model, prompt_type, correct, orientation);
+            CREATE VIRTUAL TABLE IF NOT EXISTS response_fts USING fts5(
+                llm_response, content='responses', content_rowid='id', tokenize='porter unicode61'
+            );
+        """)
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def update(
+        self,
+        results_files: Iterable[Path],
+        pairs_metadata: Dict[str, Dict[str, Any]],
+        force: bool = False
+    ) -> Dict[str, int]:
+        """
+        Index result files that are new or changed since they were last indexed.
+
+        Only answered responses with text are indexed (errors, safety blocks,
+        cascade and inferred rows have no reasoning to search).
+
+        Args:
+            results_files: Result JSON files
+            pairs_metadata: Pairs metadata keyed by pair_id
+            force: Re-index every file even if unchanged
+
+        Returns:
+            Dict with counts: indexed (files), unchanged (files), responses (added)
+        """
+        counts = {"indexed": 0, "unchanged": 0, "responses": 0}
+        for results_file in results_files:
+            path = str(Path(results_file).resolve())
+            stat = Path(path).stat()
+            known = self._conn.execute(
+                "SELECT size, mtime_ns FROM sources WHERE path = ?", (path,)
+            ).fetchone()
+            if not force and known is not None and tuple(known) == (stat.st_size, stat.st_mtime_ns):
+                counts["unchanged"] += 1
+                continue
+
+            results = load_results([path])
+            positions = [
+                i for i, r in enumerate(results)
+                if result_outcome(r) == "answered" and r.get("llm_response") and r.get("pair_id") in pairs_metadata
+            ]
+            table = build_results_table([results[i] for i in positions], pairs_metadata)
+            rows = [
+                (
+                    path, position, table["pair_id"][row], table["model"][row], table["prompt_type"][row],
+                    results[position].get("prompt_version"), table["category"][row], table["ground_truth"][row],
+                    table["orientation"][row], table["similarity_level"][row],
+                    None if np.isnan(table["md_similarity"][row]) else float(table["md_similarity"][row]),
+                    table["certainty"][row], table["predicted"][row], int(table["correct"][row]),
+                    table["image_variant"][row], results[position]["llm_response"],
+                )
+                for row, position in enumerate(positions)
+            ]
+
+            with span("index_responses"):
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._remove_source(path)
+                    self._conn.executemany(
+                        "INSERT INTO responses (source, position, pair_id, model, prompt_type, prompt_version, "
+                        "category, ground_truth, orientation, similarity_level, md_similarity, certainty, "
+                        "predicted, correct, image_variant, llm_response) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        rows
+                    )
+                    self._conn.execute(
+                        "INSERT INTO response_fts (rowid, llm_response) "
+                        "SELECT id, llm_response FROM responses WHERE source = ?",
+                        (path,)
+                    )
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO sources (path, size, mtime_ns, responses) VALUES (?, ?, ?, ?)",
+                        (path, stat.st_size, stat.st_mtime_ns, len(rows))
+                    )
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            counts["indexed"] += 1
+            counts["responses"] += len(rows)
+
+        if counts["indexed"]:
+            # Merge the FTS segments written by the inserts, so queries touch one b-tree
+            self._conn.execute("INSERT INTO response_fts (response_fts) VALUES ('optimize')")
+        return counts
+
+    def _remove_source(self, path: str):
+        """Delete a file's rows (inside the caller's transaction)."""
+        old = self._conn.execute("SELECT id, llm_response FROM responses WHERE source = ?", (path,)).fetchall()
+        # External-content FTS tables need the old text to remove its tokens
+        self._conn.executemany(
+            "INSERT INTO response_fts (response_fts, rowid, llm_response) VALUES ('delete', ?, ?)",
+            [tuple(row) for row in old]
+        )
+        self._conn.execute("DELETE FROM responses WHERE source = ?", (path,))
+        self._conn.execute("DELETE FROM sources WHERE path = ?", (path,))
+
+    def search(
+        self,
+        match: Optional[str] = None,
+        filters: Dict[str, Any] = None,
+        page: int = 1,
+        page_size: int = 20,
+        highlight: tuple = ("[", "]"),
+        snippet_tokens: int = 24
+    ) -> Dict[str, Any]:
+        """
+        Search responses.
+
+        Args:
+            match: FTS5 query (see phrase_query() for literal phrases); None
+                lists all responses matching the filters
+            filters: Column -> value (or list of values) from FILTER_COLUMNS,
+                e.g. {"correct": 0, "orientation": "opposite"}
+            page: 1-based page number
+            page_size: Hits per page
+            highlight: Markers placed around matched terms in snippets
+            snippet_tokens: Tokens per snippet (at most 64)
+
+        Returns:
+            Dict with total, total_capped, page, page_size, pages and hits (list
+            of dicts with the response columns, snippet and rank; lower rank is
+            a better match). Matches are counted only up to COUNT_CAP (or the
+            end of the requested page, if further): when total_capped is True,
+            total and pages are lower bounds
+
+        Raises:
+            ValueError: On an unknown filter column or an invalid FTS5 query
+        """
+        where, params = [], []
+        for column, value in (filters or {}).items():
+            if column not in FILTER_COLUMNS:
+                raise ValueError(f"Unknown filter column: {column} (available: {', '.join(FILTER_COLUMNS)})")
+            values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+            values = [int(v) if column == "correct" else v for v in values]
+            where.append(f"r.{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+
+        columns = ("r.id, r.source, r.position, r.pair_id, r.model, r.prompt_type, r.prompt_version, r.category, "
+                   "r.ground_truth, r.orientation, r.similarity_level, r.md_similarity, r.certainty, "
+                   "r.predicted, r.correct, r.image_variant")
+        if match:
+            # CROSS JOIN keeps the FTS match as the outer loop; otherwise the planner may
+            # scan the filter index and re-run the match for every candidate row
+            source = "response_fts CROSS JOIN responses r ON r.id = response_fts.rowid"
+            where.insert(0, "response_fts MATCH ?")
+            params.insert(0, match)
+            order = "ORDER BY response_fts.rank"
+        else:
+            source = "responses r"
+            order = "ORDER BY r.id"
+        condition = f"WHERE {' AND '.join(where)}" if where else ""
+
+        page = max(1, page)
+        with span("search"):
+            try:
+                cap = max(COUNT_CAP, page * page_size)
+                total = self._conn.execute(
+                    f"SELECT COUNT(*) FROM (SELECT 1 FROM {source} {condition} LIMIT ?)", params + [cap + 1]
+                ).fetchone()[0]
+                rows = self._conn.execute(
+                    f"SELECT {columns}, {'response_fts.rank' if match else '0.0'} AS rank "
+                    f"FROM {source} {condition} {order} LIMIT ? OFFSET ?",
+                    params + [page_size, (page - 1) * page_size]
+                ).fetchall()
+                # Snippets only for the page's hits, not for every match
+                snippets = self._snippets(match, [row["id"] for row in rows], highlight, snippet_tokens)
+            except sqlite3.OperationalError as e:
+                raise ValueError(f"Invalid search query {match!r}: {e}")
+
+        hits = []
+        for row in rows:
+            hit = dict(row)
+            hit["correct"] = bool(hit["correct"])
+            hit["snippet"] = snippets.get(hit["id"], "")
+            hits.append(hit)
+        return {
+            "total": min(total, cap),
+            "total_capped": total > cap,
+            "page": page,
+            "page_size": page_size,
+            "pages": (min(total, cap) + page_size - 1) // page_size,
+            "hits": hits,
+        }
+
+    def _snippets(self, match: Optional[str], ids: list, highlight: tuple, tokens: int) -> Dict[int, str]:
+        """Highlighted snippets of the given responses (their first 200 characters without a match)."""
+        if not ids:
+            return {}
+        placeholders = ", ".join("?" * len(ids))
+        if not match:
+            rows = self._conn.execute(
+                f"SELECT id, substr(llm_response, 1, 200) FROM responses WHERE id IN ({placeholders})", ids
+            )
+        else:
+            rows = self._conn.execute(
+                f"SELECT rowid, snippet(response_fts, 0, ?, ?, ' … ', ?) FROM response_fts "
+                f"WHERE response_fts MATCH ? AND rowid IN ({placeholders})",
+                [highlight[0], highlight[1], max(1, min(64, tokens)), match] + ids
+            )
+        return dict(rows.fetchall())
+
+    def response(self, response_id: int) -> Optional[str]:
+        """Full text of one response (by the id returned in search hits)."""
+        row = self._conn.execute("SELECT llm_response FROM responses WHERE id = ?", (response_id,)).fetchone()
+        return row[0] if row else None
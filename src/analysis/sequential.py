@@ -0,0 +1,125 @@
+"""Anytime-valid sequential comparison of two prompt versions.
+
+Each pair answered by both versions contributes X = correct_A - correct_B in
+{-1, 0, 1}. Two anytime-valid tests are checked after every pair without
+inflating their error rates:
+
+- Superiority: a mixture sequential probability ratio test on the
+  discordant pairs (uniform prior on P(A wins) vs the null of 0.5). By
+  Ville's inequality the null is rejected with probability <= alpha.
+- Equivalence: a time-uniform confidence sequence for the mean difference
+  (Hoeffding normal-mixture boundary, Howard et al. 2021); the versions are
+  declared equivalent once it lies inside the margin.
+"""
+import math
+from typing import Dict, Any, Optional
+
+
+class SequentialComparison:
+    """Sequential paired test of accuracy A vs accuracy B."""
+
+    A_BETTER = "a_better"
+    B_BETTER = "b_better"
+    EQUIVALENT = "equivalent"
+    CONTINUE = "continue"
+
+    def __init__(
+        self,
+        alpha: float = 0.05,
+        margin: float = 0.05,
+        min_pairs: int = 10,
+        rho: float = 50.0
+    ):
+        """
+        Initialize the test.
+
+        Args:
+            alpha: Error rate, valid simultaneously over all stopping times
+            margin: Versions are equivalent if |accuracy A - accuracy B| < margin
+            min_pairs: Never stop before this many pairs
+            rho: Mixture tuning parameter; the boundary is tightest near rho pairs
+        """
+        if not 0 < alpha < 1:
+            raise ValueError(f"alpha must be in (0, 1), got {alpha}")
+        if margin < 0:
+            raise ValueError(f"margin must be non-negative, got {margin}")
+
+        self.alpha = alpha
+        self.margin = margin
+        self.min_pairs = min_pairs
+        self.rho = rho
+
+        self.n = 0
+        self.a_wins = 0
+        self.b_wins = 0
+        self.decision = self.CONTINUE
+
+    def radius(self, n: Optional[int] = None) -> float:
+        """Half-width of the confidence sequence for the mean difference after n pairs."""
+        n = self.n if n is None else n
+        if n == 0:
+            return float("inf")
+        # X lies in [-1, 1], so it is 1-sub-Gaussian and the intrinsic time is n
+        v = float(n)
+        boundary = math.sqrt((v + self.rho) * math.log((v + self.rho) / (self.rho * (self.alpha / 2) ** 2)))
+        return boundary / n
+
+    @property
+    def difference(self) -> float:
+        """Observed accuracy difference (A - B)."""
+        return (self.a_wins - self.b_wins) / self.n if self.n else 0.0
+
+    def log_likelihood_ratio(self) -> float:
+        """Log mixture likelihood ratio of the discordant pairs against P(A wins) = 0.5."""
+        wins, losses = self.a_wins, self.b_wins
+        return (
+            math.lgamma(wins + 1) + math.lgamma(losses + 1) - math.lgamma(wins + losses + 2)
+            + (wins + losses) * math.log(2)
+        )
+
+    def interval(self):
+        """Current (low, high) confidence bounds for the accuracy difference."""
+        r = self.radius()
+        return max(-1.0, self.difference - r), min(1.0, self.difference + r)
+
+    def update(self, correct_a: bool, correct_b: bool) -> str:
+        """
+        Add one paired observation and return the current decision.
+
+        Returns:
+            One of A_BETTER, B_BETTER, EQUIVALENT or CONTINUE
+        """
+        if self.decision != self.CONTINUE:
+            return self.decision
+
+        self.n += 1
+        if correct_a and not correct_b:
+            self.a_wins += 1
+        elif correct_b and not correct_a:
+            self.b_wins += 1
+
+        if self.n < self.min_pairs:
+            return self.CONTINUE
+
+        low, high = self.interval()
+        if self.log_likelihood_ratio() >= math.log(1 / self.alpha):
+            self.decision = self.A_BETTER if self.a_wins > self.b_wins else self.B_BETTER
+        elif -self.margin < low and high < self.margin:
+            self.decision = self.EQUIVALENT
+        return self.decision
+
+    def summary(self) -> Dict[str, Any]:
+        """Current state as a JSON-serializable dict."""
+        low, high = self.interval() if self.n else (-1.0, 1.0)
+        return {
+            "decision": self.decision,
+            "n_pairs": self.n,
+            "a_wins": self.a_wins,
+            "b_wins": self.b_wins,
+            "difference": self.difference,
+            "log_likelihood_ratio": self.log_likelihood_ratio(),
+            "ci_low": low,
+            "ci_high": high,
+            "alpha": self.alpha,
+            "margin": self.margin,
+        }
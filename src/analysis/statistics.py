@@ -0,0 +1,300 @@
+"""Paired significance tests and bootstrap confidence intervals.
+
+All resampling is done on sufficient statistics rather than on index
+matrices: resampling a vector of correct/incorrect outcomes with replacement
+is equivalent to drawing a binomial count, and resampling paired outcomes is
+equivalent to a multinomial draw over the four agreement cells. This keeps
+10k resamples over 100k results at O(resamples) cost.
+"""
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from scipy import stats
+
+
+def _as_bool(values) -> np.ndarray:
+    return np.asarray(values, dtype=bool)
+
+
+def _percentile_interval(samples: np.ndarray, confidence: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Percentile interval along the last axis."""
+    alpha = (1.0 - confidence) / 2.0
+    low, high = np.quantile(samples, [alpha, 1.0 - alpha], axis=-1)
+    return low, high
+
+
+def _paired_cells(correct_a, correct_b) -> Dict[str, int]:
+    """Count the 2x2 agreement table for paired binary outcomes."""
+    a = _as_bool(correct_a)
+    b = _as_bool(correct_b)
+    if a.shape != b.shape:
+        raise ValueError(f"Paired outcomes must have the same shape: {a.shape} vs {b.shape}")
+    return {
+        "both_correct": int(np.count_nonzero(a & b)),
+        "only_a": int(np.count_nonzero(a & ~b)),
+        "only_b": int(np.count_nonzero(~a & b)),
+        "both_wrong": int(np.count_nonzero(~a & ~b)),
+    }
+
+
+def mcnemar_test(correct_a, correct_b, exact: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    McNemar's test for two classifiers evaluated on the same items.
+
+    Args:
+        correct_a: Boolean array, classifier A was correct on item i
+        correct_b: Boolean array, classifier B was correct on item i (aligned with A)
+        exact: Use the exact binomial test (default: only when fewer than 25 discordant pairs)
+
+    Returns:
+        Dict with the 2x2 cell counts, accuracies, statistic, p_value and method
+    """
+    cells = _paired_cells(correct_a, correct_b)
+    n = sum(cells.values())
+    discordant = cells["only_a"] + cells["only_b"]
+
+    if exact is None:
+        exact = discordant < 25
+
+    if discordant == 0:
+        statistic, p_value = 0.0, 1.0
+    elif exact:
+        statistic = float(min(cells["only_a"], cells["only_b"]))
+        p_value = stats.binomtest(cells["only_a"], discordant, 0.5).pvalue
+    else:
+        # Chi-squared with Edwards' continuity correction
+        statistic = max(0, abs(cells["only_a"] - cells["only_b"]) - 1) ** 2 / discordant
+        p_value = stats.chi2.sf(statistic, df=1)
+
+    return {
+        **cells,
+        "n": n,
+        "accuracy_a": (cells["both_correct"] + cells["only_a"]) / n if n else float("nan"),
+        "accuracy_b": (cells["both_correct"] + cells["only_b"]) / n if n else float("nan"),
+        "statistic": float(statistic),
+        "p_value": float(p_value),
+        "method": "exact" if exact else "chi2",
+    }
+
+
+def bootstrap_ci(
+    correct,
+    n_resamples: int = 10000,
+    confidence: float = 0.95,
+    seed: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Percentile bootstrap confidence interval for accuracy.
+
+    Args:
+        correct: Boolean array of per-item outcomes
+        n_resamples: Number of bootstrap resamples
+        confidence: Confidence level of the interval
+        seed: Random seed for reproducibility
+
+    Returns:
+        Dict with n, accuracy, ci_low and ci_high
+    """
+    correct = _as_bool(correct)
+    n = correct.size
+    if n == 0:
+        return {"n": 0, "accuracy": float("nan"), "ci_low": float("nan"), "ci_high": float("nan")}
+
+    rng = np.random.default_rng(seed)
+    accuracy = np.count_nonzero(correct) / n
+    samples = rng.binomial(n, accuracy, size=n_resamples) / n
+    low, high = _percentile_interval(samples, confidence)
+
+    return {"n": n, "accuracy": float(accuracy), "ci_low": float(low), "ci_high": float(high)}
+
+
+def bootstrap_breakdown(
+    table: Dict[str, np.ndarray],
+    by: List[str],
+    outcome: str = "correct",
+    mask: Optional[np.ndarray] = None,
+    n_resamples: int = 10000,
+    confidence: float = 0.95,
+    seed: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Accuracy and bootstrap CI for every group of a breakdown, in one pass.
+
+    Args:
+        table: Results table from build_results_table
+        by: Column names to group by (e.g. ["model", "prompt_type", "category"])
+        outcome: Boolean column to average
+        mask: Optional row filter (e.g. table["clear"])
+        n_resamples: Number of bootstrap resamples per group
+        confidence: Confidence level of the intervals
+        seed: Random seed for reproducibility
+
+    Returns:
+        One dict per non-empty group, with the group's column values plus
+        n, accuracy, ci_low and ci_high, sorted by group values
+    """
+    if mask is None:
+        mask = np.ones(len(table[outcome]), dtype=bool)
+    outcomes = _as_bool(table[outcome])[mask]
+    if outcomes.size == 0:
+        return []
+
+    # Encode each grouping column as integer codes and combine into one group id
+    uniques, codes = [], []
+    for column in by:
+        values, inverse = np.unique(table[column][mask].astype(str), return_inverse=True)
+        uniques.append(values)
+        codes.append(inverse)
+    shape = tuple(len(values) for values in uniques)
+    group_ids = np.ravel_multi_index(codes, shape)
+
+    n_groups = int(np.prod(shape))
+    totals = np.bincount(group_ids, minlength=n_groups)
+    hits = np.bincount(group_ids, weights=outcomes, minlength=n_groups)
+    present = np.flatnonzero(totals)
+
+    n = totals[present]
+    accuracy = hits[present] / n
+    rng = np.random.default_rng(seed)
+    samples = rng.binomial(n[:, None], accuracy[:, None], size=(present.size, n_resamples)) / n[:, None]
+    low, high = _percentile_interval(samples, confidence)
+
+    breakdown = []
+    for i, (group_id, group_n) in enumerate(zip(present, n)):
+        group_codes = np.unravel_index(group_id, shape)
+        row = {column: str(uniques[j][group_codes[j]]) for j, column in enumerate(by)}
+        row.update({
+            "n": int(group_n),
+            "accuracy": float(accuracy[i]),
+            "ci_low": float(low[i]),
+            "ci_high": float(high[i]),
+        })
+        breakdown.append(row)
+
+    return breakdown
+
+
+def paired_bootstrap_diff(
+    correct_a,
+    correct_b,
+    n_resamples: int = 10000,
+    confidence: float = 0.95,
+    seed: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Bootstrap CI for the accuracy difference (A - B) on paired outcomes.
+
+    Resampling items with replacement is a multinomial draw over the four
+    agreement cells; only the discordant cells move the difference.
+
+    Returns:
+        Dict with n, difference, ci_low and ci_high
+    """
+    cells = _paired_cells(correct_a, correct_b)
+    n = sum(cells.values())
+    if n == 0:
+        return {"n": 0, "difference": float("nan"), "ci_low": float("nan"), "ci_high": float("nan")}
+
+    counts = np.array([cells["both_correct"], cells["only_a"], cells["only_b"], cells["both_wrong"]])
+    rng = np.random.default_rng(seed)
+    draws = rng.multinomial(n, counts / n, size=n_resamples)
+    samples = (draws[:, 1] - draws[:, 2]) / n
+    low, high = _percentile_interval(samples, confidence)
+
+    return {
+        "n": n,
+        "difference": (cells["only_a"] - cells["only_b"]) / n,
+        "ci_low": float(low),
+        "ci_high": float(high),
+    }
+
+
+def permutation_test(
+    correct_a,
+    correct_b,
+    paired: bool = False,
+    n_resamples: int = 10000,
+    seed: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Two-sided permutation test for a difference in accuracy.
+
+    Paired outcomes are permuted by swapping labels within each item (only
+    discordant items matter, so the null count is binomial). Independent
+    groups are permuted by shuffling group labels (the null count of
+    successes in group A is hypergeometric).
+
+    Args:
+        correct_a: Boolean outcomes for A
+        correct_b: Boolean outcomes for B (aligned with A if paired)
+        paired: Whether A and B were evaluated on the same items
+        n_resamples: Number of permutations
+        seed: Random seed for reproducibility
+
+    Returns:
+        Dict with n_a, n_b, difference (accuracy A - B) and p_value
+    """
+    rng = np.random.default_rng(seed)
+
+    if paired:
+        cells = _paired_cells(correct_a, correct_b)
+        n = sum(cells.values())
+        n_a = n_b = n
+        discordant = cells["only_a"] + cells["only_b"]
+        observed = (cells["only_a"] - cells["only_b"]) / n if n else 0.0
+        flips = rng.binomial(discordant, 0.5, size=n_resamples)
+        null = (2 * flips - discordant) / max(n, 1)
+    else:
+        a = _as_bool(correct_a)
+        b = _as_bool(correct_b)
+        n_a, n_b = a.size, b.size
+        if n_a == 0 or n_b == 0:
+            raise ValueError("Both groups must be non-empty")
+        hits_a, hits_b = np.count_nonzero(a), np.count_nonzero(b)
+        observed = hits_a / n_a - hits_b / n_b
+        total_hits = hits_a + hits_b
+        null_hits_a = rng.hypergeometric(total_hits, n_a + n_b - total_hits, n_a, size=n_resamples)
+        null = null_hits_a / n_a - (total_hits - null_hits_a) / n_b
+
+    # Tolerance guards against float ties being counted as strictly smaller
+    extreme = np.count_nonzero(np.abs(null) >= abs(observed) - 1e-12)
+    p_value = (extreme + 1) / (n_resamples + 1)
+
+    return {"n_a": int(n_a), "n_b": int(n_b), "difference": float(observed), "p_value": float(p_value)}
+
+
+def paired_outcomes(
+    table: Dict[str, np.ndarray],
+    field: str,
+    value_a: str,
+    value_b: str,
+    match_on: List[str],
+    outcome: str = "correct",
+    mask: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Align outcomes of two conditions on the same items.
+
+    For example, naive vs expert on the same (pair_id, model) uses
+    field="prompt_type", match_on=["pair_id", "model"]. Items present in only
+    one condition are dropped; duplicates keep the first occurrence.
+
+    Returns:
+        Tuple of aligned boolean arrays (outcomes_a, outcomes_b)
+    """
+    if mask is None:
+        mask = np.ones(len(table[field]), dtype=bool)
+
+    index_a, index_b = {}, {}
+    keys = list(zip(*(table[column] for column in match_on)))
+    for i in np.flatnonzero(mask):
+        if table[field][i] == value_a:
+            index_a.setdefault(keys[i], i)
+        elif table[field][i] == value_b:
+            index_b.setdefault(keys[i], i)
+
+    common = [key for key in index_a if key in index_b]
+    rows_a = np.array([index_a[key] for key in common], dtype=int)
+    rows_b = np.array([index_b[key] for key in common], dtype=int)
+    outcomes = _as_bool(table[outcome])
+    return outcomes[rows_a], outcomes[rows_b]
@@ -0,0 +1,111 @@
+"""Accuracy vs cost curves of an image resolution / quality sweep.
+
+A sweep runs the same pairs at several image variants (see
+data.image_variants), so each variant is compared with the reference
+variant on paired outcomes: the accuracy difference gets a paired bootstrap
+interval and a McNemar test, and the cheapest variant whose accuracy stays
+within a tolerance of the reference is the one to pin.
+"""
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from .results import build_results_table
+from .statistics import bootstrap_ci, mcnemar_test, paired_bootstrap_diff, paired_outcomes
+
+
+def _variant_order(variant: Dict[str, Any]):
+    """Sort key: larger edge and higher quality first (None = original)."""
+    edge = variant.get("max_edge") or float("inf")
+    quality = variant.get("quality") or 100
+    return (variant.get("crop") != "full", -edge, -quality)
+
+
+def sweep_curve(
+    results: List[Dict[str, Any]],
+    pairs_metadata: Dict[str, Dict[str, Any]],
+    reference: Optional[str] = None,
+    seed: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Accuracy, tokens, latency and upload size per image variant.
+
+    Args:
+        results: Sweep result records (with "image_variant")
+        pairs_metadata: Pairs metadata keyed by pair_id
+        reference: Variant name to compare against (default: the full-image
+            variant with the largest edge and highest quality)
+        seed: Bootstrap seed
+
+    Returns:
+        List of dicts ordered by mean prompt tokens, then upload size, with
+        keys variant, n, accuracy, ci_low, ci_high, prompt_tokens,
+        latency_seconds, image_bytes and, for non-reference variants,
+        difference, diff_ci_low, diff_ci_high and mcnemar_p (vs the reference)
+    """
+    variants = {}
+    for result in results:
+        if "image_variant" in result:
+            variants.setdefault(result["image_variant"]["name"], result["image_variant"])
+    if not variants:
+        return []
+    if reference is None:
+        reference = min(variants.values(), key=_variant_order)["name"]
+
+    table = build_results_table(results, pairs_metadata)
+    curve = []
+    for name, variant in variants.items():
+        records = [r for r in results if r.get("image_variant", {}).get("name") == name and "error" not in r]
+        answered = [r for r in records if r.get("outcome", "answered") == "answered"]
+        tokens = [r["token_usage"]["prompt_tokens"] for r in answered
+                  if (r.get("token_usage") or {}).get("prompt_tokens")]
+        latencies = [r["latency_seconds"] for r in answered if r.get("latency_seconds") is not None]
+        sizes = [sum(r["image_bytes"]) for r in records if r.get("image_bytes")]
+
+        accuracy = bootstrap_ci(table["correct"][table["image_variant"] == name], seed=seed)
+        point = {
+            "variant": name,
+            "crop": variant["crop"],
+            "max_edge": variant["max_edge"],
+            "quality": variant["quality"],
+            "reference": name == reference,
+            "n": accuracy["n"],
+            "accuracy": accuracy["accuracy"],
+            "ci_low": accuracy["ci_low"],
+            "ci_high": accuracy["ci_high"],
+            "prompt_tokens": float(np.mean(tokens)) if tokens else None,
+            "latency_seconds": float(np.median(latencies)) if latencies else None,
+            "image_bytes": float(np.mean(sizes)) if sizes else None,
+        }
+        if name != reference:
+            correct, correct_reference = paired_outcomes(
+                table, "image_variant", name, reference, match_on=["pair_id", "model", "prompt_type"]
+            )
+            difference = paired_bootstrap_diff(correct, correct_reference, seed=seed)
+            point.update({
+                "difference": difference["difference"],
+                "diff_ci_low": difference["ci_low"],
+                "diff_ci_high": difference["ci_high"],
+                "mcnemar_p": mcnemar_test(correct, correct_reference)["p_value"] if len(correct) else float("nan"),
+            })
+        curve.append(point)
+
+    def cost(point):
+        tokens = point["prompt_tokens"] if point["prompt_tokens"] is not None else float("inf")
+        return (tokens, point["image_bytes"] or 0)
+    return sorted(curve, key=cost)
+
+
+def cheapest_variant(curve: List[Dict[str, Any]], tolerance: float = 0.02) -> Optional[Dict[str, Any]]:
+    """
+    Cheapest variant whose accuracy is at most `tolerance` below the reference.
+
+    The returned point has "non_inferior" set when the whole paired interval
+    stays above -tolerance, i.e. when the data actually demonstrate it.
+    """
+    for point in curve:
+        if point["reference"]:
+            return dict(point, non_inferior=True)
+        if point["difference"] >= -tolerance:
+            return dict(point, non_inferior=point["diff_ci_low"] >= -tolerance)
+    return None
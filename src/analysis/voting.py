@@ -0,0 +1,126 @@
+"""Self-consistency voting over repeated samples with early stopping.
+
+Up to M answers are sampled at non-zero temperature and the majority
+decision wins. Samples are requested in waves sized to the fewest votes
+that could still lock in a majority: with M=5 the first wave is 3 samples,
+and if all three agree the remaining two are never sent. Most pairs agree
+after 2-3 samples, so the average cost stays well below M.
+
+The vote share is reported as a confidence with a Laplace correction
+((votes + 1) / (n + 2)), so 3/3 agreement is not reported as certainty;
+calibration_bins compares it against observed accuracy.
+"""
+from typing import Dict, Any, List
+
+import numpy as np
+
+
+DECISIONS = ("yes", "no")
+
+
+class MajorityVote:
+    """Running tally of yes/no/unclear votes out of at most max_samples."""
+
+    def __init__(self, max_samples: int):
+        """
+        Initialize the tally.
+
+        Args:
+            max_samples: Maximum number of samples M (odd values avoid ties)
+        """
+        if max_samples < 1:
+            raise ValueError(f"max_samples must be at least 1, got {max_samples}")
+        self.max_samples = max_samples
+        self.majority = max_samples // 2 + 1
+        self.votes = {"yes": 0, "no": 0, "unclear": 0}
+
+    @property
+    def n(self) -> int:
+        return sum(self.votes.values())
+
+    @property
+    def remaining(self) -> int:
+        return self.max_samples - self.n
+
+    def add(self, decision: str):
+        """Record one sample's decision ("yes", "no"; anything else counts as unclear)."""
+        self.votes[decision if decision in DECISIONS else "unclear"] += 1
+
+    def leader(self) -> str:
+        """Decision with the most votes ("unclear" on a tie or with no yes/no votes)."""
+        yes, no = self.votes["yes"], self.votes["no"]
+        if yes == no:
+            return "unclear"
+        return "yes" if yes > no else "no"
+
+    def locked(self) -> bool:
+        """True once one decision has a majority of max_samples."""
+        return max(self.votes["yes"], self.votes["no"]) >= self.majority
+
+    def done(self) -> bool:
+        """True when more samples cannot change whether (and which) majority is reached."""
+        if self.locked() or self.remaining == 0:
+            return True
+        # Neither decision can still reach a majority
+        return max(self.votes["yes"], self.votes["no"]) + self.remaining < self.majority
+
+    def next_wave(self) -> int:
+        """Samples to request next: the fewest that could lock in the leading decision."""
+        if self.done():
+            return 0
+        needed = self.majority - max(self.votes["yes"], self.votes["no"])
+        return min(needed, self.remaining)
+
+    def confidence(self) -> float:
+        """Laplace-corrected vote share of the winning decision (0.5 when undecided)."""
+        winner = self.leader()
+        if winner == "unclear":
+            return 0.5
+        return (self.votes[winner] + 1) / (self.n + 2)
+
+    def summary(self) -> Dict[str, Any]:
+        """Votes, winning decision, confidence and whether sampling stopped early."""
+        return {
+            "votes": dict(self.votes),
+            "decision": self.leader(),
+            "confidence": self.confidence(),
+            "samples": self.n,
+            "max_samples": self.max_samples,
+            "early_stopped": self.n < self.max_samples,
+        }
+
+
+def calibration_bins(
+    confidence,
+    correct,
+    edges: List[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Observed accuracy per confidence bin (a reliability table).
+
+    Args:
+        confidence: Vote confidence per answer
+        correct: Whether each answer was correct
+        edges: Bin edges (default: 0.5, 0.6, ..., 1.0)
+
+    Returns:
+        List of dicts with keys: low, high, n, mean_confidence, accuracy (empty bins omitted)
+    """
+    confidence = np.asarray(confidence, dtype=float)
+    correct = np.asarray(correct, dtype=bool)
+    edges = np.asarray(edges or [0.5, 0.6, 0.7, 0.8, 0.9, 1.0])
+    bins = np.clip(np.searchsorted(edges, confidence, side="right") - 1, 0, len(edges) - 2)
+
+    table = []
+    for b in range(len(edges) - 1):
+        rows = bins == b
+        if not rows.any():
+            continue
+        table.append({
+            "low": float(edges[b]),
+            "high": float(edges[b + 1]),
+            "n": int(rows.sum()),
+            "mean_confidence": float(confidence[rows].mean()),
+            "accuracy": float(correct[rows].mean()),
+        })
+    return table
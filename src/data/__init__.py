@@ -0,0 +1,5 @@
+from .similarity import SimilarityMatrix, load_embeddings
+from .image_hash import ImageHashIndex, BKTree, collapse_pairs
+from .manifest import DatasetManifest
+
+__all__ = ['SimilarityMatrix', 'load_embeddings', 'ImageHashIndex', 'BKTree', 'collapse_pairs', 'DatasetManifest']
@@ -0,0 +1,129 @@
+"""Side-by-side composite of an image pair on one labeled canvas.
+
+Sending one composite instead of two images pays the per-image token
+overhead once and lets the panel size be chosen explicitly. Panels are the
+(optionally head-cropped) images fitted into a square of panel_edge pixels,
+labeled "Image 1" (left) and "Image 2" (right) so the prompts' references
+to Image 1 / Image 2 still apply; COMPOSITE_PREAMBLE tells the model which
+panel is which. Composites are cached by the content hashes of both
+panels and the layout settings.
+"""
+import hashlib
+from pathlib import Path
+from typing import Dict, Any, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from .image_variants import ImageVariant, VariantCache
+
+
+COMPOSITE_PREAMBLE = (
+    "The two photographs to compare are shown side by side in a single image: "
+    "the LEFT panel (labeled \"Image 1\") is Image 1 and the RIGHT panel "
+    "(labeled \"Image 2\") is Image 2.\n\n"
+)
+
+
+class CompositeBuilder:
+    """Builds and caches labeled side-by-side composites of image pairs."""
+
+    def __init__(
+        self,
+        variant_cache: VariantCache,
+        panel_edge: int = 768,
+        crop: str = "full",
+        gap: int = 16,
+        label_height: int = 40,
+        quality: int = 90
+    ):
+        """
+        Initialize builder.
+
+        Args:
+            variant_cache: Renders the panels (and holds head boxes for crop="head");
+                composites are cached in its directory under "composite/"
+            panel_edge: Side of each square panel in pixels
+            crop: "full" or "head"
+            gap: White gap between the panels in pixels
+            label_height: Height of the label strip above the panels
+            quality: JPEG quality of the composite
+        """
+        self.variant_cache = variant_cache
+        self.panel_edge = panel_edge
+        self.crop = crop
+        self.gap = gap
+        self.label_height = label_height
+        self.quality = quality
+        self.panel_variant = ImageVariant(max_edge=panel_edge, quality=95, crop=crop)
+        self._font = self._load_font(max(12, label_height * 3 // 5))
+
+    @staticmethod
+    def _load_font(size: int):
+        try:
+            return ImageFont.load_default(size=size)
+        except TypeError:
+            # Pillow < 10.1 only has the fixed-size bitmap font
+            return ImageFont.load_default()
+
+    @property
+    def name(self) -> str:
+        return f"composite_{self.crop}_{self.panel_edge}"
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """(width, height) of every composite."""
+        return (2 * self.panel_edge + self.gap, self.panel_edge + self.label_height)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Settings in the shape of ImageVariant.to_dict(), so sweep analysis can compare formats."""
+        return {
+            "name": self.name,
+            "format": "composite",
+            "crop": self.crop,
+            "max_edge": self.panel_edge,
+            "quality": self.quality,
+        }
+
+    def build(self, image1: Path, image2: Path) -> Path:
+        """
+        Composite of two images (cached).
+
+        Raises:
+            ValueError: If a head crop is requested for an image without a head box
+        """
+        panels = []
+        for path in (image1, image2):
+            panel = self.variant_cache.path_for(Path(path), self.panel_variant)
+            if panel is None:
+                raise ValueError(f"No head box for {Path(path).name}")
+            panels.append(Path(panel))
+
+        key = hashlib.sha256(
+            "|".join([self.variant_cache.digest(panels[0]), self.variant_cache.digest(panels[1]),
+                      self.name, str(self.gap), str(self.label_height), str(self.quality)]).encode("utf-8")
+        ).hexdigest()[:24]
+        target = self.variant_cache.cache_dir / "composite" / f"{key}.jpg"
+        if target.exists():
+            return target
+
+        width, height = self.size
+        canvas = Image.new("RGB", (width, height), "white")
+        draw = ImageDraw.Draw(canvas)
+        for index, panel_path in enumerate(panels):
+            left = index * (self.panel_edge + self.gap)
+            with Image.open(panel_path) as panel:
+                panel = panel.convert("RGB")
+                panel.thumbnail((self.panel_edge, self.panel_edge), Image.Resampling.LANCZOS)
+                offset = (left + (self.panel_edge - panel.width) // 2,
+                          self.label_height + (self.panel_edge - panel.height) // 2)
+                canvas.paste(panel, offset)
+            label = f"Image {index + 1} ({'left' if index == 0 else 'right'})"
+            text_width = draw.textlength(label, font=self._font)
+            draw.text((left + (self.panel_edge - text_width) / 2, self.label_height // 5), label,
+                      fill="black", font=self._font)
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_suffix(".partial")
+        canvas.save(partial, format="JPEG", quality=self.quality)
+        partial.replace(target)
+        return target
@@ -0,0 +1,336 @@
+"""Perceptual-hash index for finding near-duplicate images.
+
+Burst shots and re-exports of the same frame hash to (almost) the same
+64-bit perceptual hash, so near-duplicates are images whose hashes differ in
+at most a few bits. Hashes are computed in a process pool, cached per file
+(path, mtime, size) so rebuilding after adding images only hashes the new
+ones, and stored in a BK-tree for Hamming-radius lookups without comparing
+every pair.
+
+Two hashes are available:
+
+- dHash: sign of horizontal gradients on a 9x8 thumbnail; fast, robust to
+  re-encoding and brightness changes.
+- pHash: sign of the low-frequency 8x8 DCT block (vs. its median) of a 32x32
+  thumbnail; also robust to small crops and rescaling.
+"""
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+from scipy.fft import dct
+
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff"}
+
+
+def _pack_bits(bits: np.ndarray) -> int:
+    """Pack a boolean array into an int, first element as the most significant bit."""
+    value = 0
+    for bit in bits.ravel():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def dhash(path: Union[str, Path], hash_size: int = 8) -> int:
+    """Difference hash of an image (hash_size**2 bits)."""
+    with Image.open(path) as image:
+        thumbnail = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+        pixels = np.asarray(thumbnail, dtype=np.int16)
+    return _pack_bits(pixels[:, 1:] > pixels[:, :-1])
+
+
+def phash(path: Union[str, Path], hash_size: int = 8, highfreq_factor: int = 4) -> int:
+    """DCT-based perceptual hash of an image (hash_size**2 bits)."""
+    size = hash_size * highfreq_factor
+    with Image.open(path) as image:
+        thumbnail = image.convert("L").resize((size, size), Image.Resampling.LANCZOS)
+        pixels = np.asarray(thumbnail, dtype=np.float64)
+    coefficients = dct(dct(pixels, axis=0, norm="ortho"), axis=1, norm="ortho")
+    low = coefficients[:hash_size, :hash_size]
+    return _pack_bits(low > np.median(low))
+
+
+HASH_FUNCTIONS = {"dhash": dhash, "phash": phash}
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+
+def _hash_file(job: Tuple[str, str, int]) -> Tuple[str, Optional[int], Optional[str]]:
+    """Worker: (path, method, hash_size) -> (path, hash, error)."""
+    path, method, hash_size = job
+    try:
+        return path, HASH_FUNCTIONS[method](path, hash_size=hash_size), None
+    except (OSError, ValueError) as e:
+        return path, None, str(e)
+
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes with the Hamming metric."""
+
+    def __init__(self):
+        # Node: [hash, items, {distance: child}]
+        self._root: Optional[list] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, item: Any):
+        """Insert an item under a hash (items with equal hashes share a node)."""
+        self._size += 1
+        if self._root is None:
+            self._root = [value, [item], {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, Any]]:
+        """All (distance, item) within radius of value, nearest first."""
+        if self._root is None:
+            return []
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= radius:
+                found.extend((distance, item) for item in node[1])
+            # Triangle inequality: only children at |d - distance| <= radius can hold matches
+            for child_distance, child in node[2].items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        found.sort(key=lambda match: (match[0], str(match[1])))
+        return found
+
+
+class ImageHashIndex:
+    """Perceptual hashes of a set of images with near-duplicate lookups."""
+
+    def __init__(self, method: str = "phash", hash_size: int = 8):
+        """
+        Initialize an empty index.
+
+        Args:
+            method: "phash" or "dhash"
+            hash_size: Hash side length (hash_size**2 bits)
+        """
+        if method not in HASH_FUNCTIONS:
+            raise ValueError(f"Unknown hash method: {method} (available: {', '.join(HASH_FUNCTIONS)})")
+        self.method = method
+        self.hash_size = hash_size
+        self.hashes: Dict[str, int] = {}
+        self._signatures: Dict[str, Tuple[int, int]] = {}
+        self._tree: Optional[BKTree] = None
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def __contains__(self, path: Union[str, Path]) -> bool:
+        return self._key(path) in self.hashes
+
+    @staticmethod
+    def _key(path: Union[str, Path]) -> str:
+        return str(Path(path).resolve())
+
+    def build(self, paths: Iterable[Union[str, Path]], workers: int = None) -> Dict[str, Any]:
+        """
+        Hash images in parallel; files unchanged since the last build are skipped.
+
+        Args:
+            paths: Image files
+            workers: Worker processes (default: CPU count)
+
+        Returns:
+            Dict with counts of hashed, unchanged and failed files (and the failures)
+        """
+        jobs = []
+        signatures = {}
+        unchanged = 0
+        for path in paths:
+            key = self._key(path)
+            stat = os.stat(key)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if self._signatures.get(key) == signature and key in self.hashes:
+                unchanged += 1
+                continue
+            signatures[key] = signature
+            jobs.append((key, self.method, self.hash_size))
+
+        failures = {}
+        if jobs:
+            workers = workers or os.cpu_count() or 1
+            if workers > 1 and len(jobs) > 1:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    outputs = list(pool.map(_hash_file, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+            else:
+                outputs = [_hash_file(job) for job in jobs]
+            for key, value, error in outputs:
+                if error is not None:
+                    failures[key] = error
+                    continue
+                self.hashes[key] = value
+                self._signatures[key] = signatures[key]
+            self._tree = None
+
+        return {"hashed": len(jobs) - len(failures), "unchanged": unchanged, "failed": len(failures),
+                "failures": failures}
+
+    def build_directory(self, image_dir: Path, workers: int = None) -> Dict[str, Any]:
+        """Hash every image file under a directory (recursively); see build()."""
+        paths = sorted(p for p in Path(image_dir).rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES)
+        return self.build(paths, workers=workers)
+
+    def _bk_tree(self) -> BKTree:
+        if self._tree is None:
+            tree = BKTree()
+            for key, value in self.hashes.items():
+                tree.add(value, key)
+            self._tree = tree
+        return self._tree
+
+    def hash_of(self, path: Union[str, Path]) -> int:
+        """Stored hash of an indexed image (KeyError if not indexed)."""
+        return self.hashes[self._key(path)]
+
+    def find(self, query: Union[str, Path, int], radius: int = 4) -> List[Tuple[int, str]]:
+        """
+        Indexed images within a Hamming radius of an image or hash.
+
+        Args:
+            query: Indexed image path, or a hash value
+            radius: Maximum number of differing bits
+
+        Returns:
+            List of (distance, path), nearest first (includes the query image itself)
+        """
+        value = query if isinstance(query, int) else self.hash_of(query)
+        return self._bk_tree().search(value, radius)
+
+    def clusters(self, radius: int = 4) -> List[List[str]]:
+        """
+        Groups of near-duplicate images (connected components at the radius).
+
+        Only groups with more than one image are returned, each sorted, and
+        the list is sorted by its first path.
+        """
+        seen = set()
+        groups = []
+        for key in sorted(self.hashes):
+            if key in seen:
+                continue
+            component = []
+            queue = deque([key])
+            seen.add(key)
+            while queue:
+                current = queue.popleft()
+                component.append(current)
+                for _, neighbour in self.find(self.hashes[current], radius):
+                    if neighbour not in seen:
+                        seen.add(neighbour)
+                        queue.append(neighbour)
+            if len(component) > 1:
+                groups.append(sorted(component))
+        return groups
+
+    def representatives(self, radius: int = 4) -> Dict[str, str]:
+        """Map of every near-duplicate image to its group's representative (first path)."""
+        mapping = {}
+        for group in self.clusters(radius):
+            for path in group:
+                mapping[path] = group[0]
+        return mapping
+
+    def save(self, path: Path):
+        """
+        Write the index as JSON (hashes as hex strings).
+
+        Image paths are stored relative to the index file's directory, so the
+        index stays valid in another checkout of the project.
+        """
+        root = Path(path).resolve().parent
+        digits = (self.hash_size * self.hash_size + 3) // 4
+        data = {
+            "method": self.method,
+            "hash_size": self.hash_size,
+            "images": {
+                _relative_key(key, root): {
+                    "hash": format(value, f"0{digits}x"),
+                    "signature": list(self._signatures.get(key, ()))
+                }
+                for key, value in sorted(self.hashes.items())
+            },
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=1)
+
+    @classmethod
+    def load(cls, path: Path) -> "ImageHashIndex":
+        """Read an index written by save() (relative image paths resolve against its directory)."""
+        with open(path) as f:
+            data = json.load(f)
+        root = Path(path).resolve().parent
+        index = cls(method=data["method"], hash_size=data["hash_size"])
+        for stored, entry in data["images"].items():
+            # Absolute paths (indexes saved before paths were relative) are kept as they are
+            key = index._key(root / stored)
+            index.hashes[key] = int(entry["hash"], 16)
+            if entry.get("signature"):
+                index._signatures[key] = tuple(entry["signature"])
+        return index
+
+
+def _relative_key(key: str, root: Path) -> str:
+    """Path of an index key relative to root (POSIX separators); absolute if on another drive."""
+    try:
+        return Path(os.path.relpath(key, root)).as_posix()
+    except ValueError:
+        return key
+
+
+def collapse_pairs(
+    pairs: List[Dict[str, Any]],
+    representatives: Dict[str, str]
+) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    Keep one pair per distinct (representative image1, representative image2).
+
+    Args:
+        pairs: Pair dicts with pair_id, image1_path and image2_path
+        representatives: Image -> representative map from ImageHashIndex.representatives()
+
+    Returns:
+        (unique pairs in input order, {duplicate pair_id: pair_id it collapses into})
+    """
+    def canonical(path: str) -> str:
+        key = str(Path(path).resolve())
+        return representatives.get(key, key)
+
+    first_by_images = {}
+    unique = []
+    duplicate_of = {}
+    for pair in pairs:
+        images = (canonical(pair["image1_path"]), canonical(pair["image2_path"]))
+        if images in first_by_images:
+            duplicate_of[pair["pair_id"]] = first_by_images[images]
+        else:
+            first_by_images[images] = pair["pair_id"]
+            unique.append(pair)
+    return unique, duplicate_of
@@ -0,0 +1,197 @@
+"""Downscaled / re-encoded / head-cropped variants of the dataset images.
+
+A variant is a crop (the full image, or the annotated head box with a
+margin), a maximum edge length and a JPEG quality. Variants are rendered
+once into a cache directory, keyed by the SHA-256 of the source bytes and
+the variant parameters, so re-running a sweep or pointing several runs at
+the same setting never re-encodes an image.
+"""
+import csv
+import hashlib
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from ..profiling import span
+from .manifest import DatasetManifest
+
+
+CROPS = ("full", "head")
+# Fraction of the head box added on each side, so scutes at the box edge stay visible
+HEAD_MARGIN = 0.15
+
+_SPEC = re.compile(r"^(?:(full|head):)?(orig|\d+)(?:q(\d+))?$")
+
+
+class ImageVariant:
+    """One image setting of a sweep: crop, maximum edge and JPEG quality."""
+
+    def __init__(self, max_edge: Optional[int] = None, quality: Optional[int] = None, crop: str = "full"):
+        """
+        Initialize variant.
+
+        Args:
+            max_edge: Longest edge in pixels after downscaling (None: original size)
+            quality: JPEG quality 1-95 (None: keep the original file when nothing else changes, else 95)
+            crop: "full" or "head" (the annotated head box)
+        """
+        if crop not in CROPS:
+            raise ValueError(f"Unknown crop: {crop} (available: {', '.join(CROPS)})")
+        if max_edge is not None and max_edge < 16:
+            raise ValueError(f"max_edge must be at least 16 pixels, got {max_edge}")
+        if quality is not None and not 1 <= quality <= 95:
+            raise ValueError(f"quality must be in [1, 95], got {quality}")
+        self.max_edge = max_edge
+        self.quality = quality
+        self.crop = crop
+
+    @classmethod
+    def parse(cls, spec: str) -> "ImageVariant":
+        """
+        Parse "[crop:]edge[qQUALITY]", e.g. "768q85", "head:512q70" or "orig".
+
+        Raises:
+            ValueError: If the spec is malformed
+        """
+        match = _SPEC.match(spec.strip())
+        if not match:
+            raise ValueError(f"Invalid image variant '{spec}' (expected e.g. 768q85, head:512q70 or orig)")
+        crop, edge, quality = match.groups()
+        return cls(
+            max_edge=None if edge == "orig" else int(edge),
+            quality=int(quality) if quality else None,
+            crop=crop or "full"
+        )
+
+    @property
+    def name(self) -> str:
+        edge = "orig" if self.max_edge is None else str(self.max_edge)
+        quality = f"q{self.quality}" if self.quality is not None else ""
+        return f"{self.crop}_{edge}{quality}"
+
+    @property
+    def is_original(self) -> bool:
+        """True if the variant is the unmodified source file."""
+        return self.crop == "full" and self.max_edge is None and self.quality is None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "crop": self.crop, "max_edge": self.max_edge, "quality": self.quality}
+
+    def __repr__(self) -> str:
+        return f"ImageVariant({self.name})"
+
+
+def load_head_boxes(path: Path) -> Dict[str, Tuple[float, float, float, float]]:
+    """
+    Head bounding boxes keyed by image file name.
+
+    Reads a CSV with "path" (or "file_name") and "bbox" columns, or a JSON
+    object {file name: box}; boxes are [x, y, width, height] in pixels.
+    """
+    path = Path(path)
+    boxes = {}
+    if path.suffix.lower() == ".json":
+        with open(path) as f:
+            for name, box in json.load(f).items():
+                boxes[Path(name).name] = tuple(float(v) for v in box)
+        return boxes
+
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            name = row.get("path") or row.get("file_name")
+            box = row.get("bbox")
+            if not name or not box:
+                continue
+            boxes[Path(name).name] = tuple(float(v) for v in json.loads(box))
+    return boxes
+
+
+class VariantCache:
+    """Renders image variants on demand into a content-addressed cache directory."""
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        head_boxes: Dict[str, Tuple[float, float, float, float]] = None,
+        manifest: DatasetManifest = None
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            cache_dir: Directory for rendered variants (one subdirectory per variant)
+            head_boxes: Head boxes by image file name, for "head" variants
+            manifest: Dataset manifest whose hashes are used instead of re-hashing source images
+        """
+        self.cache_dir = Path(cache_dir)
+        self.head_boxes = head_boxes or {}
+        self.manifest = manifest
+        self._digests: Dict[str, str] = {}
+
+    def digest(self, path: Path) -> str:
+        """SHA-256 of a file's bytes (memoized per path; from the manifest when it is current)."""
+        key = str(path)
+        if key not in self._digests:
+            digest = self.manifest.digest(path) if self.manifest is not None else None
+            self._digests[key] = digest or hashlib.sha256(path.read_bytes()).hexdigest()
+        return self._digests[key]
+
+    def path_for(self, image_path: Path, variant: ImageVariant) -> Optional[Path]:
+        """
+        Path of an image's variant, rendering it if it is not cached yet.
+
+        Returns:
+            The cached file (the source itself for the original variant), or
+            None for a head variant of an image without a head box
+        """
+        image_path = Path(image_path)
+        if variant.is_original:
+            return image_path
+        box = None
+        if variant.crop == "head":
+            box = self.head_boxes.get(image_path.name)
+            if box is None:
+                return None
+
+        target = self.cache_dir / variant.name / f"{self.digest(image_path)[:24]}.jpg"
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with span("image_render"):
+                with Image.open(image_path) as source:
+                    image = ImageOps.exif_transpose(source).convert("RGB")
+                if box is not None:
+                    image = image.crop(self._padded_box(box, image.size))
+                if variant.max_edge is not None and max(image.size) > variant.max_edge:
+                    image.thumbnail((variant.max_edge, variant.max_edge), Image.Resampling.LANCZOS)
+                # Write to a temporary name first so concurrent renders never expose a partial file
+                partial = target.with_suffix(".partial")
+                image.save(partial, format="JPEG", quality=variant.quality or 95)
+                partial.replace(target)
+        return target
+
+    @staticmethod
+    def _padded_box(box: Tuple[float, float, float, float], size: Tuple[int, int]) -> Tuple[int, int, int, int]:
+        x, y, w, h = box
+        pad_x, pad_y = w * HEAD_MARGIN, h * HEAD_MARGIN
+        return (
+            max(0, int(x - pad_x)),
+            max(0, int(y - pad_y)),
+            min(size[0], int(round(x + w + pad_x))),
+            min(size[1], int(round(y + h + pad_y))),
+        )
+
+    def render_all(
+        self,
+        image_paths: Iterable[Path],
+        variants: List[ImageVariant],
+        workers: int = 8
+    ) -> Dict[Tuple[str, str], Optional[Path]]:
+        """Render every (image, variant) up front in a thread pool; returns {(path, variant name): file}."""
+        jobs = [(Path(p), v) for p in dict.fromkeys(str(p) for p in image_paths) for v in variants]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            files = list(pool.map(lambda job: self.path_for(*job), jobs))
+        return {(str(path), variant.name): file for (path, variant), file in zip(jobs, files)}
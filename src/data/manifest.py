@@ -0,0 +1,182 @@
+"""Content-hashed manifest of the dataset files.
+
+The manifest records, for every dataset file (category CSVs and images),
+its size, mtime, SHA-256 and, for images, the pixel dimensions. Updating it
+only re-hashes files whose (mtime, size) changed, in a thread pool (hashlib
+releases the GIL on large buffers, and dimensions come from the image
+header), so a rebuild over an unchanged dataset is one stat per file.
+
+Derived files record the fingerprint of the inputs they were built from
+(fingerprint() over the content hashes), so create_pairs_metadata.py only
+regenerates pairs_metadata.json when a CSV or a referenced image changed.
+Other layers reuse the hashes instead of re-reading images: VariantCache
+keys rendered variants by them, ImageByteCache digests (cassette keys) can
+be primed from them, and pairs metadata carries them into result records.
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Iterable, Optional, Tuple, Union
+
+from PIL import Image
+
+from .image_hash import IMAGE_SUFFIXES
+
+
+_READ_CHUNK = 1024 * 1024
+
+
+def _describe(key: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    """Worker: path -> (path, entry, error)."""
+    try:
+        stat = os.stat(key)
+        digest = hashlib.sha256()
+        with open(key, "rb") as f:
+            for chunk in iter(lambda: f.read(_READ_CHUNK), b""):
+                digest.update(chunk)
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+        if Path(key).suffix.lower() in IMAGE_SUFFIXES:
+            with Image.open(key) as image:
+                entry["width"], entry["height"] = image.size
+        return key, entry, None
+    except (OSError, ValueError) as e:
+        return key, None, str(e)
+
+
+class DatasetManifest:
+    """Path -> size, mtime, SHA-256 (and image dimensions), updated incrementally."""
+
+    def __init__(self):
+        self.files: Dict[str, Dict[str, Any]] = {}
+        # Derived file name -> fingerprint of the inputs it was built from
+        self.outputs: Dict[str, str] = {}
+
+    @staticmethod
+    def _key(path: Union[str, Path]) -> str:
+        return str(Path(path).resolve())
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __contains__(self, path: Union[str, Path]) -> bool:
+        return self._key(path) in self.files
+
+    def get(self, path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+        """Entry of a file (None if not in the manifest)."""
+        return self.files.get(self._key(path))
+
+    def update(self, paths: Iterable[Union[str, Path]], workers: int = 8) -> Dict[str, Any]:
+        """
+        Add new files and re-hash changed ones; unchanged files only cost a stat.
+
+        Args:
+            paths: Files to cover
+            workers: Hashing threads
+
+        Returns:
+            Dict with counts of hashed, unchanged and missing files, plus
+            "missing" (paths that do not exist) and "failures" (path -> error)
+        """
+        jobs, missing = [], []
+        unchanged = 0
+        for path in paths:
+            key = self._key(path)
+            try:
+                stat = os.stat(key)
+            except FileNotFoundError:
+                missing.append(key)
+                continue
+            entry = self.files.get(key)
+            if entry is not None and (entry["mtime_ns"], entry["size"]) == (stat.st_mtime_ns, stat.st_size):
+                unchanged += 1
+                continue
+            jobs.append(key)
+
+        failures = {}
+        if jobs:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                for key, entry, error in pool.map(_describe, jobs):
+                    if error is not None:
+                        failures[key] = error
+                        self.files.pop(key, None)
+                    else:
+                        self.files[key] = entry
+        return {"hashed": len(jobs) - len(failures), "unchanged": unchanged, "missing": missing,
+                "failures": failures}
+
+    def update_directory(self, directory: Path, workers: int = 8) -> Dict[str, Any]:
+        """Cover every image under a directory (recursively); see update()."""
+        paths = sorted(p for p in Path(directory).rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES)
+        return self.update(paths, workers=workers)
+
+    def prune(self) -> int:
+        """Drop entries of files that no longer exist; returns how many."""
+        gone = [key for key in self.files if not os.path.exists(key)]
+        for key in gone:
+            del self.files[key]
+        return len(gone)
+
+    def digest(self, path: Union[str, Path]) -> Optional[str]:
+        """
+        SHA-256 of a file if its entry is current (same mtime and size), else None.
+
+        Callers fall back to hashing the file themselves on None.
+        """
+        key = self._key(path)
+        entry = self.files.get(key)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(key)
+        except FileNotFoundError:
+            return None
+        if (entry["mtime_ns"], entry["size"]) != (stat.st_mtime_ns, stat.st_size):
+            return None
+        return entry["sha256"]
+
+    def signatures(self) -> Dict[str, Tuple[Tuple[int, int], str]]:
+        """{path: ((mtime_ns, size), sha256)} for priming ImageByteCache digests."""
+        return {key: ((entry["mtime_ns"], entry["size"]), entry["sha256"]) for key, entry in self.files.items()}
+
+    def fingerprint(self, paths: Iterable[Union[str, Path]]) -> str:
+        """
+        Combined hash of the files' contents and paths (order-independent).
+
+        Paths missing from the manifest contribute "missing", so a file
+        appearing or disappearing changes the fingerprint.
+        """
+        digest = hashlib.sha256()
+        for key in sorted({self._key(path) for path in paths}):
+            entry = self.files.get(key)
+            digest.update(f"{key}\0{entry['sha256'] if entry else 'missing'}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"files": dict(sorted(self.files.items())), "outputs": self.outputs}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DatasetManifest":
+        manifest = cls()
+        manifest.files = dict(data.get("files", {}))
+        manifest.outputs = dict(data.get("outputs", {}))
+        return manifest
+
+    def save(self, path: Path):
+        """Write the manifest as JSON (via a temporary file, so readers never see a partial one)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(".partial")
+        with open(partial, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+        partial.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "DatasetManifest":
+        """Read a manifest written by save() (empty if the file does not exist)."""
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
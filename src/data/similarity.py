@@ -0,0 +1,323 @@
+"""Precomputed MegaDescriptor image x image similarity matrix.
+
+The matrix is computed once from image embeddings (cosine similarity, in row
+blocks so the full N x N product never has to fit in memory) and stored as a
+NumPy ``.npy`` file next to a JSON list of image ids. Loading memory-maps the
+file, so opening even a large matrix is instant and only the rows that are
+touched are read. float16 storage halves the size at ~1e-3 precision, which
+is well below the resolution the similarity buckets need.
+
+Image ids are file names (as in the dataset CSVs' ``path`` column), so
+lookups work with the paths in pairs_metadata.json.
+"""
+import json
+from pathlib import Path
+from typing import Dict, Any, List, Sequence, Tuple, Union
+
+import numpy as np
+
+
+MATRIX_FILE = "similarity.npy"
+IDS_FILE = "image_ids.json"
+
+# Same edges as the report's accuracy-by-similarity curves
+DEFAULT_BUCKETS = [0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
+
+
+def image_id(path: Union[str, Path]) -> str:
+    """Image id used by the matrix: the file name of an image path."""
+    return Path(path).name
+
+
+def load_embeddings(path: Path, ids_path: Path = None) -> Tuple[np.ndarray, List[str]]:
+    """
+    Load image embeddings from disk.
+
+    Args:
+        path: ``.npz`` with arrays "embeddings" (N x D) and "image_ids" (or "paths"),
+            or ``.npy`` with the N x D embeddings
+        ids_path: For ``.npy``: JSON list or text file (one per line) of image ids/paths
+
+    Returns:
+        (embeddings, image_ids)
+
+    Raises:
+        ValueError: If ids are missing or do not match the number of embeddings
+    """
+    path = Path(path)
+    if path.suffix == ".npz":
+        with np.load(path, allow_pickle=False) as data:
+            embeddings = data["embeddings"]
+            names = data["image_ids"] if "image_ids" in data else data["paths"]
+            ids = [image_id(str(name)) for name in names]
+    else:
+        if ids_path is None:
+            raise ValueError(f"Image ids file required for {path}")
+        embeddings = np.load(path, mmap_mode="r")
+        ids_path = Path(ids_path)
+        if ids_path.suffix == ".json":
+            with open(ids_path) as f:
+                names = json.load(f)
+        else:
+            names = [line.strip() for line in ids_path.read_text().splitlines() if line.strip()]
+        ids = [image_id(name) for name in names]
+
+    if embeddings.ndim != 2 or embeddings.shape[0] != len(ids):
+        raise ValueError(f"Expected {len(ids)} x D embeddings, got shape {embeddings.shape}")
+    return embeddings, ids
+
+
+class SimilarityMatrix:
+    """Dense symmetric similarity matrix with O(1) lookups by image id."""
+
+    def __init__(self, matrix: np.ndarray, image_ids: List[str]):
+        """
+        Wrap a similarity matrix.
+
+        Args:
+            matrix: N x N array (may be a read-only memmap)
+            image_ids: Image id of each row/column
+
+        Raises:
+            ValueError: If the shapes do not match or ids repeat
+        """
+        if matrix.ndim != 2 or matrix.shape[0] != matrix.shape[1] or matrix.shape[0] != len(image_ids):
+            raise ValueError(f"Matrix of shape {matrix.shape} does not match {len(image_ids)} image ids")
+        self.matrix = matrix
+        self.image_ids = list(image_ids)
+        self._index = {name: i for i, name in enumerate(self.image_ids)}
+        if len(self._index) != len(self.image_ids):
+            raise ValueError("Duplicate image ids")
+
+    def __len__(self) -> int:
+        return len(self.image_ids)
+
+    def __contains__(self, image: Union[str, Path]) -> bool:
+        return image_id(image) in self._index
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.matrix.dtype
+
+    @classmethod
+    def from_embeddings(
+        cls,
+        embeddings: np.ndarray,
+        image_ids: List[str],
+        dtype: Union[str, np.dtype] = np.float32,
+        output_dir: Path = None,
+        block_size: int = 2048
+    ) -> "SimilarityMatrix":
+        """
+        Compute the cosine similarity matrix of embeddings.
+
+        Args:
+            embeddings: N x D array (rows are L2-normalized here)
+            image_ids: Image id (or path) of each row
+            dtype: Storage dtype, e.g. float16 to halve the size
+            output_dir: If given, the matrix is written straight into
+                output_dir/similarity.npy (memory-mapped) together with the ids,
+                so N x N never has to fit in memory
+            block_size: Rows computed per matrix product
+
+        Returns:
+            The similarity matrix (memory-mapped when output_dir is given)
+        """
+        image_ids = [image_id(name) for name in image_ids]
+        n = len(image_ids)
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        unit = embeddings / np.where(norms > 0, norms, 1.0)
+
+        if output_dir is not None:
+            output_dir = Path(output_dir)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            matrix = np.lib.format.open_memmap(
+                output_dir / MATRIX_FILE, mode="w+", dtype=np.dtype(dtype), shape=(n, n)
+            )
+        else:
+            matrix = np.empty((n, n), dtype=np.dtype(dtype))
+
+        for start in range(0, n, block_size):
+            stop = min(start + block_size, n)
+            block = unit[start:stop] @ unit.T
+            np.clip(block, -1.0, 1.0, out=block)
+            matrix[start:stop] = block
+
+        if output_dir is not None:
+            matrix.flush()
+            with open(output_dir / IDS_FILE, "w") as f:
+                json.dump(image_ids, f)
+            del matrix
+            return cls.load(output_dir)
+        return cls(matrix, image_ids)
+
+    def save(self, output_dir: Path):
+        """Write similarity.npy and image_ids.json to output_dir."""
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        np.save(output_dir / MATRIX_FILE, np.asarray(self.matrix))
+        with open(output_dir / IDS_FILE, "w") as f:
+            json.dump(self.image_ids, f)
+
+    @classmethod
+    def load(cls, directory: Path, mmap: bool = True) -> "SimilarityMatrix":
+        """
+        Load a stored matrix.
+
+        Args:
+            directory: Directory with similarity.npy and image_ids.json
+            mmap: Memory-map the matrix read-only instead of reading it into memory
+        """
+        directory = Path(directory)
+        matrix = np.load(directory / MATRIX_FILE, mmap_mode="r" if mmap else None)
+        with open(directory / IDS_FILE) as f:
+            image_ids = json.load(f)
+        return cls(matrix, image_ids)
+
+    def index(self, images: Union[str, Path, Sequence[Union[str, Path]]]) -> Union[int, np.ndarray]:
+        """
+        Row index of one image id/path, or an index array for a sequence of them.
+
+        Raises:
+            KeyError: If an image is not in the matrix
+        """
+        if isinstance(images, (str, Path)):
+            return self._index[image_id(images)]
+        return np.fromiter((self._index[image_id(name)] for name in images), dtype=np.intp)
+
+    def similarity(self, image_a: Union[str, Path], image_b: Union[str, Path]) -> float:
+        """Similarity of two images (O(1))."""
+        return float(self.matrix[self.index(image_a), self.index(image_b)])
+
+    def pair_similarities(
+        self,
+        images_a: Sequence[Union[str, Path]],
+        images_b: Sequence[Union[str, Path]]
+    ) -> np.ndarray:
+        """Similarities of aligned pairs (images_a[i], images_b[i]) as float32."""
+        rows = self.index(images_a)
+        cols = self.index(images_b)
+        return np.asarray(self.matrix[rows, cols], dtype=np.float32)
+
+    def top_k(
+        self,
+        images: Sequence[Union[str, Path]],
+        k: int = 10,
+        exclude_self: bool = True,
+        candidates: Sequence[Union[str, Path]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Most similar images for each query image.
+
+        Args:
+            images: Query images
+            k: Neighbours per query
+            exclude_self: Skip the query image itself
+            candidates: Restrict neighbours to these images (default: all)
+
+        Returns:
+            (neighbour_indices, scores), both len(images) x k, sorted by
+            decreasing similarity; map indices back with image_ids
+        """
+        rows = self.index(images)
+        columns = self.index(candidates) if candidates is not None else None
+        block = np.asarray(self.matrix[rows] if columns is None else self.matrix[np.ix_(rows, columns)],
+                           dtype=np.float32)
+        if exclude_self:
+            if columns is None:
+                block[np.arange(len(rows)), rows] = -np.inf
+            else:
+                block[rows[:, None] == columns[None, :]] = -np.inf
+
+        k = min(k, block.shape[1])
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        scores = np.take_along_axis(scores, order, axis=1)
+        if columns is not None:
+            top = columns[top]
+        return top, scores
+
+    def sample_by_bucket(
+        self,
+        per_bucket: int,
+        buckets: List[float] = None,
+        seed: int = 0,
+        block_size: int = 1024,
+        images: Sequence[Union[str, Path]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Sample distinct image pairs uniformly within each similarity bucket.
+
+        The upper triangle is scanned in row blocks; every pair in a bucket
+        gets a random priority and the per_bucket lowest priorities are kept
+        (bottom-k sampling), which is a uniform sample without replacement
+        even for rare high-similarity buckets.
+
+        Args:
+            per_bucket: Pairs wanted per bucket (fewer if the bucket is smaller)
+            buckets: Bucket edges (default: DEFAULT_BUCKETS); bucket i is [edges[i], edges[i+1]),
+                pairs outside all buckets are ignored
+            seed: Random seed
+            block_size: Rows scanned at a time
+            images: Restrict sampling to these images (default: all)
+
+        Returns:
+            List of dicts with keys: image1, image2, similarity, bucket (lower edge)
+        """
+        edges = np.asarray(buckets or DEFAULT_BUCKETS, dtype=np.float64)
+        n_buckets = len(edges) - 1
+        rng = np.random.default_rng(seed)
+        subset = self.index(images) if images is not None else np.arange(len(self))
+
+        kept = [(np.empty(0), np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp), np.empty(0))
+                for _ in range(n_buckets)]
+        for start in range(0, len(subset), block_size):
+            rows = subset[start:start + block_size]
+            block = np.asarray(self.matrix[np.ix_(rows, subset)], dtype=np.float32)
+            # Upper triangle only, so each unordered pair is seen once
+            local_rows, local_cols = np.nonzero(
+                np.arange(start, start + len(rows))[:, None] < np.arange(len(subset))[None, :]
+            )
+            values = block[local_rows, local_cols]
+            bucket_of = np.searchsorted(edges, values, side="right") - 1
+            # The top edge is inclusive
+            bucket_of[values == edges[-1]] = n_buckets - 1
+            for b in range(n_buckets):
+                in_bucket = bucket_of == b
+                if not in_bucket.any():
+                    continue
+                priority = np.concatenate([kept[b][0], rng.random(np.count_nonzero(in_bucket))])
+                first = np.concatenate([kept[b][1], rows[local_rows[in_bucket]]])
+                second = np.concatenate([kept[b][2], subset[local_cols[in_bucket]]])
+                sims = np.concatenate([kept[b][3], values[in_bucket]])
+                if len(priority) > per_bucket:
+                    keep = np.argpartition(priority, per_bucket - 1)[:per_bucket]
+                    priority, first, second, sims = priority[keep], first[keep], second[keep], sims[keep]
+                kept[b] = (priority, first, second, sims)
+
+        samples = []
+        for b, (priority, first, second, sims) in enumerate(kept):
+            for i in np.argsort(priority):
+                samples.append({
+                    "image1": self.image_ids[first[i]],
+                    "image2": self.image_ids[second[i]],
+                    "similarity": float(sims[i]),
+                    "bucket": float(edges[b]),
+                })
+        return samples
+
+    def bucket_counts(self, buckets: List[float] = None, block_size: int = 1024) -> Dict[float, int]:
+        """Number of distinct image pairs per similarity bucket (keyed by lower edge)."""
+        edges = np.asarray(buckets or DEFAULT_BUCKETS, dtype=np.float64)
+        counts = np.zeros(len(edges) - 1, dtype=np.int64)
+        n = len(self)
+        for start in range(0, n, block_size):
+            stop = min(start + block_size, n)
+            block = np.asarray(self.matrix[start:stop], dtype=np.float32)
+            upper = np.arange(start, stop)[:, None] < np.arange(n)[None, :]
+            hist, _ = np.histogram(block[upper], bins=edges)
+            counts += hist
+        return {float(edge): int(count) for edge, count in zip(edges[:-1], counts)}
@@ -1,4 +1,6 @@
 from .runner import ExperimentRunner
 from .prompt_builder import PromptBuilder
+from .prompt_registry import PromptRegistry, PromptTemplate
+from .pair_planner import PairPlanner, IdentityGraph
 
-__all__ = ['ExperimentRunner', 'PromptBuilder']
+__all__ = ['ExperimentRunner', 'PromptBuilder', 'PromptRegistry', 'PromptTemplate', 'PairPlanner', 'IdentityGraph']
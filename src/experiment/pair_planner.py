@@ -0,0 +1,298 @@
+"""Pair planning: canonical pair order and transitive identity inference.
+
+Two observations let a run skip queries whose answer is already known:
+
+- Order does not matter: (A, B) and (B, A) ask the same question, so each
+  unordered pair is queried once per prompt and the swapped cell reuses the
+  answer.
+- Identity is transitive: confident "same" answers for A-B and B-C imply
+  A-C, and a confident "different" between any members of two groups
+  implies "different" for every pair across them.
+
+IdentityGraph keeps the "same" evidence in a union-find structure (one set
+per individual) and the "different" evidence as edges between sets. A new
+confident answer that disagrees with what the graph already implies is a
+contradiction: it is not merged, and the cell is flagged for a re-query.
+Implied cells are not all skipped: a deterministic sample of them
+(verify_rate) is still queried as a check, which is where contradictions
+surface.
+
+When clustering a whole gallery, most of the N^2 pairs end up implied once
+the first few confident answers per individual are in, so ordering cells by
+descending MegaDescriptor similarity (likely "same" first) keeps the number
+of LLM calls far below the number of pairs.
+"""
+import hashlib
+from collections import deque
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+from ..analysis.results import extract_certainty, extract_decision, decision_to_prediction
+
+
+CERTAINTY_LEVELS = {"high": 3, "medium": 2, "low": 1, "unknown": 0}
+
+
+def image_key(path: Union[str, Path]) -> str:
+    """Identity of an image in the graph (its resolved path)."""
+    return str(Path(path).resolve())
+
+
+def canonical_pair(image1: Union[str, Path], image2: Union[str, Path]) -> Tuple[str, str]:
+    """Order-independent key of an image pair."""
+    a, b = image_key(image1), image_key(image2)
+    return (a, b) if a <= b else (b, a)
+
+
+def confident_decision(
+    result: Dict[str, Any],
+    min_certainty: str = "high",
+    min_vote_confidence: float = 0.75
+) -> Optional[str]:
+    """
+    "same" / "different" if a result is confident enough to build on, else None.
+
+    Voted results are confident when the vote confidence reaches
+    min_vote_confidence; single answers when their stated certainty reaches
+    min_certainty (naive prompts state none, so they only count with
+    min_certainty="any").
+    """
+    if "error" in result or result.get("outcome", "answered") != "answered":
+        return None
+    if "vote" in result:
+        if result["vote"]["confidence"] < min_vote_confidence:
+            return None
+        prediction = decision_to_prediction(result["vote"]["decision"])
+    else:
+        if min_certainty != "any":
+            certainty = extract_certainty(result["llm_response"])
+            if CERTAINTY_LEVELS[certainty] < CERTAINTY_LEVELS[min_certainty]:
+                return None
+        prediction = decision_to_prediction(extract_decision(result["llm_response"], result["prompt_type"]))
+    return prediction if prediction in ("same", "different") else None
+
+
+class IdentityGraph:
+    """Union-find over images from confident "same" answers, plus "different" edges between sets."""
+
+    def __init__(self):
+        self._parent: Dict[str, str] = {}
+        self._size: Dict[str, int] = {}
+        # Root -> {other root: pair_id of a "different" answer between the two sets}
+        self._different: Dict[str, Dict[str, str]] = {}
+        # Spanning forest of the "same" answers, to explain inferences: image -> [(image, pair_id)]
+        self._same_edges: Dict[str, List[Tuple[str, str]]] = {}
+
+    def _find(self, image: str) -> str:
+        if image not in self._parent:
+            self._parent[image] = image
+            self._size[image] = 1
+            return image
+        root = image
+        while self._parent[root] != root:
+            root = self._parent[root]
+        # Path compression
+        while self._parent[image] != root:
+            self._parent[image], image = root, self._parent[image]
+        return root
+
+    def implied(self, image1: str, image2: str) -> Optional[Tuple[str, List[str]]]:
+        """
+        Decision implied by earlier answers, with the pair ids it follows from.
+
+        Returns:
+            ("same" | "different", [pair_id, ...]) or None if nothing is implied
+        """
+        a, b = image_key(image1), image_key(image2)
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a == root_b:
+            return "same", self._same_path(a, b)
+        pair_id = self._different.get(root_a, {}).get(root_b)
+        if pair_id is not None:
+            return "different", [pair_id]
+        return None
+
+    def _same_path(self, a: str, b: str) -> List[str]:
+        """Pair ids along the chain of "same" answers linking two images."""
+        if a == b:
+            return []
+        previous = {a: None}
+        queue = deque([a])
+        while queue:
+            current = queue.popleft()
+            if current == b:
+                break
+            for neighbour, pair_id in self._same_edges.get(current, []):
+                if neighbour not in previous:
+                    previous[neighbour] = (current, pair_id)
+                    queue.append(neighbour)
+        path = []
+        node = b
+        while previous.get(node) is not None:
+            node, pair_id = previous[node]
+            path.append(pair_id)
+        return path[::-1]
+
+    def add(self, image1: str, image2: str, decision: str, pair_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Add a confident answer.
+
+        Returns:
+            None if the answer is consistent with the graph (it is merged), or a
+            conflict dict with the implied decision and its evidence (not merged)
+        """
+        implied = self.implied(image1, image2)
+        if implied is not None:
+            if implied[0] != decision:
+                return {"pair_id": pair_id, "decision": decision, "implied": implied[0], "evidence": implied[1]}
+            return None
+
+        a, b = image_key(image1), image_key(image2)
+        root_a, root_b = self._find(a), self._find(b)
+        if decision == "different":
+            self._different.setdefault(root_a, {})[root_b] = pair_id
+            self._different.setdefault(root_b, {})[root_a] = pair_id
+            return None
+
+        # Union by size; the surviving root inherits the other's "different" edges
+        if self._size[root_a] < self._size[root_b]:
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        self._size[root_a] += self._size[root_b]
+        for other, evidence in self._different.pop(root_b, {}).items():
+            edges = self._different[other]
+            del edges[root_b]
+            edges.setdefault(root_a, evidence)
+            self._different.setdefault(root_a, {}).setdefault(other, evidence)
+        self._same_edges.setdefault(a, []).append((b, pair_id))
+        self._same_edges.setdefault(b, []).append((a, pair_id))
+        return None
+
+    def groups(self) -> List[List[str]]:
+        """Sets of images known to be the same individual (singletons omitted)."""
+        members: Dict[str, List[str]] = {}
+        for image in self._parent:
+            members.setdefault(self._find(image), []).append(image)
+        return sorted(sorted(group) for group in members.values() if len(group) > 1)
+
+
+class PairPlanner:
+    """Decides per cell whether to query, reuse a swapped pair's answer, or infer the answer."""
+
+    def __init__(
+        self,
+        min_certainty: str = "high",
+        min_vote_confidence: float = 0.75,
+        verify_rate: float = 0.1,
+        verify_seed: int = 0
+    ):
+        """
+        Initialize the planner.
+
+        Args:
+            min_certainty: Lowest stated certainty ("high", "medium", "low" or
+                "any") for an answer to enter the identity graph
+            min_vote_confidence: Lowest vote confidence for voted answers
+            verify_rate: Fraction of implied cells queried anyway to catch contradictions
+            verify_seed: Seed of the verification sample (a stable hash of the pair id)
+        """
+        if min_certainty != "any" and min_certainty not in CERTAINTY_LEVELS:
+            raise ValueError(f"Unknown certainty level: {min_certainty}")
+        if not 0.0 <= verify_rate <= 1.0:
+            raise ValueError(f"verify_rate must be in [0, 1], got {verify_rate}")
+        self.min_certainty = min_certainty
+        self.min_vote_confidence = min_vote_confidence
+        self.verify_rate = verify_rate
+        self.verify_seed = verify_seed
+        # One graph and answer cache per prompt type, so prompts are never scored on each other's answers
+        self._graphs: Dict[str, IdentityGraph] = {}
+        # (prompt type, canonical pair) -> first result; kept across runs like the graphs
+        self._answered: Dict[Tuple[str, Tuple[str, str]], Dict[str, Any]] = {}
+        self.conflicts: List[Dict[str, Any]] = []
+
+    def graph(self, prompt_type: str) -> IdentityGraph:
+        """Identity graph built from one prompt type's answers."""
+        return self._graphs.setdefault(prompt_type, IdentityGraph())
+
+    @staticmethod
+    def order(cells: List[Tuple[Dict[str, Any], str]]) -> List[Tuple[Dict[str, Any], str]]:
+        """Cells by descending MegaDescriptor similarity (likely "same" first), where known."""
+        def similarity(cell):
+            value = cell[0].get("md_similarity")
+            return -value if value is not None else 0.0
+        return sorted(cells, key=similarity)
+
+    def is_verified(self, pair_id: str) -> bool:
+        """Whether an implied cell is sampled for a verification query (deterministic per pair)."""
+        if self.verify_rate <= 0:
+            return False
+        digest = hashlib.sha1(f"{self.verify_seed}:{pair_id}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") / 2 ** 64 < self.verify_rate
+
+    def plan(self, pair_info: Dict[str, Any], prompt_type: str) -> Dict[str, Any]:
+        """
+        Plan one cell.
+
+        Returns:
+            {"action": "query"}, {"action": "reuse", "pair_id": ..., "result": ...}
+            for a swapped or repeated pair (the earlier pair and its result), or, when the identity graph implies the
+            answer, {"action": "infer" | "verify", "predicted": ...,
+            "evidence": [...]} ("verify": query anyway as a check)
+        """
+        key = (prompt_type, canonical_pair(pair_info["image1_path"], pair_info["image2_path"]))
+        if key in self._answered:
+            answered = self._answered[key]
+            return {"action": "reuse", "pair_id": answered["pair_id"], "result": answered}
+        implied = self.graph(prompt_type).implied(pair_info["image1_path"], pair_info["image2_path"])
+        if implied is not None:
+            action = "verify" if self.is_verified(pair_info["pair_id"]) else "infer"
+            return {"action": action, "predicted": implied[0], "evidence": implied[1]}
+        return {"action": "query"}
+
+    def observe(self, pair_info: Dict[str, Any], result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Record a queried cell's result.
+
+        Returns:
+            Conflict dict if the answer is confident and contradicts the graph, else None
+        """
+        if "error" in result:
+            return None
+        prompt_type = result["prompt_type"]
+        key = (prompt_type, canonical_pair(pair_info["image1_path"], pair_info["image2_path"]))
+        self._answered.setdefault(key, result)
+
+        decision = confident_decision(result, self.min_certainty, self.min_vote_confidence)
+        if decision is None:
+            return None
+        conflict = self.graph(prompt_type).add(
+            pair_info["image1_path"], pair_info["image2_path"], decision, result["pair_id"]
+        )
+        if conflict is not None:
+            conflict["prompt_type"] = prompt_type
+            self.conflicts.append(conflict)
+        return conflict
+
+    def replace(self, pair_info: Dict[str, Any], result: Dict[str, Any]):
+        """
+        Replace a cell's answer with a re-query's result.
+
+        The prompt type's identity graph is rebuilt from the current answers,
+        so nothing implied by the replaced answer survives. A failed re-query
+        drops the cell's answer, and the next matching cell is queried again.
+        """
+        prompt_type = result["prompt_type"]
+        key = (prompt_type, canonical_pair(pair_info["image1_path"], pair_info["image2_path"]))
+        if "error" in result:
+            self._answered.pop(key, None)
+        else:
+            self._answered[key] = result
+
+        graph = IdentityGraph()
+        for (prompt, (image1, image2)), answer in self._answered.items():
+            if prompt != prompt_type:
+                continue
+            decision = confident_decision(answer, self.min_certainty, self.min_vote_confidence)
+            if decision is not None:
+                graph.add(image1, image2, decision, answer["pair_id"])
+        self._graphs[prompt_type] = graph
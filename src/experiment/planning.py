@@ -0,0 +1,249 @@
+"""Dry-run forecast of a run: requests, tokens, cost and wall time.
+
+Everything is estimated without calling an API. Requests are the cells that
+remain after the run's skips (replayed from a cassette, already done in the
+queue, decided by the cascade, collapsed as near-duplicates or swapped
+repeats). Input tokens per request come from:
+
+- text: the rendered prompt length, computed from the compiled template
+  (literal characters plus the per-pair metadata lengths) at about four
+  characters per token, without rendering every cell;
+- images: each provider's published image-token rule, applied to the image
+  dimensions read from the file headers (Gemini: 258 tokens per 768x768
+  tile, or 258 for images up to 384 px; Claude: width * height / 750 after
+  downscaling to 1568 px / 1.15 MP; OpenAI high detail: 85 + 170 per 512 px
+  tile after fitting 2048 px and a 768 px short side).
+
+Output tokens and latency come from earlier results when available.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .prompt_builder import PromptBuilder
+
+
+CHARS_PER_TOKEN = 4.0
+# Used only when there are no earlier results to measure from
+DEFAULT_OUTPUT_TOKENS = 500.0
+DEFAULT_LATENCY_SECONDS = 6.0
+
+
+def image_tokens(provider: str, width, height) -> np.ndarray:
+    """
+    Input tokens per image under a provider's image-token rule.
+
+    Args:
+        provider: "gemini", "claude" or "openai" (anything else: 0, e.g. mock)
+        width, height: Image dimensions in pixels (arrays)
+
+    Returns:
+        Token counts as an int array (0 where a dimension is 0, i.e. unreadable)
+    """
+    w = np.asarray(width, dtype=float)
+    h = np.asarray(height, dtype=float)
+    readable = (w > 0) & (h > 0)
+    w = np.where(readable, w, 1.0)
+    h = np.where(readable, h, 1.0)
+
+    if provider == "gemini":
+        tiles = np.ceil(w / 768) * np.ceil(h / 768)
+        tokens = np.where((w <= 384) & (h <= 384), 258, 258 * tiles)
+    elif provider == "claude":
+        scale = np.minimum.reduce([np.ones_like(w), 1568 / np.maximum(w, h), np.sqrt(1_150_000 / (w * h))])
+        tokens = np.ceil((w * scale) * (h * scale) / 750)
+    elif provider == "openai":
+        fit = np.minimum(1.0, 2048 / np.maximum(w, h))
+        w, h = w * fit, h * fit
+        short = np.minimum(1.0, 768 / np.minimum(w, h))
+        w, h = w * short, h * short
+        tokens = 85 + 170 * np.ceil(w / 512) * np.ceil(h / 512)
+    else:
+        tokens = np.zeros_like(w)
+    return np.where(readable, tokens, 0).astype(np.int64)
+
+
+def image_dimensions(paths: List[str], workers: int = 16) -> Dict[str, Tuple[int, int]]:
+    """(width, height) of each image from its header ((0, 0) if it cannot be read)."""
+    def size(path: str) -> Tuple[int, int]:
+        try:
+            with Image.open(path) as image:
+                return image.size
+        except (OSError, ValueError):
+            return (0, 0)
+
+    unique = list(dict.fromkeys(str(p) for p in paths))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(unique, pool.map(size, unique)))
+
+
+def prompt_chars(
+    prompt_builder: PromptBuilder,
+    prompt_type: str,
+    metadata: List[Optional[Dict[str, Any]]]
+) -> np.ndarray:
+    """
+    Rendered prompt length per cell, from the compiled template.
+
+    Equal to len(build_prompt(prompt_type, m)) for placeholders without format
+    specs (the repo's templates), without rendering each prompt.
+    """
+    template = prompt_builder.registry.get(prompt_type)
+    literal = sum(len(segment) for segment in template.segments if isinstance(segment, str))
+    lengths = np.full(len(metadata), literal, dtype=np.int64)
+    for field in set(template.fields):
+        occurrences = template.fields.count(field)
+        lengths += occurrences * np.fromiter(
+            (len(str((m or {}).get(field, ""))) for m in metadata), dtype=np.int64, count=len(metadata)
+        )
+    return lengths
+
+
+def history_stats(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Mean output tokens (per prompt type) and latency of earlier answered results.
+
+    Voted results are skipped, since their usage and latency cover several samples.
+    """
+    completion = {}
+    latencies = []
+    for result in results:
+        if "error" in result or result.get("outcome", "answered") != "answered" or "vote" in result:
+            continue
+        tokens = (result.get("token_usage") or {}).get("completion_tokens")
+        if tokens:
+            completion.setdefault(result.get("prompt_type"), []).append(tokens)
+        if result.get("latency_seconds") is not None:
+            latencies.append(result["latency_seconds"])
+    return {
+        "output_tokens": {prompt: float(np.mean(values)) for prompt, values in completion.items()},
+        "latency_seconds": float(np.median(latencies)) if latencies else None,
+        "results": len(results),
+    }
+
+
+def estimate_wall_seconds(
+    requests: int,
+    latency_seconds: float,
+    concurrency: int = 1,
+    request_delay: float = 0.0,
+    requests_per_minute: Optional[float] = None
+) -> float:
+    """
+    Wall time of a run: the slower of the concurrency bound and the rate-limit bound.
+
+    Args:
+        requests: Requests (voted cells) to send
+        latency_seconds: Typical latency per request (all waves of a voted cell)
+        concurrency: Workers sending at once
+        request_delay: Pause after each request per worker
+        requests_per_minute: Quota in requests (voted cells) per minute across all keys (None: unlimited)
+    """
+    if requests <= 0:
+        return 0.0
+    seconds = requests * (latency_seconds + request_delay) / max(1, concurrency)
+    if requests_per_minute:
+        seconds = max(seconds, requests / requests_per_minute * 60.0)
+    return seconds
+
+
+def forecast(
+    cells: List[Tuple[Dict[str, Any], str]],
+    skipped: Dict[str, np.ndarray],
+    provider: str,
+    prompt_builder: PromptBuilder,
+    history: Dict[str, Any] = None,
+    vote_samples: int = 1,
+    concurrency: int = 1,
+    request_delay: float = 0.0,
+    requests_per_minute: Optional[float] = None,
+    price_input: Optional[float] = None,
+    price_output: Optional[float] = None,
+    composite_size: Optional[Tuple[int, int]] = None
+) -> Dict[str, Any]:
+    """
+    Forecast a run over a list of cells.
+
+    Args:
+        cells: (pair_info, prompt_type) tuples of the work matrix
+        skipped: Reason -> boolean array over cells that will not be sent
+            (the first reason that applies is the one counted)
+        provider: Provider whose image-token rule applies
+        prompt_builder: Builder of the run's prompts
+        history: history_stats() of earlier results (for output tokens and latency)
+        vote_samples: Samples per cell with self-consistency voting (upper bound;
+            the lower bound is the majority)
+        concurrency: Workers running at once
+        request_delay: Runner pause after each request
+        requests_per_minute: Total request quota (all keys)
+        price_input, price_output: Price per million input / output tokens
+        composite_size: (width, height) of the side-by-side composite sent
+            instead of the two images (see data.composite)
+
+    Returns:
+        Dict with cell and request counts, skip counts, token totals, per-request
+        means, wall-time estimate and (if priced) cost
+    """
+    history = history or {"output_tokens": {}, "latency_seconds": None}
+    n = len(cells)
+    send = np.ones(n, dtype=bool)
+    skip_counts = {}
+    for reason, mask in skipped.items():
+        mask = np.asarray(mask, dtype=bool)
+        skip_counts[reason] = int((send & mask).sum())
+        send &= ~mask
+
+    prompt_types = np.array([prompt for _, prompt in cells], dtype=object)
+    input_tokens = np.zeros(n, dtype=np.int64)
+    output_tokens = np.zeros(n, dtype=float)
+
+    if composite_size is not None:
+        input_tokens += int(image_tokens(provider, [composite_size[0]], [composite_size[1]])[0])
+        unreadable = 0
+    else:
+        dims = image_dimensions([p for pair, _ in cells for p in (pair["image1_path"], pair["image2_path"])])
+        for key in ("image1_path", "image2_path"):
+            sizes = np.array([dims[str(pair[key])] for pair, _ in cells], dtype=np.int64).reshape(n, 2)
+            input_tokens += image_tokens(provider, sizes[:, 0], sizes[:, 1])
+        unreadable = sum(1 for size in dims.values() if size == (0, 0))
+
+    for prompt_type in dict.fromkeys(prompt_types):
+        rows = prompt_types == prompt_type
+        metadata = [pair.get("metadata") for (pair, _), row in zip(cells, rows) if row]
+        chars = prompt_chars(prompt_builder, prompt_type, metadata)
+        input_tokens[rows] += np.ceil(chars / CHARS_PER_TOKEN).astype(np.int64)
+        output_tokens[rows] = history["output_tokens"].get(prompt_type, DEFAULT_OUTPUT_TOKENS)
+
+    samples_max = vote_samples
+    samples_min = vote_samples // 2 + 1 if vote_samples > 1 else 1
+    cells_sent = int(send.sum())
+    latency = history.get("latency_seconds") or DEFAULT_LATENCY_SECONDS
+    # Vote samples run in parallel waves: usually two waves per cell, not one per sample
+    waves = 2 if vote_samples > 1 else 1
+    wall = estimate_wall_seconds(
+        cells_sent, latency * waves, concurrency=concurrency, request_delay=request_delay,
+        requests_per_minute=requests_per_minute / samples_max if requests_per_minute else None
+    )
+
+    total_input = int(input_tokens[send].sum()) * samples_max
+    total_output = float(output_tokens[send].sum()) * samples_max
+    plan = {
+        "cells": n,
+        "skipped": skip_counts,
+        "cells_to_send": cells_sent,
+        "requests": {"min": cells_sent * samples_min, "max": cells_sent * samples_max},
+        "input_tokens": total_input,
+        "output_tokens": int(round(total_output)),
+        "mean_input_tokens": float(input_tokens[send].mean()) if cells_sent else 0.0,
+        "mean_output_tokens": float(output_tokens[send].mean()) if cells_sent else 0.0,
+        "output_tokens_measured": bool(history["output_tokens"]),
+        "latency_seconds": latency,
+        "latency_measured": history.get("latency_seconds") is not None,
+        "wall_seconds": wall,
+        "unreadable_images": unreadable,
+    }
+    if price_input is not None and price_output is not None:
+        plan["cost"] = (total_input * price_input + total_output * price_output) / 1e6
+    return plan
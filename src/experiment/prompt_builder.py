@@ -2,31 +2,26 @@
 from pathlib import Path
 from typing import Dict, Any
 
+from .prompt_registry import PromptRegistry
+
 
 class PromptBuilder:
     """Build prompts from templates with metadata."""
 
-    def __init__(self, prompts_dir: Path = None):
+    def __init__(self, prompts_dir: Path = None, registry: PromptRegistry = None):
         """
         Initialize prompt builder.
 
         Args:
             prompts_dir: Directory containing prompt templates (default: project_root/prompts)
+            registry: PromptRegistry to use (creates one for prompts_dir if None)
         """
-        if prompts_dir is None:
-            prompts_dir = Path(__file__).parent.parent.parent / "prompts"
-        self.prompts_dir = Path(prompts_dir)
-
-        # Load templates
-        self.naive_template = self._load_template("naive_prompt.txt")
-        self.expert_template = self._load_template("expert_prompt.txt")
+        self.registry = registry or PromptRegistry(prompts_dir)
+        self.prompts_dir = self.registry.prompts_dir
 
-    def _load_template(self, filename: str) -> str:
-        """Load a prompt template from file."""
-        path = self.prompts_dir / filename
-        if not path.exists():
-            raise FileNotFoundError(f"Prompt template not found: {path}")
-        return path.read_text()
+        # Fail early if the default templates are missing
+        self.naive_template = self.registry.get("naive").text
+        self.expert_template = self.registry.get("expert").text
 
     def build_naive_prompt(self) -> str:
         """
@@ -35,9 +30,33 @@ class PromptBuilder:
         Returns:
             The naive prompt text
         """
-        return self.naive_template
+        return self.registry.get("naive").render()
+
+    def build_prompt(self, prompt_type: str, metadata: Dict[str, Any] = None) -> str:
+        """
+        Build a prompt by type name.
+
+        Args:
+            prompt_type: Any template name in the registry, e.g. "naive",
+                "expert" or "expert_v2" (loaded from expert_prompt_v2.txt)
+            metadata: Metadata for templates with placeholders (see build_expert_prompt)
+
+        Returns:
+            The prompt text
+        """
+        if prompt_type not in self.registry.names():
+            raise ValueError(f"Invalid prompt_type: {prompt_type} (available: {', '.join(self.registry.names())})")
+
+        template = self.registry.get(prompt_type)
+        if template.fields and metadata is None:
+            raise ValueError(f"Metadata required for {prompt_type} prompt")
+        return template.render(metadata)
+
+    def prompt_version(self, prompt_type: str) -> str:
+        """Content-hash version id of the template behind a prompt type."""
+        return self.registry.version(prompt_type)
 
-    def build_expert_prompt(self, metadata: Dict[str, Any]) -> str:
+    def build_expert_prompt(self, metadata: Dict[str, Any], version: str = None) -> str:
         """
         Build the expert prompt with metadata injection.
 
@@ -47,6 +66,7 @@ class PromptBuilder:
                 - date1: str (e.g., "2019-06-15")
                 - date2: str (e.g., "2020-07-20")
                 - orientation: str (e.g., "both left profile" or "left and right profile")
+            version: Expert prompt variant (e.g., "v2" for expert_prompt_v2.txt), None for the default
 
         Returns:
             The customized expert prompt
@@ -56,4 +76,5 @@ class PromptBuilder:
         if missing:
             raise ValueError(f"Missing required metadata keys: {missing}")
 
-        return self.expert_template.format(**metadata)
+        name = "expert" if version is None else f"expert_{version}"
+        return self.registry.get(name).render(metadata)
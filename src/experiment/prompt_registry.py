@@ -0,0 +1,148 @@
+"""Registry of versioned, precompiled prompt templates."""
+import hashlib
+from pathlib import Path
+from string import Formatter
+from typing import Dict, Any, List, Optional, Tuple
+
+
+class PromptTemplate:
+    """A prompt template compiled once into static and dynamic segments."""
+
+    def __init__(self, name: str, text: str, path: Optional[Path] = None):
+        """
+        Compile a template.
+
+        Args:
+            name: Template name (e.g. "expert_v2")
+            text: Template text in str.format syntax
+            path: File the template was loaded from
+        """
+        self.name = name
+        self.text = text
+        self.path = path
+        self.version = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+        self.segments = self._compile(text)
+        self.fields = [segment[0] for segment in self.segments if isinstance(segment, tuple)]
+
+    @staticmethod
+    def _compile(text: str) -> List[Any]:
+        """
+        Split the template into literal strings and (field, format_spec, conversion) tuples.
+
+        Adjacent literals are merged, so a template with four placeholders
+        compiles to at most nine segments regardless of its length.
+        """
+        segments = []
+        for literal, field, format_spec, conversion in Formatter().parse(text):
+            if literal:
+                if segments and isinstance(segments[-1], str):
+                    segments[-1] += literal
+                else:
+                    segments.append(literal)
+            if field is not None:
+                if not field or not field.isidentifier():
+                    raise ValueError(f"Unsupported placeholder {{{field}}} in prompt template")
+                segments.append((field, format_spec or "", conversion))
+        return segments
+
+    def render(self, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Render the template by concatenating segments.
+
+        Args:
+            metadata: Values for the template's placeholders
+
+        Returns:
+            The rendered prompt (identical to str.format on the original text)
+        """
+        if not self.fields:
+            return self.text
+
+        metadata = metadata or {}
+        missing = [f for f in self.fields if f not in metadata]
+        if missing:
+            raise ValueError(f"Missing required metadata keys: {sorted(set(missing), key=missing.index)}")
+
+        parts = []
+        for segment in self.segments:
+            if isinstance(segment, str):
+                parts.append(segment)
+                continue
+            field, format_spec, conversion = segment
+            value = metadata[field]
+            if conversion == "r":
+                value = repr(value)
+            elif conversion == "a":
+                value = ascii(value)
+            elif conversion == "s":
+                value = str(value)
+            parts.append(format(value, format_spec))
+        return "".join(parts)
+
+
+class PromptRegistry:
+    """Discovers prompt templates in a directory and serves them by name."""
+
+    def __init__(self, prompts_dir: Path = None):
+        """
+        Discover templates.
+
+        Files named <kind>_prompt[<suffix>].txt are registered as <kind><suffix>,
+        e.g. naive_prompt.txt -> "naive", expert_prompt_v2.txt -> "expert_v2".
+
+        Args:
+            prompts_dir: Directory containing prompt templates (default: project_root/prompts)
+        """
+        if prompts_dir is None:
+            prompts_dir = Path(__file__).parent.parent.parent / "prompts"
+        self.prompts_dir = Path(prompts_dir)
+
+        self._paths = {}
+        if self.prompts_dir.exists():
+            for path in sorted(self.prompts_dir.glob("*.txt")):
+                self._paths[self.name_for(path)] = path
+        self._templates = {}
+
+    @staticmethod
+    def name_for(path: Path) -> str:
+        """Registry name for a template file."""
+        return Path(path).stem.replace("_prompt", "", 1)
+
+    def names(self) -> List[str]:
+        """Names of all discovered templates."""
+        return sorted(self._paths)
+
+    def get(self, name: str) -> PromptTemplate:
+        """
+        Get a compiled template by name (compiled on first use).
+
+        Raises:
+            FileNotFoundError: If no template with this name exists
+        """
+        if name not in self._templates:
+            if name not in self._paths:
+                raise FileNotFoundError(
+                    f"Prompt template not found: {name} in {self.prompts_dir} "
+                    f"(available: {', '.join(self.names())})"
+                )
+            path = self._paths[name]
+            self._templates[name] = PromptTemplate(name, path.read_text(), path)
+        return self._templates[name]
+
+    def version(self, name: str) -> str:
+        """Content-hash version id of a template."""
+        return self.get(name).version
+
+    def versions(self) -> Dict[str, str]:
+        """Version ids of all discovered templates."""
+        return {name: self.version(name) for name in self.names()}
+
+    def render(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> Tuple[str, str]:
+        """
+        Render a template.
+
+        Returns:
+            Tuple of (prompt text, version id)
+        """
+        template = self.get(name)
+        return template.render(metadata), template.version
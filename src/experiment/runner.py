@@ -1,12 +1,26 @@
 """Experiment orchestration and execution."""
 import json
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import time
+import random
 
+from ..analysis.cascade import CascadePolicy, ROUTE_AUDIT, ROUTE_LLM
+from ..analysis.results import extract_decision, decision_to_prediction
+from ..analysis.sequential import SequentialComparison
+from ..analysis.voting import MajorityVote
+from ..data.image_hash import ImageHashIndex, collapse_pairs
+from ..data.composite import COMPOSITE_PREAMBLE, CompositeBuilder
+from ..data.image_variants import ImageVariant, VariantCache
 from ..llm_clients.base import BaseLLMClient
+from ..llm_clients.errors import AuthError, SafetyBlockedError
+from ..llm_clients.image_io import shared_image_cache
+from ..profiling import span
+from .pair_planner import PairPlanner
 from .prompt_builder import PromptBuilder
+from .sharding import LeaseQueue, cell_key
 
 
 class ExperimentRunner:
@@ -17,7 +31,14 @@ class ExperimentRunner:
         llm_client: BaseLLMClient,
         pairs_metadata_path: Path,
         results_dir: Path,
-        prompt_builder: Optional[PromptBuilder] = None
+        prompt_builder: Optional[PromptBuilder] = None,
+        request_delay: float = 0.5,
+        vote_samples: int = 1,
+        image_index: Optional[ImageHashIndex] = None,
+        dedup_radius: int = 4,
+        pair_planner: Optional[PairPlanner] = None,
+        composite: Optional[CompositeBuilder] = None,
+        model_key: Optional[str] = None
     ):
         """
         Initialize experiment runner.
@@ -27,11 +48,34 @@ class ExperimentRunner:
             pairs_metadata_path: Path to JSON/CSV with pair metadata
             results_dir: Directory to save results
             prompt_builder: PromptBuilder instance (creates default if None)
+            request_delay: Pause between queries in seconds, to stay under rate
+                limits (0 for offline clients such as ReplayClient)
+            vote_samples: Self-consistency voting: sample each cell up to this many
+                times in parallel and keep the majority answer (1 disables voting;
+                use a client with non-zero temperature)
+            image_index: Perceptual-hash index; cells whose images are near-duplicates
+                of an earlier cell's reuse its answer instead of querying again
+            dedup_radius: Hamming radius (bits) for near-duplicates in image_index
+            pair_planner: Skips swapped repeats of answered pairs and pairs whose
+                answer follows from earlier confident answers (see pair_planner.py);
+                cells are then run in descending similarity order; a sample of
+                implied cells is still queried and contradictions are re-queried
+            composite: Send each pair as one labeled side-by-side image instead of two
+            model_key: Model key of the run (e.g. "gemini"), used in the cell_key
+                stamped on every record (default: the client's model name)
         """
         self.llm_client = llm_client
         self.pairs_metadata_path = Path(pairs_metadata_path)
         self.results_dir = Path(results_dir)
         self.results_dir.mkdir(parents=True, exist_ok=True)
+        self.request_delay = request_delay
+        self.vote_samples = vote_samples
+        self._vote_executor = ThreadPoolExecutor(max_workers=vote_samples) if vote_samples > 1 else None
+        self.image_index = image_index
+        self._representatives = image_index.representatives(dedup_radius) if image_index is not None else {}
+        self.pair_planner = pair_planner
+        self.composite = composite
+        self.model_key = model_key or llm_client.model_name
 
         self.prompt_builder = prompt_builder or PromptBuilder()
 
@@ -61,28 +105,22 @@ class ExperimentRunner:
             pair_id: Unique identifier for this pair
             image1_path: Path to first image
             image2_path: Path to second image
-            prompt_type: "naive" or "expert"
+            prompt_type: "naive", "expert" or an expert variant (e.g. "expert_v2")
             metadata: Metadata for expert prompt (location, dates, orientation)
 
         Returns:
-            Result dictionary with response and metadata
+            Result dictionary with response and metadata. A safety block is a
+            result, not an error: it has outcome "blocked", an empty response
+            and the provider's reasons under "safety".
         """
         # Build prompt
-        if prompt_type == "naive":
-            prompt = self.prompt_builder.build_naive_prompt()
-        elif prompt_type == "expert":
-            if metadata is None:
-                raise ValueError("Metadata required for expert prompt")
-            prompt = self.prompt_builder.build_expert_prompt(metadata)
-        else:
-            raise ValueError(f"Invalid prompt_type: {prompt_type}")
-
-        # Query LLM
-        print(f"Querying {pair_id} with {prompt_type} prompt...")
-        response = self.llm_client.query_with_images(
-            prompt=prompt,
-            image_paths=[image1_path, image2_path]
-        )
+        with span("prompt_render"):
+            prompt = self.prompt_builder.build_prompt(prompt_type, metadata)
+        image_paths = [image1_path, image2_path]
+        if self.composite is not None:
+            with span("composite_render"):
+                image_paths = [self.composite.build(image1_path, image2_path)]
+            prompt = COMPOSITE_PREAMBLE + prompt
 
         # Package result
         result = {
@@ -90,15 +128,62 @@ class ExperimentRunner:
             "image1": str(image1_path),
             "image2": str(image2_path),
             "prompt_type": prompt_type,
+            "prompt_version": self._prompt_version(prompt_type),
             "prompt_metadata": metadata,
+        }
+        if self.composite is not None:
+            result["image_variant"] = self.composite.to_dict()
+            result["composite_image"] = str(image_paths[0])
+
+        # Query LLM
+        print(f"Querying {pair_id} with {prompt_type} prompt...")
+        start = time.monotonic()
+        try:
+            with span("api_call"):
+                response = self.llm_client.query_with_images(
+                    prompt=prompt,
+                    image_paths=image_paths
+                )
+        except SafetyBlockedError as e:
+            # Deterministic for this input: record it instead of retrying later
+            print(f"  ⊘ Blocked: {e}")
+            result.update({
+                "outcome": "blocked",
+                "llm_response": "",
+                "safety": e.details(),
+                "model": self.llm_client.model_name,
+                "timestamp": datetime.now().isoformat(),
+                "token_usage": {}
+            })
+            self._add_image_digests(result, image_paths)
+            return result
+
+        result.update({
+            "outcome": "answered",
             "llm_response": response["response"],
             "model": response["model"],
             "timestamp": response["timestamp"],
+            "latency_seconds": round(time.monotonic() - start, 3),
             "token_usage": response["metadata"]
-        }
-
+        })
+        self._add_image_digests(result, image_paths)
         return result
 
+    def _add_image_digests(self, result: Dict[str, Any], image_paths: List[Path]):
+        """
+        Record the SHA-256 of the image files actually sent (variants or the composite, if used).
+
+        Digests come from the client's image cache, which already holds the
+        bytes just sent (or has them primed from the dataset manifest).
+        Skipped when a path is not a file, e.g. MockClient placeholders.
+        """
+        cache = getattr(self.llm_client, "image_cache", None)
+        cache = cache if cache is not None else shared_image_cache()
+        try:
+            result["image_sha256"] = [cache.digest(Path(path)) for path in image_paths]
+        except FileNotFoundError:
+            pass
+
     def run_experiment(
         self,
         pairs_to_run: List[Dict[str, Any]],
@@ -117,51 +202,126 @@ class ExperimentRunner:
             prompt_types: List of prompt types to run
             save_interval: Save results every N queries
 
+        Returns:
+            List of all results
+        """
+        cells = [(pair_info, prompt_type) for pair_info in pairs_to_run for prompt_type in prompt_types]
+        return self.run_cells(cells, save_interval=save_interval)
+
+    def run_cells(
+        self,
+        cells: List[Tuple[Dict[str, Any], str]],
+        save_interval: int = 5,
+        results_name: str = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run an explicit list of (pair, prompt type) cells, e.g. one shard of the work matrix.
+
+        Args:
+            cells: List of (pair_info, prompt_type) tuples; pair_info as for run_experiment,
+                optionally with "record_fields" (a dict added to each of the cell's records)
+            save_interval: Save results every N queries
+            results_name: Results file name (default: results_<timestamp>.json)
+
         Returns:
             List of all results
         """
         all_results = []
-        results_file = self.results_dir / f"results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        results_name = results_name or f"results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        results_file = self.results_dir / results_name
 
-        total_queries = len(pairs_to_run) * len(prompt_types)
-        current_query = 0
+        cells, duplicates = self._collapse_duplicate_cells(cells)
+        planner = self.pair_planner
+        if planner is not None:
+            cells = planner.order(cells)
+        total_queries = len(cells)
+        conflicts = []
+        # Positions of reused and inferred records, re-derived if their source answer is re-queried
+        derived = []
 
-        for pair_info in pairs_to_run:
+        for current_query, (pair_info, prompt_type) in enumerate(cells, 1):
             pair_id = pair_info["pair_id"]
-            image1 = Path(pair_info["image1_path"])
-            image2 = Path(pair_info["image2_path"])
-            metadata = pair_info.get("metadata", {})
-
-            for prompt_type in prompt_types:
-                current_query += 1
-                print(f"\n[{current_query}/{total_queries}] Processing {pair_id} - {prompt_type}")
-
-                try:
-                    result = self.run_single_query(
-                        pair_id=pair_id,
-                        image1_path=image1,
-                        image2_path=image2,
-                        prompt_type=prompt_type,
-                        metadata=metadata if prompt_type == "expert" else None
-                    )
-                    all_results.append(result)
-
-                    # Save periodically
-                    if len(all_results) % save_interval == 0:
-                        self._save_results(all_results, results_file)
-                        print(f"  → Saved {len(all_results)} results to {results_file.name}")
-
-                except Exception as e:
-                    print(f"  ✗ Error: {e}")
-                    all_results.append({
-                        "pair_id": pair_id,
-                        "prompt_type": prompt_type,
-                        "error": str(e),
-                        "timestamp": datetime.now().isoformat()
-                    })
-
-                # Small delay to avoid rate limits
-                time.sleep(0.5)
+            print(f"\n[{current_query}/{total_queries}] Processing {pair_id} - {prompt_type}")
+
+            if planner is not None:
+                plan = planner.plan(pair_info, prompt_type)
+                if plan["action"] == "reuse":
+                    print(f"  → Same pair as {plan['pair_id']} (swapped order), reusing its answer")
+                    all_results.append(self._copy_result(plan["result"], pair_info, duplicate_of=plan["pair_id"]))
+                    derived.append((len(all_results) - 1, pair_info, prompt_type))
+                    continue
+                if plan["action"] == "infer":
+                    print(f"  → Implied {plan['predicted']} by {', '.join(plan['evidence'])}, not queried")
+                    all_results.append(self._inferred_result(pair_info, prompt_type, plan))
+                    derived.append((len(all_results) - 1, pair_info, prompt_type))
+                    continue
+
+            self._wait_for_circuit()
+            try:
+                result = self._run_cell(pair_info, prompt_type)
+            except AuthError:
+                # Every remaining query would fail the same way; keep what we have
+                self._save_results(all_results, results_file)
+                print(f"  → Saved {len(all_results)} results to {results_file.name} before aborting")
+                raise
+            all_results.append(result)
+
+            if planner is not None:
+                if plan["action"] == "verify":
+                    result["identity_check"] = {"implied": plan["predicted"], "evidence": plan["evidence"]}
+                conflict = planner.observe(pair_info, result)
+                if conflict is not None:
+                    print(f"  ⚠ Contradicts {conflict['implied']} implied by {', '.join(conflict['evidence'])}; "
+                          f"flagged for re-query")
+                    conflicts.append((len(all_results) - 1, pair_info, prompt_type, conflict))
+
+            # Save periodically
+            if "error" not in result and len(all_results) % save_interval == 0:
+                self._save_results(all_results, results_file)
+                print(f"  → Saved {len(all_results)} results to {results_file.name}")
+
+            # Small delay to avoid rate limits
+            time.sleep(self.request_delay)
+
+        # Contradicting answers are asked once more; the re-query replaces the first answer,
+        # in the results and in the planner
+        replaced = set()
+        for position, pair_info, prompt_type, conflict in conflicts:
+            print(f"\n[re-query] {pair_info['pair_id']} - {prompt_type}")
+            self._wait_for_circuit()
+            first = all_results[position]
+            try:
+                result = self._run_cell(pair_info, prompt_type)
+            except AuthError:
+                self._save_results(all_results, results_file)
+                raise
+            result["requery"] = {"first_response": first.get("llm_response", ""), "conflict": conflict}
+            all_results[position] = result
+            planner.replace(pair_info, result)
+            replaced.add((pair_info["pair_id"], prompt_type))
+            time.sleep(self.request_delay)
+
+        # Copies and inferences built on a replaced answer are planned again from the current answers
+        for position, pair_info, prompt_type in derived if replaced else []:
+            record = all_results[position]
+            sources = [record["duplicate_of"]] if "duplicate_of" in record else record["inferred_from"]
+            if not any((source, prompt_type) in replaced for source in sources):
+                continue
+            try:
+                all_results[position] = self._rederive(pair_info, prompt_type)
+            except AuthError:
+                self._save_results(all_results, results_file)
+                raise
+
+        # Near-duplicate cells reuse the answer of the cell they collapse into
+        if duplicates:
+            by_cell = {(r["pair_id"], r["prompt_type"]): r for r in all_results}
+            for pair_info, prompt_type, representative_id in duplicates:
+                representative = by_cell.get((representative_id, prompt_type))
+                if representative is None:
+                    continue
+                all_results.append(self._copy_result(representative, pair_info, duplicate_of=representative_id))
+            print(f"\n  → {len(duplicates)} near-duplicate cells answered from their representative")
 
         # Final save
         self._save_results(all_results, results_file)
@@ -169,7 +329,501 @@ class ExperimentRunner:
 
         return all_results
 
+    def _rederive(self, pair_info: Dict[str, Any], prompt_type: str) -> Dict[str, Any]:
+        """Re-plan a reused or inferred cell; query it if the planner no longer knows the answer."""
+        plan = self.pair_planner.plan(pair_info, prompt_type)
+        if plan["action"] == "reuse":
+            return self._copy_result(plan["result"], pair_info, duplicate_of=plan["pair_id"])
+        if plan["action"] in ("infer", "verify"):
+            return self._inferred_result(pair_info, prompt_type, plan)
+        print(f"\n[re-query] {pair_info['pair_id']} - {prompt_type} (its source answer was replaced)")
+        self._wait_for_circuit()
+        result = self._run_cell(pair_info, prompt_type)
+        self.pair_planner.observe(pair_info, result)
+        time.sleep(self.request_delay)
+        return result
+
+    def _copy_result(self, result: Dict[str, Any], pair_info: Dict[str, Any], duplicate_of: str) -> Dict[str, Any]:
+        """Another pair's result, re-keyed to this pair and marked with duplicate_of."""
+        result = dict(result)
+        result.update({
+            "pair_id": pair_info["pair_id"],
+            "image1": str(pair_info["image1_path"]),
+            "image2": str(pair_info["image2_path"]),
+            "duplicate_of": duplicate_of,
+            "cell_key": cell_key(pair_info["pair_id"], result["prompt_type"], self.model_key),
+        })
+        result.update(pair_info.get("record_fields", {}))
+        return result
+
+    def _inferred_result(self, pair_info: Dict[str, Any], prompt_type: str, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Record for a cell whose answer follows from earlier confident answers."""
+        return {
+            "pair_id": pair_info["pair_id"],
+            "image1": str(pair_info["image1_path"]),
+            "image2": str(pair_info["image2_path"]),
+            "prompt_type": prompt_type,
+            "prompt_version": self._prompt_version(prompt_type),
+            "outcome": "inferred",
+            "predicted": plan["predicted"],
+            "inferred_from": plan["evidence"],
+            "model": self.llm_client.model_name,
+            "cell_key": cell_key(pair_info["pair_id"], prompt_type, self.model_key),
+            "timestamp": datetime.now().isoformat(),
+            **pair_info.get("record_fields", {})
+        }
+
+    def _collapse_duplicate_cells(
+        self,
+        cells: List[Tuple[Dict[str, Any], str]]
+    ) -> Tuple[List[Tuple[Dict[str, Any], str]], List[Tuple[Dict[str, Any], str, str]]]:
+        """Split cells into ones to query and (pair, prompt, representative pair_id) near-duplicates."""
+        if self.image_index is None:
+            return cells, []
+
+        duplicates = []
+        for prompt_type in dict.fromkeys(prompt for _, prompt in cells):
+            pairs = [pair for pair, prompt in cells if prompt == prompt_type]
+            _, duplicate_of = collapse_pairs(pairs, self._representatives)
+            for pair in pairs:
+                if pair["pair_id"] in duplicate_of:
+                    duplicates.append((pair, prompt_type, duplicate_of[pair["pair_id"]]))
+        skipped = {(pair["pair_id"], prompt) for pair, prompt, _ in duplicates}
+        to_run = [(pair, prompt) for pair, prompt in cells if (pair["pair_id"], prompt) not in skipped]
+        return to_run, duplicates
+
+    def run_cascade(
+        self,
+        pairs_to_run: List[Dict[str, Any]],
+        prompt_type: str,
+        policy: CascadePolicy,
+        save_interval: int = 5
+    ) -> Dict[str, Any]:
+        """
+        Decide pairs with a decisive MegaDescriptor score locally; query the LLM for the rest.
+
+        Locally decided pairs get a result record with outcome "local",
+        model "megadescriptor" and the decision in "predicted"; their cell_key
+        uses "megadescriptor" as the model, so they never merge with an LLM
+        answer to the same pair and prompt. Pairs in the
+        ambiguous band, and the audit sample of decisive pairs, are queried
+        as usual and carry a "cascade" dict with their route (and, for
+        audits, MegaDescriptor's decision).
+
+        Args:
+            pairs_to_run: Pair dicts as for run_experiment, with "md_similarity"
+            prompt_type: Prompt type for the LLM queries
+            policy: Thresholds and audit rate (see fit_cascade_thresholds)
+            save_interval: Save results every N LLM queries
+
+        Returns:
+            Dict with "results" and "summary" (pairs decided locally, LLM calls, audits)
+        """
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        local_results = []
+        cells = []
+        routes = {}
+        for pair_info in pairs_to_run:
+            pair_id = pair_info["pair_id"]
+            similarity = pair_info.get("md_similarity")
+            route = policy.route(pair_id, similarity)
+            routes[pair_id] = route
+            if route in (ROUTE_LLM, ROUTE_AUDIT):
+                cells.append((pair_info, prompt_type))
+            else:
+                local_results.append({
+                    "pair_id": pair_id,
+                    "image1": str(pair_info["image1_path"]),
+                    "image2": str(pair_info["image2_path"]),
+                    "prompt_type": prompt_type,
+                    "prompt_version": self._prompt_version(prompt_type),
+                    "outcome": "local",
+                    "predicted": route,
+                    "md_similarity": similarity,
+                    "model": "megadescriptor",
+                    "cell_key": cell_key(pair_id, prompt_type, "megadescriptor"),
+                    "timestamp": datetime.now().isoformat(),
+                    **pair_info.get("record_fields", {})
+                })
+
+        print(f"Cascade: {len(local_results)} pairs decided locally, {len(cells)} sent to the LLM "
+              f"({sum(r == ROUTE_AUDIT for r in routes.values())} audits)")
+
+        results_name = f"cascade_{timestamp}.json"
+        llm_results = self.run_cells(cells, save_interval=save_interval, results_name=results_name) if cells else []
+        similarities = {p["pair_id"]: p.get("md_similarity") for p in pairs_to_run}
+        for result in llm_results:
+            similarity = similarities[result["pair_id"]]
+            route = routes[result["pair_id"]]
+            result["cascade"] = {"route": route, "md_similarity": similarity}
+            if route == ROUTE_AUDIT:
+                result["cascade"]["local_decision"] = policy.local_decision(similarity)
+
+        all_results = local_results + llm_results
+        results_file = self.results_dir / results_name
+        self._save_results(all_results, results_file)
+
+        summary = {
+            "pairs": len(pairs_to_run),
+            "decided_locally": len(local_results),
+            "llm_calls": len(cells),
+            "audits": sum(r == ROUTE_AUDIT for r in routes.values()),
+            "policy": policy.to_dict(),
+        }
+        with open(results_file.with_name(results_file.stem + "_summary.json"), 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"\n✓ Cascade finished. Results saved to {results_file}")
+
+        return {"results": all_results, "summary": summary}
+
+    def run_sweep(
+        self,
+        pairs_to_run: List[Dict[str, Any]],
+        prompt_type: str,
+        variants: List[ImageVariant],
+        variant_cache: VariantCache,
+        max_pairs: Optional[int] = None,
+        seed: int = 0,
+        save_interval: int = 5
+    ) -> Dict[str, Any]:
+        """
+        Re-run a stratified subset of pairs at several image resolutions / qualities / crops.
+
+        Every variant runs on the same pairs (round-robin across categories,
+        so any prefix is stratified). Records carry "image_variant" (the
+        variant's settings), "source_images" (the original paths) and
+        "image_bytes" (upload size per image). Pairs without head boxes are
+        left out of head-crop variants.
+
+        Args:
+            pairs_to_run: Pair dicts as for run_experiment
+            prompt_type: Prompt type for all queries
+            variants: Image variants to compare
+            variant_cache: Renders and caches the variant files
+            max_pairs: Size of the stratified subset (None: all pairs)
+            seed: Seed of the subset selection
+            save_interval: Save results every N queries
+
+        Returns:
+            Dict with "results" (all variants) and "pairs" (the subset's pair ids)
+        """
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        subset = self._interleave_by_category(list(pairs_to_run), seed)[:max_pairs]
+        images = [pair[key] for pair in subset for key in ("image1_path", "image2_path")]
+        print(f"Sweep: {len(subset)} pairs x {len(variants)} variants ({prompt_type} prompt)")
+        files = variant_cache.render_all(images, variants)
+
+        all_results = []
+        for variant in variants:
+            print(f"\n=== Variant {variant.name} ===")
+            cells = []
+            for pair in subset:
+                image1 = files[(str(pair["image1_path"]), variant.name)]
+                image2 = files[(str(pair["image2_path"]), variant.name)]
+                if image1 is None or image2 is None:
+                    continue
+                # Stamped on the records by run_cells, so the per-variant file is tagged as it is saved
+                record_fields = {
+                    "image_variant": variant.to_dict(),
+                    "source_images": [str(pair["image1_path"]), str(pair["image2_path"])],
+                    "image_bytes": [Path(image1).stat().st_size, Path(image2).stat().st_size],
+                }
+                cells.append((dict(pair, image1_path=image1, image2_path=image2, record_fields=record_fields),
+                              prompt_type))
+            if len(cells) < len(subset):
+                print(f"  {len(subset) - len(cells)} pairs without head boxes left out")
+
+            results = self.run_cells(cells, save_interval=save_interval,
+                                     results_name=f"sweep_{timestamp}_{variant.name}.json")
+            all_results.extend(results)
+
+        results_file = self.results_dir / f"sweep_{timestamp}.json"
+        self._save_results(all_results, results_file)
+        print(f"\n✓ Sweep finished. Results saved to {results_file}")
+        return {"results": all_results, "pairs": [pair["pair_id"] for pair in subset]}
+
+    def run_queue_worker(
+        self,
+        queue: LeaseQueue,
+        pairs_by_id: Dict[str, Dict[str, Any]],
+        model: str,
+        worker_id: str,
+        lease_seconds: float = 600.0,
+        max_attempts: int = 3,
+        batch_size: int = 1
+    ) -> Dict[str, int]:
+        """
+        Pull cells for this runner's model from a shared lease queue until none are left.
+
+        Results are written back to the queue; use LeaseQueue.results() or
+        merge_results to consolidate them.
+
+        Args:
+            queue: Shared LeaseQueue
+            pairs_by_id: Pair dicts (as for run_experiment) keyed by pair_id
+            model: Model key of the cells this worker serves (e.g. "gemini")
+            worker_id: Unique identifier of this worker
+            lease_seconds: Lease duration per cell; must exceed the time of one query with retries
+            max_attempts: Attempts per cell before it is marked failed
+            batch_size: Cells leased per round trip
+
+        Returns:
+            Dict with counts of completed, failed and lost (lease expired) cells
+        """
+        stats = {"completed": 0, "failed": 0, "lost": 0}
+
+        while True:
+            leased = queue.lease(worker_id, count=batch_size, lease_seconds=lease_seconds, models=[model])
+            if not leased:
+                break
+
+            for cell in leased:
+                pair_info = pairs_by_id.get(cell["pair_id"])
+                print(f"\n[{worker_id}] Processing {cell['pair_id']} - {cell['prompt_type']}")
+                if pair_info is None:
+                    result = {"error": f"Unknown pair: {cell['pair_id']}", "cell_key": cell["key"]}
+                else:
+                    self._wait_for_circuit()
+                    # An AuthError propagates; the lease expires and another worker picks the cell up
+                    result = self._run_cell(pair_info, cell["prompt_type"])
+
+                if "error" in result:
+                    ok = queue.fail(cell["key"], worker_id, result["error"], max_attempts=max_attempts)
+                    stats["failed" if ok else "lost"] += 1
+                else:
+                    ok = queue.complete(cell["key"], worker_id, result)
+                    stats["completed" if ok else "lost"] += 1
+
+                time.sleep(self.request_delay)
+
+        progress = queue.progress()
+        print(f"\n✓ Worker {worker_id} finished: {stats['completed']} completed, {stats['failed']} failed "
+              f"(queue: {progress['done']} done, {progress['pending'] + progress['leased']} remaining)")
+        return stats
+
+    def _wait_for_circuit(self):
+        """Pause while the client's circuit breaker is open instead of failing queued cells."""
+        breaker = getattr(self.llm_client, "circuit_breaker", None)
+        if breaker is None:
+            return
+        wait = breaker.retry_after()
+        if wait == float("inf"):
+            # Opened by an authentication failure; only a reset closes it
+            raise AuthError(f"{breaker.provider} circuit open until reset", provider=breaker.provider,
+                            all_keys_disabled=True)
+        if wait > 0:
+            print(f"  … {breaker.provider} circuit open, pausing {wait:.0f}s")
+            time.sleep(wait)
+
+    def _run_cell(self, pair_info: Dict[str, Any], prompt_type: str) -> Dict[str, Any]:
+        """
+        Run one (pair, prompt type) cell, returning an error record instead of raising.
+
+        With vote_samples > 1 the cell is answered by self-consistency voting.
+        Authentication errors with every key disabled are re-raised: no other cell can succeed after one.
+        Every record, errors included, carries the cell_key merge_results() merges on,
+        and the pair's "record_fields" if it has any.
+        """
+        if self.vote_samples > 1:
+            result = self._run_voting_cell(pair_info, prompt_type)
+        else:
+            result = self._run_single_cell(pair_info, prompt_type)
+        result["cell_key"] = cell_key(pair_info["pair_id"], prompt_type, self.model_key)
+        result.update(pair_info.get("record_fields", {}))
+        return result
+
+    def _run_voting_cell(self, pair_info: Dict[str, Any], prompt_type: str) -> Dict[str, Any]:
+        """
+        Sample a cell in parallel waves until a majority of vote_samples is locked in.
+
+        The returned record is a sample carrying the winning decision, with
+        the vote tally under "vote", per-sample decisions under "vote_samples",
+        summed token usage and the wall-clock latency of all waves. Failed or
+        blocked samples count as unclear votes.
+        """
+        vote = MajorityVote(self.vote_samples)
+        samples = []
+        start = time.monotonic()
+        while vote.next_wave():
+            wave = [
+                self._vote_executor.submit(self._run_single_cell, pair_info, prompt_type)
+                for _ in range(vote.next_wave())
+            ]
+            for future in wave:
+                sample = future.result()
+                decision = "unclear"
+                if "error" not in sample and sample.get("outcome") == "answered":
+                    decision = extract_decision(sample["llm_response"], prompt_type)
+                vote.add(decision)
+                samples.append((decision, sample))
+
+        summary = vote.summary()
+        answered = [sample for _, sample in samples if "error" not in sample]
+        if not answered:
+            return samples[0][1]
+        result = next((sample for decision, sample in samples if decision == summary["decision"]), answered[0])
+        result = dict(result)
+
+        token_usage = {}
+        for sample in answered:
+            for key, value in (sample.get("token_usage") or {}).items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    token_usage[key] = token_usage.get(key, 0) + value
+        result["token_usage"] = token_usage
+        result["latency_seconds"] = round(time.monotonic() - start, 3)
+        result["vote"] = summary
+        result["vote_samples"] = [
+            {
+                "decision": decision,
+                "outcome": "error" if "error" in sample else sample.get("outcome"),
+                "latency_seconds": sample.get("latency_seconds"),
+            }
+            for decision, sample in samples
+        ]
+        print(f"  → Votes {summary['votes']} after {summary['samples']} samples: "
+              f"{summary['decision']} (confidence {summary['confidence']:.2f})")
+        return result
+
+    def _run_single_cell(self, pair_info: Dict[str, Any], prompt_type: str) -> Dict[str, Any]:
+        """One query for a cell; errors become error records, AuthError with no usable key left is re-raised."""
+        pair_id = pair_info["pair_id"]
+        metadata = pair_info.get("metadata", {})
+        try:
+            return self.run_single_query(
+                pair_id=pair_id,
+                image1_path=Path(pair_info["image1_path"]),
+                image2_path=Path(pair_info["image2_path"]),
+                prompt_type=prompt_type,
+                metadata=metadata if prompt_type != "naive" else None
+            )
+        except Exception as e:
+            if isinstance(e, AuthError) and e.all_keys_disabled:
+                print(f"  ✗ Authentication failed, aborting: {e}")
+                raise
+            print(f"  ✗ Error: {e}")
+            return {
+                "pair_id": pair_id,
+                "prompt_type": prompt_type,
+                "prompt_version": self._prompt_version(prompt_type),
+                "error": str(e),
+                "error_type": e.__class__.__name__,
+                "timestamp": datetime.now().isoformat()
+            }
+
+    def run_sequential_comparison(
+        self,
+        pairs_to_run: List[Dict[str, Any]],
+        prompt_a: str,
+        prompt_b: str,
+        alpha: float = 0.05,
+        margin: float = 0.05,
+        min_pairs: int = 10,
+        seed: int = 0,
+        save_interval: int = 5
+    ) -> Dict[str, Any]:
+        """
+        Compare two prompt versions pair by pair and stop once the outcome is decided.
+
+        Pairs are shuffled and interleaved across categories so that any
+        prefix is representative. Each pair is queried with both prompts (in
+        alternating order) and scored against its ground truth; unclear
+        answers count as incorrect. After every pair a SequentialComparison
+        decides whether A is better, B is better, the two are equivalent
+        within the margin, or more pairs are needed.
+
+        Args:
+            pairs_to_run: Pair dicts as for run_experiment, with a "ground_truth" key
+            prompt_a: First prompt type (e.g. "expert")
+            prompt_b: Second prompt type (e.g. "expert_v3")
+            alpha: Error rate of the sequential test
+            margin: Equivalence margin on the accuracy difference
+            min_pairs: Minimum number of pairs before stopping
+            seed: Seed for the pair order
+            save_interval: Save results every N pairs
+
+        Returns:
+            Dict with "comparison" (test summary, including stopped_early) and "results"
+        """
+        missing = [p["pair_id"] for p in pairs_to_run if "ground_truth" not in p]
+        if missing:
+            raise ValueError(f"Sequential comparison needs ground_truth for every pair, missing: {missing[:5]}")
+
+        test = SequentialComparison(alpha=alpha, margin=margin, min_pairs=min_pairs)
+        ordered_pairs = self._interleave_by_category(pairs_to_run, seed)
+
+        all_results = []
+        results_file = self.results_dir / f"sequential_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+
+        for index, pair_info in enumerate(ordered_pairs, 1):
+            pair_id = pair_info["pair_id"]
+            prompt_order = [prompt_a, prompt_b] if index % 2 else [prompt_b, prompt_a]
+            print(f"\n[{index}/{len(ordered_pairs)}] Processing {pair_id} - {prompt_a} vs {prompt_b}")
+
+            correct = {}
+            for prompt_type in prompt_order:
+                result = self._run_cell(pair_info, prompt_type)
+                all_results.append(result)
+                if "error" not in result:
+                    predicted = decision_to_prediction(extract_decision(result["llm_response"], prompt_type))
+                    correct[prompt_type] = predicted == pair_info["ground_truth"]
+                time.sleep(self.request_delay)
+
+            # Only pairs answered by both versions enter the test
+            if len(correct) == 2:
+                decision = test.update(correct[prompt_a], correct[prompt_b])
+                low, high = test.interval()
+                print(f"  → {prompt_a} {test.a_wins} : {test.b_wins} {prompt_b} "
+                      f"over {test.n} pairs, diff CI [{low:+.2f}, {high:+.2f}]")
+                if decision != SequentialComparison.CONTINUE:
+                    print(f"  → Stopping: {decision}")
+                    break
+
+            if index % save_interval == 0:
+                self._save_results(all_results, results_file)
+
+        summary = test.summary()
+        summary.update({
+            "prompt_a": prompt_a,
+            "prompt_b": prompt_b,
+            "pairs_available": len(ordered_pairs),
+            "stopped_early": test.decision != SequentialComparison.CONTINUE and test.n < len(ordered_pairs),
+        })
+        if test.decision == SequentialComparison.CONTINUE:
+            summary["decision"] = "inconclusive"
+
+        self._save_results(all_results, results_file)
+        with open(results_file.with_name(results_file.stem + "_summary.json"), 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"\n✓ Comparison finished ({summary['decision']}). Results saved to {results_file}")
+
+        return {"comparison": summary, "results": all_results}
+
+    @staticmethod
+    def _interleave_by_category(pairs: List[Dict[str, Any]], seed: int) -> List[Dict[str, Any]]:
+        """Shuffle pairs within each category, then take them round-robin across categories."""
+        rng = random.Random(seed)
+        by_category = {}
+        for pair in pairs:
+            by_category.setdefault(pair.get("category", ""), []).append(pair)
+        queues = [by_category[c] for c in sorted(by_category)]
+        for queue in queues:
+            rng.shuffle(queue)
+
+        ordered = []
+        while any(queues):
+            for queue in queues:
+                if queue:
+                    ordered.append(queue.pop())
+        return ordered
+
+    def _prompt_version(self, prompt_type: str) -> Optional[str]:
+        """Version id of the prompt template, or None if the prompt type is unknown."""
+        try:
+            return self.prompt_builder.prompt_version(prompt_type)
+        except FileNotFoundError:
+            return None
+
     def _save_results(self, results: List[Dict[str, Any]], output_path: Path):
         """Save results to JSON file."""
-        with open(output_path, 'w') as f:
+        with span("save"), open(output_path, 'w') as f:
             json.dump(results, f, indent=2)
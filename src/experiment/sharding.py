@@ -0,0 +1,278 @@
+"""Work matrix sharding and a SQLite lease queue for multi-process runs.
+
+The experiment's work is the (pair x prompt x model) matrix. It can be split
+in two ways:
+
+- Static shards: ``shard_cells(cells, i, n)`` assigns each cell to one of n
+  shards by a stable hash of its key, so every worker computes the same
+  partition without coordination.
+- Work queue: ``LeaseQueue`` keeps one row per cell in a SQLite file. Workers
+  lease cells for a limited time, and expired leases are handed out again,
+  so crashed workers do not lose work. Any number of local processes (or
+  hosts sharing the file over a filesystem with working locks) can pull
+  from the same queue.
+
+``merge_results`` consolidates the per-shard or per-worker outputs into one
+result set with exactly one record per cell.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+
+def cell_key(pair_id: str, prompt_type: str, model: str) -> str:
+    """Stable identifier of one work cell."""
+    return f"{pair_id}|{prompt_type}|{model}"
+
+
+def build_work_matrix(
+    pair_ids: Iterable[str],
+    prompt_types: List[str],
+    models: List[str]
+) -> List[Dict[str, str]]:
+    """
+    Enumerate all (pair, prompt, model) cells in a deterministic order.
+
+    Returns:
+        List of cell dicts with keys: key, pair_id, prompt_type, model
+    """
+    cells = []
+    for pair_id in pair_ids:
+        for model in models:
+            for prompt_type in prompt_types:
+                cells.append({
+                    "key": cell_key(pair_id, prompt_type, model),
+                    "pair_id": pair_id,
+                    "prompt_type": prompt_type,
+                    "model": model,
+                })
+    return cells
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """
+    Parse a shard spec "i/N" (0 <= i < N).
+
+    Raises:
+        ValueError: If the spec is malformed or out of range
+    """
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard spec '{spec}', expected 'i/N' (e.g. '0/4')")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard spec '{spec}': need 0 <= i < N")
+    return index, count
+
+
+def shard_of(key: str, count: int) -> int:
+    """Shard index of a cell key (stable across processes and Python versions)."""
+    digest = hashlib.sha1(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def shard_cells(cells: List[Dict[str, str]], index: int, count: int) -> List[Dict[str, str]]:
+    """Cells belonging to shard index of count, in their original order."""
+    return [cell for cell in cells if shard_of(cell["key"], count) == index]
+
+
+def result_cell_key(result: Dict[str, Any], model: Optional[str] = None) -> str:
+    """Cell key of a result record (model defaults to the record's model)."""
+    return cell_key(result["pair_id"], result["prompt_type"], model or result.get("model", ""))
+
+
+def merge_results(result_sets: Iterable[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Consolidate results from several shards or workers.
+
+    One record is kept per cell: a success beats an error, and among records
+    of the same kind the latest timestamp wins. Output is sorted by cell.
+
+    Cells are identified by the "cell_key" the runner stamps on every record
+    (built from the run's model key, so errors and successes of one cell
+    agree); only records from before cell keys fall back to result_cell_key().
+    """
+    merged = {}
+    for results in result_sets:
+        for result in results:
+            key = result.get("cell_key") or result_cell_key(result)
+            current = merged.get(key)
+            if current is None:
+                merged[key] = result
+                continue
+            current_ok = "error" not in current
+            new_ok = "error" not in result
+            if (new_ok, result.get("timestamp", "")) > (current_ok, current.get("timestamp", "")):
+                merged[key] = result
+    return [merged[key] for key in sorted(merged)]
+
+
+class LeaseQueue:
+    """SQLite-backed queue of work cells with time-limited leases."""
+
+    PENDING = "pending"
+    LEASED = "leased"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, db_path: Path, timeout: float = 30.0):
+        """
+        Open (and create if needed) a lease queue.
+
+        Args:
+            db_path: Path of the SQLite file
+            timeout: Seconds to wait for a lock held by another worker
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), timeout=timeout, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cells (
+                key TEXT PRIMARY KEY,
+                pair_id TEXT NOT NULL,
+                prompt_type TEXT NOT NULL,
+                model TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cells_status ON cells (status, lease_expires)")
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def populate(self, cells: List[Dict[str, str]]) -> int:
+        """
+        Add cells that are not in the queue yet (safe to call from every worker).
+
+        Returns:
+            Number of newly added cells
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO cells (key, pair_id, prompt_type, model) VALUES (?, ?, ?, ?)",
+                [(c["key"], c["pair_id"], c["prompt_type"], c["model"]) for c in cells]
+            )
+            added = self._conn.total_changes - before
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def lease(
+        self,
+        worker: str,
+        count: int = 1,
+        lease_seconds: float = 600.0,
+        models: Optional[List[str]] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Atomically lease up to count pending (or expired) cells.
+
+        Args:
+            worker: Identifier of the leasing worker
+            count: Maximum number of cells to lease
+            lease_seconds: Lease duration; afterwards the cell can be leased again
+            models: Only lease cells for these models
+
+        Returns:
+            Leased cells (empty when no work is available)
+        """
+        now = time.time()
+        query = (
+            "SELECT key, pair_id, prompt_type, model FROM cells "
+            "WHERE (status = ? OR (status = ? AND lease_expires < ?))"
+        )
+        params: List[Any] = [self.PENDING, self.LEASED, now]
+        if models:
+            query += f" AND model IN ({', '.join('?' for _ in models)})"
+            params.extend(models)
+        query += " ORDER BY key LIMIT ?"
+        params.append(count)
+
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self._conn.execute(query, params).fetchall()
+            self._conn.executemany(
+                "UPDATE cells SET status = ?, worker = ?, lease_expires = ?, attempts = attempts + 1 WHERE key = ?",
+                [(self.LEASED, worker, now + lease_seconds, row[0]) for row in rows]
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+        return [{"key": r[0], "pair_id": r[1], "prompt_type": r[2], "model": r[3]} for r in rows]
+
+    def complete(self, key: str, worker: str, result: Dict[str, Any]) -> bool:
+        """
+        Store the result of a leased cell.
+
+        Returns:
+            False if the lease was lost to another worker (the result is discarded)
+        """
+        cursor = self._conn.execute(
+            "UPDATE cells SET status = ?, result = ?, error = NULL, lease_expires = NULL "
+            "WHERE key = ? AND worker = ? AND status = ?",
+            (self.DONE, json.dumps(result), key, worker, self.LEASED)
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, key: str, worker: str, error: str, max_attempts: int = 3) -> bool:
+        """
+        Record a failed attempt; the cell is retried until max_attempts is reached.
+
+        Returns:
+            False if the lease was lost to another worker
+        """
+        cursor = self._conn.execute(
+            "UPDATE cells SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+            "error = ?, lease_expires = NULL WHERE key = ? AND worker = ? AND status = ?",
+            (max_attempts, self.FAILED, self.PENDING, error, key, worker, self.LEASED)
+        )
+        return cursor.rowcount == 1
+
+    def progress(self) -> Dict[str, int]:
+        """Number of cells per status."""
+        counts = {status: 0 for status in [self.PENDING, self.LEASED, self.DONE, self.FAILED]}
+        for status, count in self._conn.execute("SELECT status, COUNT(*) FROM cells GROUP BY status"):
+            counts[status] = count
+        return counts
+
+    def done_keys(self) -> List[str]:
+        """Keys of completed cells."""
+        return [key for (key,) in self._conn.execute("SELECT key FROM cells WHERE status = ?", (self.DONE,))]
+
+    def results(self) -> List[Dict[str, Any]]:
+        """Result records of completed cells plus error records of failed cells."""
+        records = []
+        for key, result in self._conn.execute(
+            "SELECT key, result FROM cells WHERE status = ? ORDER BY key", (self.DONE,)
+        ):
+            record = json.loads(result)
+            record["cell_key"] = key
+            records.append(record)
+        for key, pair_id, prompt_type, error in self._conn.execute(
+            "SELECT key, pair_id, prompt_type, error FROM cells WHERE status = ? ORDER BY key", (self.FAILED,)
+        ):
+            records.append({"cell_key": key, "pair_id": pair_id, "prompt_type": prompt_type, "error": error})
+        return records
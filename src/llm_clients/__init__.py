@@ -1,4 +1,22 @@
 from .base import BaseLLMClient
+from .errors import (
+    LLMClientError, RateLimitedError, TransientError, SafetyBlockedError,
+    InvalidInputError, AuthError, CircuitOpenError,
+)
+from .circuit_breaker import CircuitBreaker
 from .gemini import GeminiClient
+from .claude import ClaudeClient
+from .openai import OpenAIClient
+from .mock import MockClient
+from .cassette import CassetteStore
+from .replay import ReplayClient
+from .hedging import HedgingPolicy
+from .key_pool import APIKeyPool
+from .transport import HTTPTransportConfig
 
-__all__ = ['BaseLLMClient', 'GeminiClient']
+__all__ = [
+    'BaseLLMClient', 'GeminiClient', 'ClaudeClient', 'OpenAIClient', 'MockClient', 'ReplayClient',
+    'HedgingPolicy', 'APIKeyPool', 'HTTPTransportConfig', 'CircuitBreaker', 'CassetteStore',
+    'LLMClientError', 'RateLimitedError', 'TransientError', 'SafetyBlockedError',
+    'InvalidInputError', 'AuthError', 'CircuitOpenError',
+]
@@ -1,12 +1,30 @@
 """Base class for LLM API clients."""
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Callable, Optional
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import threading
+import time
+
+from .cassette import CassetteStore, request_key
+from .circuit_breaker import CircuitBreaker
+from .errors import (
+    AuthError,
+    LLMClientError,
+    RateLimitedError,
+    TransientError,
+)
+from .hedging import HedgingPolicy
+from .image_io import shared_image_cache
+from .key_pool import APIKeyPool, KeyLease
 
 
 class BaseLLMClient(ABC):
     """Abstract base class for LLM clients."""
 
+    # Provider name used for key pools, circuit breakers and error messages
+    provider = "llm"
+
     def __init__(self, model_name: str, temperature: float = 0.0):
         """
         Initialize the LLM client.
@@ -17,6 +35,92 @@ class BaseLLMClient(ABC):
         """
         self.model_name = model_name
         self.temperature = temperature
+        self.key_pool: Optional[APIKeyPool] = None
+        self.hedging: Optional[HedgingPolicy] = None
+        self.circuit_breaker: Optional[CircuitBreaker] = None
+        self.cassette: Optional[CassetteStore] = None
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self._hedge_executor_lock = threading.Lock()
+
+    def enable_hedging(self, policy: HedgingPolicy = None, max_workers: int = 16) -> HedgingPolicy:
+        """
+        Hedge slow requests: if a request has not returned by the policy's latency
+        quantile, send a duplicate (on the least-loaded key) and use the first answer.
+
+        Args:
+            policy: HedgingPolicy (default: p95 delay, 10% budget)
+            max_workers: Threads available for in-flight primaries and duplicates
+
+        Returns:
+            The active policy (its stats() report how often hedges won)
+        """
+        self.hedging = policy or HedgingPolicy()
+        with self._hedge_executor_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        return self.hedging
+
+    def enable_recording(self, cassette: CassetteStore) -> CassetteStore:
+        """
+        Record every request and its final outcome to a cassette for offline replay.
+
+        Results and deterministic errors (safety blocks, invalid input) are
+        recorded; transient failures are not, since a retry would differ.
+
+        Args:
+            cassette: Store to append to
+
+        Returns:
+            The cassette
+        """
+        self.cassette = cassette
+        return cassette
+
+    def _recorded(
+        self,
+        prompt: str,
+        image_paths: List[Path],
+        call: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Run call(), recording the request and its outcome if recording is enabled."""
+        if self.cassette is None:
+            return call()
+
+        request = self._describe_request(prompt, image_paths)
+        try:
+            result = call()
+        except LLMClientError as e:
+            if not e.retryable and not e.counts_against_backend:
+                self.cassette.record(request, error=e)
+            raise
+        self.cassette.record(request, result=result)
+        return result
+
+    def _describe_request(self, prompt: str, image_paths: List[Path]) -> Dict[str, Any]:
+        """Cassette description of a request, with image digests instead of bytes."""
+        digests = self._image_digests(image_paths)
+        return {
+            "key": request_key(self.provider, self.model_name, prompt, digests, self.temperature),
+            "provider": self.provider,
+            "model": self.model_name,
+            "temperature": self.temperature,
+            "prompt": prompt,
+            "image_digests": digests,
+            "image_paths": [str(path) for path in image_paths],
+        }
+
+    def _image_digests(self, image_paths: List[Path]) -> List[str]:
+        """SHA-256 digests of the request's images, via the client's image cache."""
+        cache = getattr(self, "image_cache", None)
+        cache = cache if cache is not None else shared_image_cache()
+        digests = []
+        for path in image_paths:
+            try:
+                digests.append(cache.digest(Path(path)))
+            except FileNotFoundError:
+                # Clients that never read images (e.g. MockClient) may get placeholder paths
+                digests.append(f"path:{path}")
+        return digests
 
     @abstractmethod
     def query_with_images(
@@ -49,3 +153,119 @@ class BaseLLMClient(ABC):
             True if connection successful, False otherwise
         """
         pass
+
+    def _call_with_retries(
+        self,
+        send: Callable[[KeyLease], Dict[str, Any]],
+        retry_attempts: int = 3,
+        retry_delay: float = 1.0
+    ) -> Dict[str, Any]:
+        """
+        Run one provider request with retries, each attempt on the least-loaded key.
+
+        With hedging enabled, each attempt may race a duplicate request.
+        Failures are classified (see _classify_error); only retryable ones
+        (rate limits, transient errors) are retried. An authentication failure
+        disables that key and moves to the next one; AuthError is raised only
+        once every key of the pool is disabled. With a circuit breaker,
+        calls fail fast with CircuitOpenError while the provider is down.
+
+        Args:
+            send: Performs the request with the given key and returns the result
+                dict (with a "metadata" dict holding prompt/completion tokens)
+            retry_attempts: Number of attempts
+            retry_delay: Base delay between attempts in seconds
+
+        Returns:
+            The result dict from send, with the key's masked id added to its metadata
+
+        Raises:
+            LLMClientError: Typed error of the last attempt (attempts set on the error)
+        """
+        for attempt in range(1, retry_attempts + 1):
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.before_call()
+            try:
+                result = self._attempt(send)
+            except LLMClientError as e:
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_failure(e)
+                e.attempts = attempt
+                if not e.retryable or attempt == retry_attempts:
+                    if attempt > 1:
+                        e.args = (f"Failed after {attempt} attempts: {e}",)
+                    raise
+                time.sleep(retry_delay * attempt)  # Exponential backoff
+                continue
+
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_success()
+            return result
+
+    def _attempt(self, send: Callable[[KeyLease], Dict[str, Any]]) -> Dict[str, Any]:
+        """One attempt, hedged with a duplicate request if the policy allows it."""
+        hedge_delay = self.hedging.start_request() if self.hedging is not None else None
+        if hedge_delay is None:
+            return self._send_with_key(send)
+
+        primary = self._hedge_executor.submit(self._send_with_key, send)
+        done, _ = wait([primary], timeout=hedge_delay)
+        if done:
+            return primary.result()
+
+        # The straggler keeps running; its key is released when it finishes
+        self.hedging.record_hedge()
+        hedge = self._hedge_executor.submit(self._send_with_key, send)
+        pending = {primary, hedge}
+        first_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    result = future.result()
+                    result["metadata"]["hedged"] = True
+                    result["metadata"]["hedge_won"] = future is hedge
+                    if future is hedge:
+                        self.hedging.record_hedge_win()
+                    return result
+                first_error = first_error or future.exception()
+        raise first_error
+
+    def _send_with_key(self, send: Callable[[KeyLease], Dict[str, Any]]) -> Dict[str, Any]:
+        """Run send on the least-loaded key, with key accounting and latency tracking."""
+        lease = self.key_pool.acquire()
+        start = time.monotonic()
+        try:
+            result = send(lease)
+        except Exception as e:
+            self.key_pool.release(lease, error=True)
+            error = e if isinstance(e, LLMClientError) else self._classify_error(e)
+            if isinstance(error, RateLimitedError):
+                self.key_pool.park_rate_limited(lease, reason=str(error)[:80])
+            elif isinstance(error, AuthError):
+                self.key_pool.disable(lease, reason=str(error)[:80])
+                if self.key_pool.enabled():
+                    # Only this key is revoked: the request goes to the next one
+                    return self._send_with_key(send)
+                error.all_keys_disabled = True
+            raise error from e
+
+        if self.hedging is not None:
+            self.hedging.record_latency(time.monotonic() - start)
+        metadata = result.setdefault("metadata", {})
+        metadata["api_key_id"] = lease.key_id
+        self.key_pool.release(
+            lease,
+            prompt_tokens=metadata.get("prompt_tokens"),
+            completion_tokens=metadata.get("completion_tokens")
+        )
+        return result
+
+    def _classify_error(self, error: Exception) -> LLMClientError:
+        """
+        Map a provider exception to a typed LLMClientError.
+
+        Subclasses override this for their SDK's exceptions. Unknown errors are
+        treated as transient so they keep being retried.
+        """
+        return TransientError(str(error), provider=self.provider, cause=error)
@@ -0,0 +1,127 @@
+"""Record provider requests and responses, and replay them offline.
+
+A cassette is a JSON Lines file with one entry per request: provider, model,
+temperature, prompt, the SHA-256 digests of the images (not their bytes),
+and either the client's result dict or the deterministic error it raised
+(safety block, invalid input). Entries are keyed by a hash of the request,
+so the same prompt on the same images always maps to the same entry.
+
+Any client records with ``client.enable_recording(CassetteStore(path))``.
+``ReplayClient`` (replay.py) serves a cassette back through the BaseLLMClient
+interface without network access, so a whole experiment can be re-run in
+seconds to test parsing and analysis changes.
+"""
+import hashlib
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from .errors import LLMClientError, SafetyBlockedError
+
+
+def request_key(
+    provider: str,
+    model: str,
+    prompt: str,
+    image_digests: List[str],
+    temperature: float
+) -> str:
+    """Stable identifier of one request (SHA-256 over its canonical JSON form)."""
+    canonical = json.dumps(
+        [provider, model, float(temperature), prompt, list(image_digests)],
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CassetteStore:
+    """Append-only JSON Lines store of recorded requests, indexed in memory."""
+
+    def __init__(self, path: Path):
+        """
+        Open (or create) a cassette.
+
+        Args:
+            path: JSON Lines file; existing entries are loaded, new ones appended
+        """
+        self.path = Path(path)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+        if self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        # Later recordings of the same request win
+                        self._entries[entry["key"]] = entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __enter__(self) -> "CassetteStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """All entries, one per distinct request."""
+        return list(self._entries.values())
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Entry for a request key, or None."""
+        return self._entries.get(key)
+
+    def models(self) -> List[str]:
+        """Distinct (provider, model, temperature) combinations, as "provider/model@temperature"."""
+        return sorted({f"{e['provider']}/{e['model']}@{e['temperature']}" for e in self._entries.values()})
+
+    def record(
+        self,
+        request: Dict[str, Any],
+        result: Dict[str, Any] = None,
+        error: LLMClientError = None
+    ) -> Dict[str, Any]:
+        """
+        Append one request with its result or deterministic error.
+
+        Args:
+            request: Request dict from BaseLLMClient._describe_request (includes "key")
+            result: The client's result dict, if the call succeeded
+            error: The error raised, if the call failed
+
+        Returns:
+            The stored entry
+        """
+        entry = dict(request)
+        entry["recorded_at"] = datetime.now().isoformat()
+        if error is not None:
+            details = error.details() if isinstance(error, SafetyBlockedError) else {}
+            entry["error"] = {"type": error.__class__.__name__, "message": str(error), "details": details}
+        else:
+            entry["result"] = result
+
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a")
+            self._file.write(line + "\n")
+            self._file.flush()
+            self._entries[entry["key"]] = entry
+        return entry
+
+    def close(self):
+        """Close the append handle (entries stay readable)."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
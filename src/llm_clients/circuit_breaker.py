@@ -0,0 +1,154 @@
+"""Per-provider circuit breaker that pauses dispatch while a backend is failing."""
+import threading
+import time
+from typing import Dict, Any
+
+from .errors import AuthError, CircuitOpenError, LLMClientError
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after consecutive backend failures; open -> half-open after a cooldown.
+
+    While open, calls fail fast with CircuitOpenError instead of reaching the
+    API. After the cooldown one probe request is let through (half-open); its
+    success closes the circuit, its failure re-opens it with a doubled
+    cooldown. Authentication errors open the circuit until reset() once every
+    key of the provider's pool is disabled; one revoked key in a pool does not.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        provider: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        max_recovery_timeout: float = 600.0
+    ):
+        """
+        Args:
+            provider: Provider name, for messages
+            failure_threshold: Consecutive backend failures that open the circuit
+            recovery_timeout: Initial seconds the circuit stays open
+            max_recovery_timeout: Upper bound on the (doubling) open period
+        """
+        self.provider = provider
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.max_recovery_timeout = max_recovery_timeout
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_count = 0
+        self._open_until = 0.0
+        self._current_timeout = recovery_timeout
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit lets a probe through (0 if closed)."""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self._open_until - time.monotonic())
+
+    def before_call(self):
+        """
+        Check whether a request may be sent.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with a probe in flight
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                if now < self._open_until:
+                    raise CircuitOpenError(
+                        f"{self.provider} circuit open, retry in {self._open_until - now:.0f}s",
+                        provider=self.provider,
+                        retry_after=self._open_until - now
+                    )
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    raise CircuitOpenError(
+                        f"{self.provider} circuit half-open, probe in flight",
+                        provider=self.provider,
+                        retry_after=1.0
+                    )
+                self._probe_in_flight = True
+
+    def record_success(self):
+        """A request succeeded: close the circuit."""
+        with self._lock:
+            if self.state != self.CLOSED:
+                print(f"  ✓ {self.provider} circuit closed")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._current_timeout = self.recovery_timeout
+            self._probe_in_flight = False
+
+    def record_failure(self, error: LLMClientError):
+        """A request failed; only backend-health failures move the circuit."""
+        with self._lock:
+            revoked_key = isinstance(error, AuthError) and not error.all_keys_disabled
+            if not error.counts_against_backend or revoked_key:
+                # The backend answered; a per-request failure still ends a probe
+                if self.state == self.HALF_OPEN:
+                    self.state = self.CLOSED
+                    self.consecutive_failures = 0
+                self._probe_in_flight = False
+                return
+
+            self.consecutive_failures += 1
+            if isinstance(error, AuthError):
+                self._open(float("inf"), reason=str(error))
+            elif self.state == self.HALF_OPEN:
+                self._current_timeout = min(self._current_timeout * 2, self.max_recovery_timeout)
+                self._open(self._current_timeout, reason=str(error))
+            elif self.consecutive_failures >= self.failure_threshold:
+                self._open(self._current_timeout, reason=str(error))
+
+    def _open(self, timeout: float, reason: str):
+        self.state = self.OPEN
+        self.opened_count += 1
+        self._open_until = time.monotonic() + timeout
+        self._probe_in_flight = False
+        duration = "until reset" if timeout == float("inf") else f"for {timeout:.0f}s"
+        print(f"  ⚡ {self.provider} circuit open {duration} after "
+              f"{self.consecutive_failures} failure(s): {reason[:80]}")
+
+    def reset(self):
+        """Force the circuit closed (e.g. after fixing credentials)."""
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._current_timeout = self.recovery_timeout
+            self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Current state and counters."""
+        return {
+            "provider": self.provider,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "opened_count": self.opened_count,
+            "retry_after": self.retry_after(),
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(provider: str, **kwargs) -> CircuitBreaker:
+    """Process-wide circuit breaker for a provider (kwargs apply on first creation only)."""
+    with _breakers_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(provider, **kwargs)
+        return _breakers[provider]
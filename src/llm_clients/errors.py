@@ -0,0 +1,92 @@
+"""Typed errors raised by the LLM clients.
+
+Provider SDK exceptions are classified into these types so callers can tell
+failures worth retrying (rate limits, transient outages) from deterministic
+ones that will fail again with the same input (safety blocks, invalid
+requests, bad credentials).
+"""
+from typing import Any, Dict, List, Optional
+
+
+class LLMClientError(Exception):
+    """Base class for classified client errors."""
+
+    retryable = False
+    # Whether the failure says something about the backend's health (counted by the circuit breaker)
+    counts_against_backend = False
+
+    def __init__(self, message: str, provider: str = None, cause: Optional[BaseException] = None):
+        super().__init__(message)
+        self.provider = provider
+        self.cause = cause
+        self.attempts = 1
+
+
+class RateLimitedError(LLMClientError):
+    """Rate limit or quota exceeded (HTTP 429 / RESOURCE_EXHAUSTED)."""
+
+    retryable = True
+    counts_against_backend = True
+
+
+class TransientError(LLMClientError):
+    """Server error, timeout or connection problem that may succeed on retry."""
+
+    retryable = True
+    counts_against_backend = True
+
+
+class SafetyBlockedError(LLMClientError):
+    """The provider refused to answer this input (safety filter or empty candidate)."""
+
+    def __init__(
+        self,
+        message: str,
+        provider: str = None,
+        cause: Optional[BaseException] = None,
+        finish_reason: str = None,
+        block_reason: str = None,
+        safety_ratings: List[Dict[str, Any]] = None
+    ):
+        super().__init__(message, provider=provider, cause=cause)
+        self.finish_reason = finish_reason
+        self.block_reason = block_reason
+        self.safety_ratings = safety_ratings or []
+
+    def details(self) -> Dict[str, Any]:
+        """Structured description of the block, for result records."""
+        return {
+            "finish_reason": self.finish_reason,
+            "block_reason": self.block_reason,
+            "safety_ratings": self.safety_ratings,
+            "message": str(self),
+        }
+
+
+class InvalidInputError(LLMClientError):
+    """The request itself is invalid (bad image, unknown model, malformed arguments)."""
+
+
+class AuthError(LLMClientError):
+    """Authentication or permission failure; no request with these credentials will succeed."""
+
+    counts_against_backend = True
+
+    def __init__(
+        self,
+        message: str,
+        provider: str = None,
+        cause: Optional[BaseException] = None,
+        all_keys_disabled: bool = False
+    ):
+        super().__init__(message, provider=provider, cause=cause)
+        # False while other keys of the provider's pool still work (only one key was revoked)
+        self.all_keys_disabled = all_keys_disabled
+
+
+class CircuitOpenError(LLMClientError):
+    """Dispatch is paused because the provider's circuit breaker is open."""
+
+    def __init__(self, message: str, provider: str = None, retry_after: float = 0.0):
+        super().__init__(message, provider=provider)
+        self.retry_after = retry_after
@@ -3,18 +3,60 @@ import os
 from pathlib import Path
 from typing import Dict, Any, List
 from datetime import datetime
-import time
+import threading
 
-import google.generativeai as genai
-from PIL import Image
+from google.ai import generativelanguage as glm
+from google.api_core import exceptions as google_exceptions
 
 from .base import BaseLLMClient
+from .circuit_breaker import get_circuit_breaker
+from .errors import (
+    AuthError,
+    InvalidInputError,
+    LLMClientError,
+    RateLimitedError,
+    SafetyBlockedError,
+    TransientError,
+)
+from .image_io import ImageByteCache, shared_image_cache
+from .key_pool import APIKeyPool, KeyLease
+
+
+# Finish reasons of candidates that carry a usable answer
+_ANSWERED_FINISH_REASONS = {"STOP", "MAX_TOKENS"}
+
+
+def _enum_name(value) -> str:
+    """Name of a proto enum value (its str() for plain ints)."""
+    return getattr(value, "name", str(value))
+
+
+def _safety_ratings(ratings) -> List[Dict[str, Any]]:
+    """Safety ratings as plain dicts for result records."""
+    return [
+        {
+            "category": _enum_name(rating.category),
+            "probability": _enum_name(rating.probability),
+            "blocked": bool(getattr(rating, "blocked", False)),
+        }
+        for rating in ratings
+    ]
 
 
 class GeminiClient(BaseLLMClient):
     """Client for Google Gemini API."""
 
-    def __init__(self, api_key: str = None, model_name: str = None, temperature: float = 0.0):
+    provider = "gemini"
+
+    def __init__(
+        self,
+        api_key: str = None,
+        model_name: str = None,
+        temperature: float = 0.0,
+        image_cache: ImageByteCache = None,
+        api_keys: List[str] = None,
+        key_pool: APIKeyPool = None
+    ):
         """
         Initialize Gemini client.
 
@@ -22,6 +64,11 @@ class GeminiClient(BaseLLMClient):
             api_key: Google API key (if None, reads from GOOGLE_API_KEY env var)
             model_name: Gemini model identifier (if None, reads from GEMINI_MODEL env var, defaults to gemini-2.0-flash-exp)
             temperature: Sampling temperature
+            image_cache: Cache of encoded image bytes (default: process-wide shared cache)
+            api_keys: Several Google API keys to spread requests over
+            key_pool: Pre-built APIKeyPool (takes precedence over api_key/api_keys).
+                Without either, keys are read from GOOGLE_API_KEYS (comma-separated)
+                or GOOGLE_API_KEY.
         """
         # Get model name from env if not provided
         if model_name is None:
@@ -31,25 +78,49 @@ class GeminiClient(BaseLLMClient):
             print(f"Using Gemini model from parameter: {model_name}")
 
         super().__init__(model_name, temperature)
+        self.image_cache = image_cache if image_cache is not None else shared_image_cache()
+        self.circuit_breaker = get_circuit_breaker(self.provider)
+
+        # Configure API keys
+        if key_pool is not None:
+            self.key_pool = key_pool
+        elif api_keys or api_key:
+            self.key_pool = APIKeyPool(api_keys or [api_key], provider=self.provider)
+        else:
+            self.key_pool = APIKeyPool.from_env("GOOGLE_API_KEY", provider=self.provider)
 
-        # Configure API
-        api_key = api_key or os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError("GOOGLE_API_KEY not found in environment or parameters")
-
-        genai.configure(api_key=api_key)
-
-        # Initialize model
-        generation_config = {
+        # Generation settings; the API wants a full resource name
+        self.model_path = model_name if model_name.startswith(("models/", "tunedModels/")) else f"models/{model_name}"
+        self.generation_config = {
             "temperature": self.temperature,
             "top_p": 0.95,
             "top_k": 40,
             "max_output_tokens": 8192,
         }
 
-        self.model = genai.GenerativeModel(
-            model_name=self.model_name,
-            generation_config=generation_config
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+
+    def _client_for(self, api_key: str) -> glm.GenerativeServiceClient:
+        """
+        Generative Language API client bound to one API key.
+
+        The API key is part of the client options, so each key gets its own
+        service client.
+        """
+        with self._clients_lock:
+            if api_key not in self._clients:
+                self._clients[api_key] = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+            return self._clients[api_key]
+
+    def _request(self, prompt: str, image_paths: List[Path]) -> glm.GenerateContentRequest:
+        """generateContent request with the images (encoded bytes) followed by the prompt."""
+        parts = [glm.Part(inline_data=glm.Blob(**self.image_cache.get_part(Path(path)))) for path in image_paths]
+        parts.append(glm.Part(text=prompt))
+        return glm.GenerateContentRequest(
+            model=self.model_path,
+            contents=[glm.Content(role="user", parts=parts)],
+            generation_config=glm.GenerationConfig(**self.generation_config)
         )
 
     def query_with_images(
@@ -71,41 +142,72 @@ class GeminiClient(BaseLLMClient):
         Returns:
             Dict with response data and metadata
         """
-        # Load images
-        images = []
-        for img_path in image_paths:
-            if not img_path.exists():
-                raise FileNotFoundError(f"Image not found: {img_path}")
-            images.append(Image.open(img_path))
-
         # Prepare content: [image1, image2, ..., prompt]
-        content = images + [prompt]
-
-        # Try with retries
-        last_error = None
-        for attempt in range(retry_attempts):
-            try:
-                timestamp = datetime.now().isoformat()
-                response = self.model.generate_content(content)
-
-                return {
-                    "response": response.text,
-                    "model": self.model_name,
-                    "timestamp": timestamp,
-                    "metadata": {
-                        "prompt_tokens": response.usage_metadata.prompt_token_count if hasattr(response, 'usage_metadata') else None,
-                        "completion_tokens": response.usage_metadata.candidates_token_count if hasattr(response, 'usage_metadata') else None,
-                        "total_tokens": response.usage_metadata.total_token_count if hasattr(response, 'usage_metadata') else None,
-                    }
+        # Images are sent as encoded bytes; no decoded pixel buffers or open files are held
+        request = self._request(prompt, image_paths)
+
+        def send(lease: KeyLease) -> Dict[str, Any]:
+            timestamp = datetime.now().isoformat()
+            # No client-side retries; they are handled by _call_with_retries
+            response = self._client_for(lease.key).generate_content(request=request, retry=None)
+
+            usage = response.usage_metadata if hasattr(response, 'usage_metadata') else None
+            return {
+                "response": self._response_text(response),
+                "model": self.model_name,
+                "timestamp": timestamp,
+                "metadata": {
+                    "prompt_tokens": usage.prompt_token_count if usage else None,
+                    "completion_tokens": usage.candidates_token_count if usage else None,
+                    "total_tokens": usage.total_token_count if usage else None,
                 }
+            }
+
+        return self._recorded(
+            prompt, image_paths, lambda: self._call_with_retries(send, retry_attempts, retry_delay)
+        )
+
+    def _response_text(self, response) -> str:
+        """
+        Text of the first candidate.
 
-            except Exception as e:
-                last_error = e
-                if attempt < retry_attempts - 1:
-                    time.sleep(retry_delay * (attempt + 1))  # Exponential backoff
-                    continue
-                else:
-                    raise Exception(f"Failed after {retry_attempts} attempts: {str(last_error)}")
+        Blocked prompts and candidates without an answer are reported as a
+        SafetyBlockedError carrying the block or finish reason.
+        """
+        feedback = getattr(response, "prompt_feedback", None)
+        block_reason = _enum_name(feedback.block_reason) if feedback is not None and feedback.block_reason else None
+        candidates = list(response.candidates)
+        if block_reason or not candidates:
+            raise SafetyBlockedError(
+                f"Prompt blocked: {block_reason or 'no candidates returned'}",
+                provider=self.provider,
+                block_reason=block_reason or "NO_CANDIDATES",
+                safety_ratings=_safety_ratings(feedback.safety_ratings if feedback is not None else [])
+            )
+
+        candidate = candidates[0]
+        finish_reason = _enum_name(candidate.finish_reason)
+        text = "".join(part.text for part in candidate.content.parts if getattr(part, "text", None))
+        if finish_reason not in _ANSWERED_FINISH_REASONS or not text:
+            raise SafetyBlockedError(
+                f"No answer: finish reason {finish_reason}" + ("" if text else " (empty candidate)"),
+                provider=self.provider,
+                finish_reason=finish_reason,
+                safety_ratings=_safety_ratings(candidate.safety_ratings)
+            )
+        return text
+
+    def _classify_error(self, error: Exception) -> LLMClientError:
+        """Map Google API and SDK exceptions to typed client errors."""
+        message = str(error)
+        if isinstance(error, google_exceptions.ResourceExhausted):
+            return RateLimitedError(message, provider=self.provider, cause=error)
+        if isinstance(error, (google_exceptions.Unauthenticated, google_exceptions.PermissionDenied)):
+            return AuthError(message, provider=self.provider, cause=error)
+        if isinstance(error, (google_exceptions.InvalidArgument, google_exceptions.NotFound,
+                              google_exceptions.FailedPrecondition)):
+            return InvalidInputError(message, provider=self.provider, cause=error)
+        return TransientError(message, provider=self.provider, cause=error)
 
     def test_connection(self) -> bool:
         """
@@ -116,8 +218,10 @@ class GeminiClient(BaseLLMClient):
         """
         try:
             # Simple text-only test
-            response = self.model.generate_content("Say 'OK' if you can read this.")
-            return "OK" in response.text or "ok" in response.text.lower()
+            response = self._client_for(self.key_pool.keys[0]).generate_content(
+                request=self._request("Say 'OK' if you can read this.", [])
+            )
+            return "ok" in self._response_text(response).lower()
         except Exception as e:
             print(f"Connection test failed: {e}")
             return False
@@ -0,0 +1,95 @@
+"""Hedged requests: duplicate a slow request and take whichever answer arrives first."""
+import threading
+from collections import deque
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+
+class HedgingPolicy:
+    """
+    When to send a duplicate request, and how many duplicates are allowed.
+
+    A request that has not returned after the configured latency quantile
+    (p95 by default) of recently observed latencies gets one duplicate,
+    usually on a different API key. Duplicates are capped at a fraction of
+    all requests so that a slow provider cannot double the load.
+    """
+
+    def __init__(
+        self,
+        quantile: float = 0.95,
+        budget: float = 0.10,
+        min_samples: int = 20,
+        window: int = 500,
+        min_delay: float = 0.0
+    ):
+        """
+        Args:
+            quantile: Latency quantile after which a request is hedged
+            budget: Maximum duplicates as a fraction of primary requests
+            min_samples: Latencies needed before hedging starts
+            window: Number of recent latencies the quantile is computed over
+            min_delay: Never hedge earlier than this many seconds
+        """
+        if not 0 < quantile < 1:
+            raise ValueError(f"quantile must be in (0, 1), got {quantile}")
+        if budget < 0:
+            raise ValueError(f"budget must be non-negative, got {budget}")
+
+        self.quantile = quantile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    def record_latency(self, seconds: float):
+        """Record the latency of a completed request (primary or hedge)."""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def start_request(self) -> Optional[float]:
+        """
+        Register a primary request.
+
+        Returns:
+            Seconds to wait before hedging, or None if this request may not be hedged
+        """
+        with self._lock:
+            self.requests += 1
+            if len(self._latencies) < self.min_samples:
+                return None
+            if self.hedges_sent + 1 > self.budget * self.requests:
+                return None
+            return max(self.min_delay, float(np.quantile(self._latencies, self.quantile)))
+
+    def record_hedge(self):
+        """Count a sent duplicate."""
+        with self._lock:
+            self.hedges_sent += 1
+
+    def record_hedge_win(self):
+        """Count a duplicate that finished before its primary."""
+        with self._lock:
+            self.hedges_won += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hedging counters and the current hedge delay."""
+        with self._lock:
+            delay = (
+                float(np.quantile(self._latencies, self.quantile))
+                if len(self._latencies) >= self.min_samples else None
+            )
+            return {
+                "requests": self.requests,
+                "hedges_sent": self.hedges_sent,
+                "hedges_won": self.hedges_won,
+                "hedge_rate": self.hedges_sent / self.requests if self.requests else 0.0,
+                "win_rate": self.hedges_won / self.hedges_sent if self.hedges_sent else 0.0,
+                "hedge_delay": delay,
+            }
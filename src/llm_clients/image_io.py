@@ -0,0 +1,173 @@
+"""Bounded, thread-safe cache of encoded image bytes for API uploads.
+
+Clients send the encoded file bytes (JPEG/PNG as stored on disk) instead of
+decoded PIL images. Files are read with a context-managed handle that is
+closed before the call returns, and the cache evicts least-recently-used
+entries once its byte budget is exceeded, so memory and file descriptors
+stay flat however many queries are issued.
+"""
+import base64
+import hashlib
+import mimetypes
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from ..profiling import span
+
+
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+_MIME_OVERRIDES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".webp": "image/webp",
+}
+
+
+def guess_mime_type(path: Path) -> str:
+    """MIME type for an image file, based on its extension."""
+    suffix = Path(path).suffix.lower()
+    if suffix in _MIME_OVERRIDES:
+        return _MIME_OVERRIDES[suffix]
+    mime_type, _ = mimetypes.guess_type(str(path))
+    if mime_type is None or not mime_type.startswith("image/"):
+        raise ValueError(f"Unsupported image type: {path}")
+    return mime_type
+
+
+class ImageByteCache:
+    """LRU cache of encoded image bytes, bounded by total size."""
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Total byte budget; 0 disables caching (every call reads the file)
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], bytes]]" = OrderedDict()
+        self._size = 0
+        self._digests: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size(self) -> int:
+        """Bytes currently held."""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, path: Path) -> bytes:
+        """
+        Encoded bytes of an image file.
+
+        Entries are keyed by resolved path and invalidated when the file's
+        mtime or size changes.
+
+        Raises:
+            FileNotFoundError: If the image does not exist
+        """
+        path = Path(path)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Image not found: {path}")
+        key = str(path.resolve())
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        with span("image_load"), open(path, "rb") as f:
+            data = f.read()
+
+        if self.max_bytes and len(data) <= self.max_bytes:
+            with self._lock:
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self._size -= len(old[1])
+                self._entries[key] = (signature, data)
+                self._size += len(data)
+                while self._size > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._size -= len(evicted)
+        return data
+
+    def digest(self, path: Path) -> str:
+        """
+        SHA-256 hex digest of an image file's bytes.
+
+        Digests are remembered per path (and file signature) even after the
+        bytes are evicted, so hashing a file costs one read.
+
+        Raises:
+            FileNotFoundError: If the image does not exist
+        """
+        path = Path(path)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Image not found: {path}")
+        key = str(path.resolve())
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._digests.get(key)
+            if entry is not None and entry[0] == signature:
+                return entry[1]
+
+        digest = hashlib.sha256(self.get(path)).hexdigest()
+        with self._lock:
+            self._digests[key] = (signature, digest)
+        return digest
+
+    def prime_digests(self, signatures: Dict[str, Tuple[Tuple[int, int], str]]):
+        """
+        Seed digests computed elsewhere (e.g. DatasetManifest.signatures()).
+
+        Args:
+            signatures: {resolved path: ((mtime_ns, size), sha256)}; an entry
+                whose signature no longer matches the file is ignored by digest()
+        """
+        with self._lock:
+            self._digests.update(signatures)
+
+    def get_part(self, path: Path) -> Dict[str, Any]:
+        """Image as an inline-data part ({"mime_type", "data"}) for multimodal requests."""
+        return {"mime_type": guess_mime_type(path), "data": self.get(path)}
+
+    def get_base64(self, path: Path) -> Tuple[str, str]:
+        """Image as (mime_type, base64 string) for JSON-based APIs."""
+        return guess_mime_type(path), base64.b64encode(self.get(path)).decode("ascii")
+
+    def clear(self):
+        """Drop all cached bytes."""
+        with self._lock:
+            self._entries.clear()
+            self._digests.clear()
+            self._size = 0
+
+
+_shared_cache: Optional[ImageByteCache] = None
+_shared_lock = threading.Lock()
+
+
+def shared_image_cache() -> ImageByteCache:
+    """Process-wide cache shared by all clients, so the byte budget is global."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ImageByteCache()
+        return _shared_cache
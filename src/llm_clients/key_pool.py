@@ -0,0 +1,212 @@
+"""Pool of API keys with per-key accounting and least-loaded selection."""
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+from .errors import AuthError, RateLimitedError
+
+
+class KeyLease:
+    """State of one API key in a pool."""
+
+    def __init__(self, key: str, requests_per_minute: Optional[int] = None):
+        self.key = key
+        self.key_id = f"...{key[-4:]}" if len(key) > 4 else "..."
+        self.requests_per_minute = requests_per_minute
+
+        self.in_flight = 0
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.consecutive_rate_limits = 0
+        self.parked_until = 0.0
+        self.park_reason = None
+        self._recent = deque()
+
+    def recent_requests(self, now: float) -> int:
+        """Requests started in the last 60 seconds."""
+        while self._recent and self._recent[0] <= now - 60.0:
+            self._recent.popleft()
+        return len(self._recent)
+
+    def available(self, now: float) -> bool:
+        """Not parked and below its per-minute quota."""
+        if self.parked_until > now:
+            return False
+        if self.requests_per_minute is not None and self.recent_requests(now) >= self.requests_per_minute:
+            return False
+        return True
+
+    def next_available(self, now: float) -> float:
+        """Earliest time this key can be used again."""
+        ready = max(now, self.parked_until)
+        if self.requests_per_minute is not None and self.recent_requests(now) >= self.requests_per_minute:
+            ready = max(ready, self._recent[0] + 60.0)
+        return ready
+
+
+class APIKeyPool:
+    """
+    Thread-safe pool of credentials for one provider.
+
+    acquire() hands out the least-loaded usable key (fewest in-flight
+    requests, then fewest requests in the last minute). Keys that hit a rate
+    limit are parked with exponential backoff; keys that fail authentication
+    are parked permanently.
+    """
+
+    def __init__(
+        self,
+        keys: List[str],
+        provider: str = "",
+        requests_per_minute: Optional[int] = None,
+        rate_limit_cooldown: float = 30.0,
+        max_cooldown: float = 3600.0
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            keys: API keys (duplicates and empty strings are ignored)
+            provider: Provider name, for messages
+            requests_per_minute: Per-key request quota (None for unlimited)
+            rate_limit_cooldown: Initial park duration after a rate-limit error, in seconds
+            max_cooldown: Upper bound on the park duration
+        """
+        unique_keys = list(dict.fromkeys(k.strip() for k in keys if k and k.strip()))
+        if not unique_keys:
+            raise ValueError(f"No API keys given for {provider or 'provider'}")
+
+        self.provider = provider
+        self.rate_limit_cooldown = rate_limit_cooldown
+        self.max_cooldown = max_cooldown
+        self._leases = [KeyLease(k, requests_per_minute) for k in unique_keys]
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_env(cls, key_var: str, pool_var: str = None, **kwargs) -> "APIKeyPool":
+        """
+        Build a pool from environment variables.
+
+        Args:
+            key_var: Single-key variable (e.g. GOOGLE_API_KEY)
+            pool_var: Comma-separated key list variable (default: key_var + "S")
+        """
+        pool_var = pool_var or f"{key_var}S"
+        keys = [k for k in os.getenv(pool_var, "").split(",") if k.strip()]
+        if not keys and os.getenv(key_var):
+            keys = [os.getenv(key_var)]
+        if not keys:
+            raise ValueError(f"{key_var} not found in environment or parameters")
+        return cls(keys, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self._leases)
+
+    @property
+    def keys(self) -> List[str]:
+        return [lease.key for lease in self._leases]
+
+    def acquire(self, timeout: Optional[float] = None) -> KeyLease:
+        """
+        Take the least-loaded usable key, waiting while all keys are parked.
+
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Raises:
+            AuthError: If every key is permanently disabled
+            RateLimitedError: If no key becomes available within the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                usable = [lease for lease in self._leases if lease.available(now)]
+                if usable:
+                    lease = min(usable, key=lambda l: (l.in_flight, l.recent_requests(now), l.requests))
+                    lease.in_flight += 1
+                    lease.requests += 1
+                    lease._recent.append(now)
+                    return lease
+
+                wake = min(lease.next_available(now) for lease in self._leases)
+                if wake == float("inf"):
+                    raise AuthError(f"All {self.provider} API keys are disabled", provider=self.provider,
+                                    all_keys_disabled=True)
+                if deadline is not None:
+                    if now >= deadline:
+                        raise RateLimitedError(
+                            f"No {self.provider} API key available within {timeout}s", provider=self.provider
+                        )
+                    wake = min(wake, deadline)
+                self._condition.wait(max(0.0, wake - now))
+
+    def release(
+        self,
+        lease: KeyLease,
+        prompt_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None,
+        error: bool = False
+    ):
+        """Return a key after a request and record its usage."""
+        with self._condition:
+            lease.in_flight -= 1
+            lease.prompt_tokens += prompt_tokens or 0
+            lease.completion_tokens += completion_tokens or 0
+            if error:
+                lease.errors += 1
+            else:
+                lease.consecutive_rate_limits = 0
+            self._condition.notify_all()
+
+    def park_rate_limited(self, lease: KeyLease, reason: str = "rate limited"):
+        """Park a key after a rate-limit/quota error, doubling the cooldown on repeats."""
+        with self._condition:
+            lease.rate_limited += 1
+            lease.consecutive_rate_limits += 1
+            cooldown = min(
+                self.rate_limit_cooldown * 2 ** (lease.consecutive_rate_limits - 1),
+                self.max_cooldown
+            )
+            lease.parked_until = max(lease.parked_until, time.monotonic() + cooldown)
+            lease.park_reason = reason
+            print(f"  ⏸ Parking {self.provider} key {lease.key_id} for {cooldown:.0f}s ({reason})")
+            self._condition.notify_all()
+
+    def disable(self, lease: KeyLease, reason: str = "invalid key"):
+        """Park a key permanently (e.g. authentication failure)."""
+        with self._condition:
+            lease.parked_until = float("inf")
+            lease.park_reason = reason
+            print(f"  ⛔ Disabling {self.provider} key {lease.key_id} ({reason})")
+            self._condition.notify_all()
+
+    def enabled(self) -> int:
+        """Number of keys that are not permanently disabled (parked keys count)."""
+        with self._condition:
+            return sum(lease.parked_until != float("inf") for lease in self._leases)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-key accounting (keys are masked)."""
+        now = time.monotonic()
+        with self._condition:
+            return [
+                {
+                    "key_id": lease.key_id,
+                    "requests": lease.requests,
+                    "requests_last_minute": lease.recent_requests(now),
+                    "in_flight": lease.in_flight,
+                    "prompt_tokens": lease.prompt_tokens,
+                    "completion_tokens": lease.completion_tokens,
+                    "errors": lease.errors,
+                    "rate_limited": lease.rate_limited,
+                    "parked": lease.parked_until > now,
+                    "park_reason": lease.park_reason if lease.parked_until > now else None,
+                }
+                for lease in self._leases
+            ]
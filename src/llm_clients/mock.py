@@ -0,0 +1,144 @@
+"""Offline client with configurable latency, for testing the pipeline without API quota."""
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Callable, Optional
+from datetime import datetime
+
+from .base import BaseLLMClient
+from .errors import SafetyBlockedError, TransientError
+from .image_io import ImageByteCache
+from .key_pool import APIKeyPool, KeyLease
+
+
+class MockClient(BaseLLMClient):
+    """
+    Client that answers locally after a simulated delay.
+
+    Latencies are lognormal around a median, with an optional heavy tail:
+    with probability tail_probability a request takes tail_multiplier times
+    longer, mimicking the multimodal stragglers seen in practice.
+    """
+
+    provider = "mock"
+
+    def __init__(
+        self,
+        model_name: str = "mock",
+        temperature: float = 0.0,
+        median_latency: float = 1.0,
+        latency_sigma: float = 0.3,
+        tail_probability: float = 0.0,
+        tail_multiplier: float = 8.0,
+        failure_rate: float = 0.0,
+        block_rate: float = 0.0,
+        responder: Optional[Callable[[str, List[Path]], str]] = None,
+        num_keys: int = 1,
+        seed: Optional[int] = None,
+        image_cache: Optional[ImageByteCache] = None
+    ):
+        """
+        Initialize mock client.
+
+        Args:
+            model_name: Name reported in results
+            temperature: Recorded only
+            median_latency: Median simulated latency in seconds
+            latency_sigma: Lognormal shape parameter of the latency
+            tail_probability: Probability of a straggler request
+            tail_multiplier: Latency multiplier of stragglers
+            failure_rate: Probability that a request raises an error
+            block_rate: Probability that a request is refused as a safety block
+            responder: Function (prompt, image_paths) -> response text
+                (default: random "ANSWER: YES/NO" with a certainty line)
+            num_keys: Number of fake API keys in the pool
+            seed: Random seed for latencies, failures and default answers
+            image_cache: If given, each query encodes its images through this cache
+                like the real clients do (by default images are not read, so
+                placeholder paths work)
+        """
+        super().__init__(model_name, temperature)
+        self.median_latency = median_latency
+        self.latency_sigma = latency_sigma
+        self.tail_probability = tail_probability
+        self.tail_multiplier = tail_multiplier
+        self.failure_rate = failure_rate
+        self.block_rate = block_rate
+        self.responder = responder
+        self.key_pool = APIKeyPool([f"mock-key-{i}" for i in range(num_keys)], provider=self.provider)
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.image_cache = image_cache
+
+    def sample_latency(self) -> float:
+        """Draw one simulated latency in seconds."""
+        with self._rng_lock:
+            latency = self.median_latency * self._rng.lognormvariate(0.0, self.latency_sigma)
+            if self._rng.random() < self.tail_probability:
+                latency *= self.tail_multiplier
+        return latency
+
+    def _default_response(self) -> str:
+        with self._rng_lock:
+            answer = self._rng.choice(["YES", "NO"])
+            certainty = self._rng.choice(["HIGH", "MEDIUM", "LOW"])
+        return f"ANSWER: {answer}\nCERTAINTY: {certainty}\n\nMock reasoning."
+
+    def query_with_images(
+        self,
+        prompt: str,
+        image_paths: List[Path],
+        retry_attempts: int = 3,
+        retry_delay: float = 0.0
+    ) -> Dict[str, Any]:
+        """
+        Answer after a simulated delay.
+
+        Args:
+            prompt: The text prompt
+            image_paths: List of paths to image files (read only with an image_cache)
+            retry_attempts: Number of retry attempts on simulated failures
+            retry_delay: Delay between retries in seconds
+
+        Returns:
+            Dict with response data and metadata
+        """
+        # Same upload path as GeminiClient: one inline-data part per image
+        content = []
+        if self.image_cache is not None:
+            content = [self.image_cache.get_part(Path(path)) for path in image_paths]
+
+        def send(lease: KeyLease) -> Dict[str, Any]:
+            timestamp = datetime.now().isoformat()
+            time.sleep(self.sample_latency())
+            with self._rng_lock:
+                failed = self._rng.random() < self.failure_rate
+                blocked = not failed and self._rng.random() < self.block_rate
+            if failed:
+                raise TransientError("Simulated failure", provider=self.provider)
+            if blocked:
+                raise SafetyBlockedError("Simulated safety block", provider=self.provider, finish_reason="SAFETY")
+
+            text = self.responder(prompt, image_paths) if self.responder else self._default_response()
+            prompt_tokens = len(prompt) // 4 + 258 * len(image_paths)
+            completion_tokens = len(text) // 4
+            return {
+                "response": text,
+                "model": self.model_name,
+                "timestamp": timestamp,
+                "metadata": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                    "image_bytes": sum(len(part["data"]) for part in content),
+                }
+            }
+
+        return self._recorded(
+            prompt, image_paths, lambda: self._call_with_retries(send, retry_attempts, retry_delay)
+        )
+
+    def test_connection(self) -> bool:
+        """The mock backend is always reachable."""
+        return True
@@ -0,0 +1,178 @@
+"""OpenAI API client for multi-modal queries."""
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Any, List
+from datetime import datetime
+
+import openai
+
+from .base import BaseLLMClient
+from .circuit_breaker import get_circuit_breaker
+from .errors import (
+    AuthError,
+    InvalidInputError,
+    LLMClientError,
+    RateLimitedError,
+    SafetyBlockedError,
+    TransientError,
+)
+from .image_io import ImageByteCache, shared_image_cache
+from .key_pool import APIKeyPool, KeyLease
+from .transport import HTTPTransportConfig, shared_http_client
+
+
+class OpenAIClient(BaseLLMClient):
+    """Client for OpenAI chat completions API."""
+
+    provider = "openai"
+
+    def __init__(
+        self,
+        api_key: str = None,
+        model_name: str = None,
+        temperature: float = 0.0,
+        image_cache: ImageByteCache = None,
+        api_keys: List[str] = None,
+        key_pool: APIKeyPool = None,
+        transport: HTTPTransportConfig = None,
+        max_tokens: int = 8192
+    ):
+        """
+        Initialize OpenAI client.
+
+        Args:
+            api_key: OpenAI API key (if None, reads from OPENAI_API_KEYS or OPENAI_API_KEY env var)
+            model_name: OpenAI model identifier (if None, reads from OPENAI_MODEL env var, defaults to gpt-4o)
+            temperature: Sampling temperature
+            image_cache: Cache of encoded image bytes (default: process-wide shared cache)
+            api_keys: Several OpenAI API keys to spread requests over
+            key_pool: Pre-built APIKeyPool (takes precedence over api_key/api_keys)
+            transport: Connection pool settings (default: shared default pool)
+            max_tokens: Maximum tokens in the response
+        """
+        if model_name is None:
+            model_name = os.getenv("OPENAI_MODEL", "gpt-4o")
+            print(f"Using OpenAI model from environment: {model_name}")
+        else:
+            print(f"Using OpenAI model from parameter: {model_name}")
+
+        super().__init__(model_name, temperature)
+        self.image_cache = image_cache if image_cache is not None else shared_image_cache()
+        self.max_tokens = max_tokens
+        self.circuit_breaker = get_circuit_breaker(self.provider)
+
+        if key_pool is not None:
+            self.key_pool = key_pool
+        elif api_keys or api_key:
+            self.key_pool = APIKeyPool(api_keys or [api_key], provider=self.provider)
+        else:
+            self.key_pool = APIKeyPool.from_env("OPENAI_API_KEY", provider=self.provider)
+
+        # All keys share one connection pool; retries are handled by _call_with_retries
+        self.http_client = shared_http_client(transport)
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+
+    def _client_for(self, api_key: str) -> openai.OpenAI:
+        """SDK client bound to one API key, on the shared HTTP transport."""
+        with self._clients_lock:
+            if api_key not in self._clients:
+                self._clients[api_key] = openai.OpenAI(
+                    api_key=api_key,
+                    http_client=self.http_client,
+                    max_retries=0
+                )
+            return self._clients[api_key]
+
+    def query_with_images(
+        self,
+        prompt: str,
+        image_paths: List[Path],
+        retry_attempts: int = 3,
+        retry_delay: float = 1.0
+    ) -> Dict[str, Any]:
+        """
+        Send a prompt with images to OpenAI.
+
+        Args:
+            prompt: The text prompt
+            image_paths: List of paths to image files
+            retry_attempts: Number of retry attempts on failure
+            retry_delay: Delay between retries in seconds
+
+        Returns:
+            Dict with response data and metadata
+        """
+        # Prepare content: [image1, image2, ..., prompt]
+        content = []
+        for img_path in image_paths:
+            mime_type, data = self.image_cache.get_base64(Path(img_path))
+            content.append({"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{data}"}})
+        content.append({"type": "text", "text": prompt})
+
+        def send(lease: KeyLease) -> Dict[str, Any]:
+            timestamp = datetime.now().isoformat()
+            response = self._client_for(lease.key).chat.completions.create(
+                model=self.model_name,
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                messages=[{"role": "user", "content": content}]
+            )
+
+            choice = response.choices[0]
+            text = choice.message.content or ""
+            if choice.finish_reason == "content_filter" or not text:
+                refusal = getattr(choice.message, "refusal", None)
+                raise SafetyBlockedError(
+                    refusal or f"No answer: finish reason {choice.finish_reason}" + ("" if text else " (empty response)"),
+                    provider=self.provider,
+                    finish_reason=choice.finish_reason
+                )
+
+            usage = response.usage
+            return {
+                "response": text,
+                "model": self.model_name,
+                "timestamp": timestamp,
+                "metadata": {
+                    "prompt_tokens": usage.prompt_tokens if usage else None,
+                    "completion_tokens": usage.completion_tokens if usage else None,
+                    "total_tokens": usage.total_tokens if usage else None,
+                }
+            }
+
+        return self._recorded(
+            prompt, image_paths, lambda: self._call_with_retries(send, retry_attempts, retry_delay)
+        )
+
+    def _classify_error(self, error: Exception) -> LLMClientError:
+        """Map OpenAI SDK exceptions to typed client errors."""
+        message = str(error)
+        if isinstance(error, openai.RateLimitError):
+            return RateLimitedError(message, provider=self.provider, cause=error)
+        if isinstance(error, (openai.AuthenticationError, openai.PermissionDeniedError)):
+            return AuthError(message, provider=self.provider, cause=error)
+        if isinstance(error, openai.BadRequestError) and "content_policy" in message:
+            return SafetyBlockedError(message, provider=self.provider, cause=error)
+        if isinstance(error, (openai.BadRequestError, openai.NotFoundError, openai.UnprocessableEntityError)):
+            return InvalidInputError(message, provider=self.provider, cause=error)
+        return TransientError(message, provider=self.provider, cause=error)
+
+    def test_connection(self) -> bool:
+        """
+        Test OpenAI API connection with a simple query.
+
+        Returns:
+            True if connection successful, False otherwise
+        """
+        try:
+            response = self._client_for(self.key_pool.keys[0]).chat.completions.create(
+                model=self.model_name,
+                max_tokens=16,
+                messages=[{"role": "user", "content": "Say 'OK' if you can read this."}]
+            )
+            return "ok" in (response.choices[0].message.content or "").lower()
+        except Exception as e:
+            print(f"Connection test failed: {e}")
+            return False
@@ -0,0 +1,129 @@
+"""Offline client that serves responses recorded in a cassette."""
+import json
+from pathlib import Path
+from typing import Dict, Any, List
+
+from .base import BaseLLMClient
+from .cassette import CassetteStore, request_key
+from .errors import InvalidInputError, SafetyBlockedError
+from .image_io import ImageByteCache, shared_image_cache
+
+
+class ReplayMissError(InvalidInputError):
+    """The cassette has no entry for this request."""
+
+
+# Errors that are a property of the input and therefore worth replaying
+_REPLAYABLE_ERRORS = {cls.__name__: cls for cls in (SafetyBlockedError, InvalidInputError)}
+
+
+class ReplayClient(BaseLLMClient):
+    """Serve recorded responses from a cassette; no network, no API keys."""
+
+    provider = "replay"
+
+    def __init__(
+        self,
+        cassette: CassetteStore,
+        model_name: str = None,
+        recorded_provider: str = None,
+        temperature: float = None,
+        image_cache: ImageByteCache = None
+    ):
+        """
+        Initialize replay client.
+
+        Args:
+            cassette: Recorded requests
+            model_name: Recorded model to replay (default: the cassette's only model)
+            recorded_provider: Provider of the recording (default: the cassette's only provider)
+            temperature: Recorded temperature (default: the cassette's only temperature)
+            image_cache: Cache used to hash images (default: process-wide shared cache)
+
+        Raises:
+            ValueError: If a default is ambiguous because the cassette holds several recordings
+        """
+        self.replay_cassette = cassette
+        entries = cassette.entries()
+        recorded_provider = recorded_provider or self._only(entries, "provider")
+        model_name = model_name or self._only(entries, "model")
+        if temperature is None:
+            temperature = self._only(entries, "temperature")
+
+        super().__init__(model_name, temperature)
+        self.recorded_provider = recorded_provider
+        self.image_cache = image_cache if image_cache is not None else shared_image_cache()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _only(entries: List[Dict[str, Any]], field: str):
+        values = {entry[field] for entry in entries}
+        if len(values) != 1:
+            raise ValueError(f"Cassette has {len(values)} distinct {field} values; pass {field} explicitly")
+        return values.pop()
+
+    def _key(self, prompt: str, image_paths: List[Path]) -> str:
+        return request_key(
+            self.recorded_provider,
+            self.model_name,
+            prompt,
+            self._image_digests(image_paths),
+            self.temperature
+        )
+
+    def has_recording(self, prompt: str, image_paths: List[Path]) -> bool:
+        """Whether the cassette can answer this request (does not count as a hit or miss)."""
+        return self.replay_cassette.lookup(self._key(prompt, image_paths)) is not None
+
+    def query_with_images(
+        self,
+        prompt: str,
+        image_paths: List[Path],
+        retry_attempts: int = 1,
+        retry_delay: float = 0.0
+    ) -> Dict[str, Any]:
+        """
+        Return the recorded result for this exact prompt and images.
+
+        Args:
+            prompt: The text prompt
+            image_paths: List of paths to image files (hashed, not sent)
+            retry_attempts: Ignored
+            retry_delay: Ignored
+
+        Returns:
+            The recorded result dict, with "replayed": True in its metadata
+
+        Raises:
+            ReplayMissError: If the request was never recorded
+            SafetyBlockedError, InvalidInputError: If that is what the recording holds
+        """
+        key = self._key(prompt, image_paths)
+        entry = self.replay_cassette.lookup(key)
+        if entry is None:
+            self.misses += 1
+            raise ReplayMissError(f"No recorded response for this request ({key[:12]})", provider=self.provider)
+        self.hits += 1
+
+        if "error" in entry:
+            error = entry["error"]
+            error_class = _REPLAYABLE_ERRORS.get(error["type"], InvalidInputError)
+            if error_class is SafetyBlockedError:
+                details = error.get("details", {})
+                raise SafetyBlockedError(
+                    error["message"],
+                    provider=self.recorded_provider,
+                    finish_reason=details.get("finish_reason"),
+                    block_reason=details.get("block_reason"),
+                    safety_ratings=details.get("safety_ratings")
+                )
+            raise error_class(error["message"], provider=self.recorded_provider)
+
+        result = json.loads(json.dumps(entry["result"]))  # Callers may mutate the result
+        result.setdefault("metadata", {})["replayed"] = True
+        return result
+
+    def test_connection(self) -> bool:
+        """A replay client works as long as the cassette has entries."""
+        return len(self.replay_cassette) > 0
@@ -0,0 +1,91 @@
+"""Shared, configurable HTTP transport for the provider clients.
+
+Provider SDKs create their own connection pools by default, one per SDK
+client object. Clients built here share one httpx.Client per transport
+configuration instead, so TCP/TLS connections are reused across clients and
+API keys, kept alive between requests and, where the server supports it,
+multiplexed over HTTP/2.
+
+Gemini is not routed through httpx: its SDK talks gRPC, which already
+multiplexes all requests of a client over one persistent HTTP/2 channel.
+"""
+import threading
+from typing import Dict, Optional
+
+import httpx
+
+
+class HTTPTransportConfig:
+    """Connection pool settings for the shared HTTP client."""
+
+    def __init__(
+        self,
+        max_connections: int = 32,
+        max_keepalive_connections: int = 16,
+        keepalive_expiry: float = 60.0,
+        http2: bool = True,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 600.0
+    ):
+        """
+        Args:
+            max_connections: Maximum concurrent connections per pool
+            max_keepalive_connections: Idle connections kept open for reuse
+            keepalive_expiry: Seconds an idle connection is kept open
+            http2: Negotiate HTTP/2 where the server supports it (requires the h2 package)
+            connect_timeout: Timeout for establishing a connection, in seconds
+            read_timeout: Timeout for reading a response, in seconds (multimodal calls can be slow)
+        """
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+    def key(self) -> tuple:
+        """Hashable identity of the configuration."""
+        return (
+            self.max_connections, self.max_keepalive_connections, self.keepalive_expiry,
+            self.http2, self.connect_timeout, self.read_timeout,
+        )
+
+    def build_client(self) -> httpx.Client:
+        """Create a new pooled httpx.Client with these settings."""
+        return httpx.Client(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+        )
+
+
+_shared_clients: Dict[tuple, httpx.Client] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_http_client(config: Optional[HTTPTransportConfig] = None) -> httpx.Client:
+    """
+    Process-wide httpx.Client for a transport configuration.
+
+    All clients asking for the same configuration get the same connection
+    pool. The client lives until close_shared_http_clients() is called.
+    """
+    config = config or HTTPTransportConfig()
+    with _shared_lock:
+        client = _shared_clients.get(config.key())
+        if client is None or client.is_closed:
+            client = config.build_client()
+            _shared_clients[config.key()] = client
+        return client
+
+
+def close_shared_http_clients():
+    """Close all shared connection pools."""
+    with _shared_lock:
+        for client in _shared_clients.values():
+            client.close()
+        _shared_clients.clear()
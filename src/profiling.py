@@ -0,0 +1,279 @@
+"""Opt-in CPU / memory profiling with named timing spans.
+
+Hot sections are wrapped in span("name") (image load, image render, prompt
+render, API call, result save, response parsing). Spans cost a flag check
+until a Profiler is running; while one runs they record count, total and
+maximum time per span path (nested spans are joined with ";", e.g.
+"api_call;image_load"), and in memory mode the net bytes allocated.
+
+A Profiler writes, into its output directory:
+
+- <name>.pstats: cProfile statistics of the main thread (cpu mode), for
+  pstats, snakeviz or gprof2dot;
+- <name>.collapsed: stacks of every thread sampled at a fixed interval, in
+  the collapsed format of flamegraph.pl, inferno and speedscope; the open
+  spans of a thread appear as "[span]" frames below its Python frames;
+- <name>.memory.collapsed: live allocations by traceback at the end of the
+  run, weighted in bytes (memory mode, via tracemalloc);
+- <name>.spans.json: the span table.
+
+Network wait shows up as time in the api_call span (and in socket frames of
+the sampled stacks) rather than in cProfile's CPU-bound functions.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+
+PROFILE_MODES = ("cpu", "memory")
+
+_enabled = False
+_memory = False
+_lock = threading.Lock()
+# Span path -> [count, total seconds, max seconds, net allocated bytes]
+_spans: Dict[str, List[float]] = {}
+# Thread ident -> names of the spans open in that thread (read by the stack sampler)
+_open: Dict[int, List[str]] = {}
+
+
+@contextmanager
+def span(name: str):
+    """Time a named section while a Profiler is running (no-op otherwise)."""
+    if not _enabled:
+        yield
+        return
+    stack = _open.setdefault(threading.get_ident(), [])
+    stack.append(name)
+    path = ";".join(stack)
+    allocated = tracemalloc.get_traced_memory()[0] if _memory else 0
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if _memory:
+            allocated = tracemalloc.get_traced_memory()[0] - allocated
+        stack.pop()
+        with _lock:
+            entry = _spans.setdefault(path, [0, 0.0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+            entry[3] += allocated
+
+
+def span_table() -> List[Dict[str, Any]]:
+    """Recorded spans by descending total time."""
+    with _lock:
+        rows = [
+            {
+                "span": path,
+                "count": int(count),
+                "total_seconds": total,
+                "mean_seconds": total / count if count else 0.0,
+                "max_seconds": longest,
+                "allocated_bytes": int(allocated),
+            }
+            for path, (count, total, longest, allocated) in _spans.items()
+        ]
+    return sorted(rows, key=lambda row: -row["total_seconds"])
+
+
+class _StackSampler(threading.Thread):
+    """Samples the Python stacks of all other threads into collapsed-stack counts."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.counts: Counter = Counter()
+        # Frame labels per code object, so sampling allocates little after warm-up
+        self._labels: Dict[Any, str] = {}
+        self._stop_event = threading.Event()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == self.ident:
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                # Pool workers share one root ("ThreadPoolExecutor-0_3" -> "ThreadPoolExecutor-0")
+                thread = re.sub(r"_\d+$", "", names.get(ident, str(ident)))
+                spans = [f"[{name}]" for name in _open.get(ident, [])]
+                self.counts[";".join([thread] + spans + frames[::-1])] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class Profiler:
+    """Profiles a run: cProfile or tracemalloc, sampled stacks and spans."""
+
+    def __init__(
+        self,
+        mode: str = "cpu",
+        output_dir: Path = Path("results/profiles"),
+        name: str = "profile",
+        interval: float = 0.005,
+        memory_frames: int = 25
+    ):
+        """
+        Initialize profiler.
+
+        Args:
+            mode: "cpu" (cProfile) or "memory" (tracemalloc)
+            output_dir: Directory for the output files
+            name: File name stem (a timestamp is appended)
+            interval: Stack sampling interval in seconds
+            memory_frames: Traceback depth kept by tracemalloc
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode} (available: {', '.join(PROFILE_MODES)})")
+        self.mode = mode
+        self.output_dir = Path(output_dir)
+        self.name = name
+        self.interval = interval
+        self.memory_frames = memory_frames
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[_StackSampler] = None
+        self._started = 0.0
+
+    def start(self):
+        """Start profiling (spans start recording)."""
+        global _enabled, _memory
+        with _lock:
+            _spans.clear()
+        if self.mode == "memory":
+            tracemalloc.start(self.memory_frames)
+            _memory = True
+        _enabled = True
+        self._sampler = _StackSampler(self.interval)
+        self._sampler.start()
+        if self.mode == "cpu":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._started = time.perf_counter()
+
+    def stop(self) -> Dict[str, Path]:
+        """
+        Stop profiling and write the output files.
+
+        Returns:
+            Dict of output kind ("pstats", "collapsed", "memory", "spans") -> path
+        """
+        global _enabled, _memory
+        elapsed = time.perf_counter() - self._started
+        if self._profile is not None:
+            self._profile.disable()
+        self._sampler.stop()
+        snapshot = tracemalloc.take_snapshot() if self.mode == "memory" else None
+        _enabled = False
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stem = self.output_dir / f"{self.name}_{time.strftime('%Y%m%d_%H%M%S')}"
+        outputs = {}
+        if self._profile is not None:
+            outputs["pstats"] = stem.with_suffix(".pstats")
+            self._profile.dump_stats(outputs["pstats"])
+
+        outputs["collapsed"] = stem.with_suffix(".collapsed")
+        self._write_collapsed(outputs["collapsed"], self._sampler.counts)
+
+        if snapshot is not None:
+            _memory = False
+            tracemalloc.stop()
+            # Leave out the profiler's own bookkeeping (sampled stacks, labels)
+            snapshot = snapshot.filter_traces([
+                tracemalloc.Filter(False, __file__, all_frames=True),
+                tracemalloc.Filter(False, tracemalloc.__file__),
+            ])
+            allocations = Counter()
+            for stat in snapshot.statistics("traceback"):
+                # Tracebacks run from the oldest frame to the allocating one, i.e. root first
+                frames = [f"{Path(frame.filename).name}:{frame.lineno}" for frame in stat.traceback]
+                allocations[";".join(frames)] += stat.size
+            outputs["memory"] = stem.with_suffix(".memory.collapsed")
+            self._write_collapsed(outputs["memory"], allocations)
+
+        outputs["spans"] = stem.with_suffix(".spans.json")
+        with open(outputs["spans"], "w") as f:
+            json.dump({"mode": self.mode, "wall_seconds": elapsed, "spans": span_table()}, f, indent=2)
+        self.outputs = outputs
+        self.wall_seconds = elapsed
+        return outputs
+
+    @staticmethod
+    def _write_collapsed(path: Path, counts: Counter):
+        with open(path, "w") as f:
+            for stack, count in counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def summary(self, top: int = 15) -> str:
+        """Span table and (cpu mode) the top functions by cumulative time, as text."""
+        lines = [f"Profile ({self.mode}, {self.wall_seconds:.2f}s wall):"]
+        rows = span_table()
+        if rows:
+            lines.append(f"  {'span':<40} {'count':>7} {'total':>9} {'mean':>9} {'max':>9}"
+                         + (f" {'alloc':>10}" if self.mode == "memory" else ""))
+            for row in rows:
+                line = (f"  {row['span']:<40} {row['count']:>7} {row['total_seconds']:>8.2f}s "
+                        f"{row['mean_seconds'] * 1000:>7.1f}ms {row['max_seconds'] * 1000:>7.1f}ms")
+                if self.mode == "memory":
+                    line += f" {row['allocated_bytes'] / 1e6:>8.1f}MB"
+                lines.append(line)
+        if "pstats" in self.outputs:
+            buffer = io.StringIO()
+            stats = pstats.Stats(str(self.outputs["pstats"]), stream=buffer)
+            stats.sort_stats("cumulative").print_stats(top)
+            lines.append(buffer.getvalue().rstrip())
+        for kind, path in self.outputs.items():
+            lines.append(f"  {kind}: {path}")
+        return "\n".join(lines)
+
+
+def add_profile_arguments(parser, default_dir: Path):
+    """Add --profile / --profile-dir to a script's argument parser."""
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        default=None,
+        help="Profile the run (cpu: cProfile, memory: tracemalloc) and write pstats/collapsed stacks"
+    )
+    parser.add_argument("--profile-dir", type=Path, default=default_dir, help="Directory for --profile output")
+
+
+@contextmanager
+def profiled(mode: Optional[str], output_dir: Path, name: str):
+    """Profile the enclosed block if mode is set ("cpu" / "memory"), then print a summary."""
+    if mode is None:
+        yield None
+        return
+    profiler = Profiler(mode, output_dir, name)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        print("\n" + profiler.summary())
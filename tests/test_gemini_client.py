@@ -0,0 +1,31 @@
+"""Tests for the Gemini client's per-key service clients and request building (no network)."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from PIL import Image
+
+from src.llm_clients.gemini import GeminiClient
+
+
+def test_one_service_client_per_key():
+    client = GeminiClient(api_keys=["key-a", "key-b"], model_name="gemini-2.0-flash")
+    assert client.model_path == "models/gemini-2.0-flash"
+    assert client._client_for("key-a") is client._client_for("key-a")
+    assert client._client_for("key-a") is not client._client_for("key-b")
+
+
+def test_request_has_images_then_prompt(tmp_path):
+    image = tmp_path / "turtle.jpg"
+    Image.fromarray(np.zeros((8, 8, 3), dtype=np.uint8)).save(image)
+    client = GeminiClient(api_key="key-a", model_name="models/gemini-2.0-flash")
+
+    request = client._request("Same turtle?", [image, image])
+    parts = request.contents[0].parts
+    assert request.model == "models/gemini-2.0-flash"
+    assert [part.inline_data.mime_type for part in parts[:2]] == ["image/jpeg", "image/jpeg"]
+    assert parts[0].inline_data.data == image.read_bytes()
+    assert parts[2].text == "Same turtle?"
+    assert request.generation_config.temperature == 0.0
@@ -0,0 +1,28 @@
+"""Tests for decision extraction from LLM responses."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.analysis.results import extract_certainty, extract_decision
+
+
+# Long enough that the answer line is well past the first 100 characters
+LONG_EXPERT_RESPONSE = (
+    "**Image 1:** The post-ocular scales form a rosette of five polygons, with no obvious damage to the "
+    "flippers. **Image 2:** The same rosette is visible, although the lighting is different.\n\n"
+    "**Comparison:** The tympanic scales and the junctions between the post-ocular scales line up. "
+    "No, the barnacle cover is not relevant, as it changes between sightings.\n\n"
+    "ANSWER: YES\nCERTAINTY: HIGH"
+)
+
+
+def test_expert_versions_use_answer_line():
+    for prompt_type in ("expert", "expert_v2", "expert_v3"):
+        assert extract_decision(LONG_EXPERT_RESPONSE, prompt_type) == "yes"
+    assert extract_certainty(LONG_EXPERT_RESPONSE) == "high"
+
+
+def test_naive_answer_line():
+    assert extract_decision("**Answer: No**\n\nThe scale patterns differ.", "naive") == "no"
+    assert extract_decision("The images show sea turtles, hard to say.", "naive") == "unclear"
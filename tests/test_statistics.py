@@ -0,0 +1,18 @@
+"""Tests for paired significance tests."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from src.analysis.statistics import mcnemar_test
+
+
+def test_mcnemar_balanced_discordant_pairs():
+    # 20 items only A got right, 20 only B got right: no evidence of a difference
+    correct_a = np.array([True] * 20 + [False] * 20 + [True] * 10)
+    correct_b = np.array([False] * 20 + [True] * 20 + [True] * 10)
+    result = mcnemar_test(correct_a, correct_b, exact=False)
+    assert result["statistic"] == 0.0
+    assert result["p_value"] == 1.0